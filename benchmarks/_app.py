@@ -0,0 +1,44 @@
+"""
+Общие функции для бенчмарков: загрузка модуля программы и расчетного ядра, замер памяти.
+"""
+import importlib.util
+import os
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_FILE = os.path.join(REPO_DIR, "start_v8.8.py")
+CATALOG_FILE = os.path.join(REPO_DIR, "Матрица.xlsx")
+
+
+def load_app_module():
+    """Импортирует start_v8.8.py как модуль (имя файла содержит точку)"""
+    if REPO_DIR not in sys.path:
+        sys.path.insert(0, REPO_DIR)
+    spec = importlib.util.spec_from_file_location("radiatool_app", APP_FILE)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_engine_module():
+    """Импортирует расчетное ядро radiatool_engine (без tkinter)"""
+    if REPO_DIR not in sys.path:
+        sys.path.insert(0, REPO_DIR)
+    import radiatool_engine
+    return radiatool_engine
+
+
+def peak_rss_mb():
+    """Пиковый объем резидентной памяти текущего процесса, МБ (None, если неизвестно)"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # В Linux значение в КБ, в macOS - в байтах
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+    except Exception:
+        return None
@@ -0,0 +1,102 @@
+"""
+Поиск артикулов при импорте спецификации и расчете итогов:
+перебор листов каталога (как было) против глобального индекса артикулов.
+
+Запуск:
+    python benchmarks/bench_article_index.py [--lines 10000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _app import CATALOG_FILE, load_engine_module
+
+
+def import_by_scan(sheets, rows):
+    """Прежний поиск из load_excel_spec: перебор всех листов для каждой строки"""
+    entry_values = {}
+    for art, qty in rows:
+        for sheet_name, sheet_data in sheets.items():
+            if art in sheet_data['Артикул'].astype(str).str.strip().values:
+                entry_values[(sheet_name, art)] = str(qty)
+                break
+    return entry_values
+
+
+def import_by_index(catalog, rows):
+    """Поиск через индекс артикулов каталога"""
+    entry_values = {}
+    for art, qty in rows:
+        product = catalog.find_article(art)
+        if product is not None:
+            entry_values[(product.sheet, art)] = str(qty)
+    return entry_values
+
+
+def totals_by_scan(sheets, spec_data):
+    """Прежний calculate_totals: перебор всех листов для каждой строки спецификации"""
+    total_weight = 0.0
+    total_volume = 0.0
+    for _, row in spec_data.iterrows():
+        art = str(row['Артикул']).strip()
+        qty = int(row['Кол-во'])
+        for sheet, data in sheets.items():
+            data_arts = data['Артикул'].astype(str).str.strip()
+            product = data[data_arts == art]
+            if not product.empty:
+                total_weight += float(product.iloc[0]['Вес, кг']) * qty
+                total_volume += float(product.iloc[0]['Объем, м3']) * qty
+                break
+    return float(total_weight), float(total_volume)
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lines", type=int, default=10000, help="количество строк спецификации")
+    args = parser.parse_args()
+
+    import pandas as pd
+
+    engine_module = load_engine_module()
+    catalog = engine_module.LazyCatalog(CATALOG_FILE)
+    catalog.load_all()
+    sheets = {name: catalog[name].to_frame() for name in catalog}
+
+    # Синтетическая спецификация: артикулы радиаторов, кронштейны и неизвестные артикулы
+    rnd = random.Random(42)
+    articles = [str(a).strip() for data in sheets.values() for a in data['Артикул']]
+    brackets = [bracket.article for bracket in catalog.brackets()]
+    pool = articles + brackets + ["0000000000", "XYZ-1"]
+    rows = [(rnd.choice(pool), rnd.randint(1, 20)) for _ in range(args.lines)]
+    spec_data = pd.DataFrame({
+        "Артикул": [art for art, _ in rows],
+        "Кол-во": [qty for _, qty in rows],
+    })
+
+    engine = engine_module.RadiatorEngine(catalog)
+
+    print(f"Строк в спецификации: {args.lines}")
+    before, t_before = timed(import_by_scan, sheets, rows)
+    after, t_after = timed(import_by_index, catalog, rows)
+    assert before == after, "Результаты импорта различаются"
+    print(f"Импорт:  перебор листов {t_before * 1000:9.1f} мс | индекс {t_after * 1000:7.1f} мс "
+          f"| ускорение x{t_before / t_after:.0f}")
+
+    before, t_before = timed(totals_by_scan, sheets, spec_data)
+    after, t_after = timed(engine.spec_weight_volume, spec_data)
+    assert abs(before[0] - after[0]) < 1e-6 and abs(before[1] - after[1]) < 1e-9, "Итоги различаются"
+    print(f"Итоги:   перебор листов {t_before * 1000:9.1f} мс | индекс {t_after * 1000:7.1f} мс "
+          f"| ускорение x{t_before / t_after:.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Пакетный расчет спецификаций (radiatool_batch): время обработки набора файлов
+заказчиков одним процессом и пулом процессов.
+
+Запуск:
+    python benchmarks/bench_batch_cli.py [--files 24] [--rows 300] [--jobs 4]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _app import CATALOG_FILE, load_engine_module
+
+
+def write_specs(engine, directory, files, rows):
+    """Создает files спецификаций по rows строк с артикулами каталога"""
+    import pandas as pd
+
+    articles = [art for name in engine.catalog for art in engine.catalog[name].articles]
+    rnd = random.Random(42)
+    for i in range(files):
+        frame = pd.DataFrame({"Артикул": [rnd.choice(articles) for _ in range(rows)],
+                              "Количество": [rnd.randint(1, 5) for _ in range(rows)]})
+        frame.to_excel(os.path.join(directory, f"Заявка {i + 1:03d}.xlsx"), index=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=24, help="количество файлов спецификаций")
+    parser.add_argument("--rows", type=int, default=300, help="строк в каждом файле")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="процессов в пуле")
+    args = parser.parse_args()
+
+    engine_module = load_engine_module()
+    import radiatool_batch
+
+    engine = engine_module.RadiatorEngine.from_file(CATALOG_FILE)
+    options = engine_module.SpecOptions(10.0, 5.0, engine_module.WALL_BRACKETS)
+    with tempfile.TemporaryDirectory() as directory:
+        write_specs(engine, directory, args.files, args.rows)
+        files = radiatool_batch.collect_inputs([directory])
+        for jobs in dict.fromkeys((1, args.jobs)):
+            start = time.perf_counter()
+            results = radiatool_batch.run_batch(files, os.path.join(directory, f"out_{jobs}"), options,
+                                                CATALOG_FILE, jobs=jobs)
+            elapsed = time.perf_counter() - start
+            assert all(result.status == "ok" for result in results), "Есть файлы с ошибками"
+            per_file = sum(result.seconds for result in results) / len(results)
+            print(f"Процессов {jobs:2d}: {elapsed:6.2f} с на {len(results)} файлов "
+                  f"({len(results) / elapsed:5.1f} файл/с) | в среднем на файл {per_file * 1000:6.1f} мс")
+
+
+if __name__ == "__main__":
+    main()
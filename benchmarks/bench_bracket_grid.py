@@ -0,0 +1,54 @@
+"""
+Таблица кронштейнов BracketGrid: время построения и сверки с правилами,
+подбор кронштейнов спецификации по таблице на массивах против поштучного
+подбора по правилам (10, 500 и 5000 различных позиций).
+
+Запуск:
+    python benchmarks/bench_bracket_grid.py [--repeat 5]
+"""
+import argparse
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _app import load_engine_module
+from bench_spec_pipeline import OPTIONS, best_time, make_engine, synthetic_catalog
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="количество повторов (берется лучшее время)")
+    args = parser.parse_args()
+
+    engine_module = load_engine_module()
+    catalog = synthetic_catalog(engine_module)
+    engine = make_engine(engine_module, catalog)
+    rules = engine.bracket_rules
+
+    t_compile, _ = best_time(rules.compile, args.repeat)
+    grid = rules.grid
+    t_verify, mismatches = best_time(lambda: grid.verify(rules), 1)
+    assert not mismatches, f"Таблица расходится с правилами: {mismatches[:5]}"
+    print(f"Таблица {' x '.join(map(str, grid.code.shape))} ({grid.code.nbytes + grid.qty.nbytes} байт): "
+          f"построение {t_compile * 1000:.1f} мс, сверка с правилами {t_verify * 1000:.1f} мс")
+
+    keys = [(name, art) for name in catalog for art in catalog[name].articles]
+    rnd = random.Random(42)
+    mount, discount = OPTIONS["mount"], OPTIONS["bracket_discount"]
+    for size in (10, 500, 5000):
+        values = {key: rnd.choice(["1", "2", "3+1", "10", "0"]) for key in rnd.sample(keys, size)}
+        selection = engine.select_positions(values)
+
+        t_grid, by_grid = best_time(lambda: engine.bracket_columns(selection, mount, discount), args.repeat)
+        rules.grid = None
+        t_rules, by_rules = best_time(lambda: engine.bracket_columns(selection, mount, discount), args.repeat)
+        rules.grid = grid
+
+        assert all(str(by_grid[column]) == str(by_rules[column]) for column in by_rules), "Кронштейны различаются"
+        print(f"Позиций {size:5d}: по правилам {t_rules * 1000:7.2f} мс | "
+              f"по таблице {t_grid * 1000:6.2f} мс | ускорение x{t_rules / t_grid:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Матрица на Canvas для большого синтетического каталога: время показа листа
+и перерисовки при прокрутке. Требуется графический дисплей.
+
+Запуск:
+    python benchmarks/bench_canvas_matrix.py [--heights 100] [--lengths 100] [--scrolls 200]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _app import load_app_module, load_engine_module
+
+
+def synthetic_sheet(heights, lengths):
+    """Столбцы листа радиаторов со всеми сочетаниями высоты и длины"""
+    columns = {"Артикул": [], "Наименование": [], "Цена, руб": [], "Мощность, Вт": [],
+               "Вес, кг": [], "Объем, м3": []}
+    for height in heights:
+        for length in lengths:
+            columns["Артикул"].append(f"{height:04d}{length:05d}")
+            columns["Наименование"].append(f"Радиатор Test 22/{height}/{length}")
+            columns["Цена, руб"].append(length * 3.5)
+            columns["Мощность, Вт"].append(height * length / 500)
+            columns["Вес, кг"].append(length / 100)
+            columns["Объем, м3"].append(0.01)
+    return columns
+
+
+class BenchApp:
+    """Минимальное окружение CanvasMatrixView без остального интерфейса программы"""
+
+    def __init__(self, root, catalog):
+        self.root = root
+        self.catalog = catalog
+        self.entry_values = {}
+        self.entries = {}
+
+    def has_any_value(self):
+        return bool(self.entry_values)
+
+    def validate_input(self, value):
+        return True
+
+    def cell_validate_command(self):
+        return (self.root.register(self.validate_input), '%P')
+
+    def on_entry_focus_in(self, event):
+        pass
+
+    def on_entry_focus_out(self, event, sheet_name, art):
+        pass
+
+    def show_tooltip_on_hover(self, product):
+        pass
+
+    def hide_tooltip_on_leave(self):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--heights", type=int, default=100, help="количество высот (столбцов)")
+    parser.add_argument("--lengths", type=int, default=100, help="количество длин (строк)")
+    parser.add_argument("--scrolls", type=int, default=200, help="количество шагов прокрутки")
+    args = parser.parse_args()
+
+    app_module = load_app_module()
+    import tkinter as tk
+
+    heights = [200 + 10 * i for i in range(args.heights)]
+    lengths = [300 + 50 * i for i in range(args.lengths)]
+    catalog = load_engine_module().LazyCatalog(sheets={"VK-правое 22": synthetic_sheet(heights, lengths)})
+
+    root = tk.Tk()
+    app = BenchApp(root, catalog)
+    # Каждая десятая ячейка заполнена
+    for i, art in enumerate(catalog["VK-правое 22"].articles):
+        if i % 10 == 0:
+            app.entry_values[("VK-правое 22", art)] = str(i % 7 + 1)
+
+    view = app_module.CanvasMatrixView(app, root)
+    view.frame.pack(fill="both", expand=True)
+    root.update()
+
+    start = time.perf_counter()
+    view.show("VK-правое 22")
+    root.update()
+    show_time = time.perf_counter() - start
+
+    redraws = []
+    for step in range(args.scrolls):
+        view.canvas.yview_moveto((step % 100) / 100)
+        view.canvas.xview_moveto((step * 7 % 100) / 100)
+        start = time.perf_counter()
+        view.redraw()
+        root.update_idletasks()
+        redraws.append(time.perf_counter() - start)
+
+    print(f"Ячеек: {len(view.products)}, элементов Canvas: {len(view.canvas.find_all())}")
+    print(f"Показ листа: {show_time * 1000:.1f} мс")
+    print(f"Перерисовка при прокрутке: медиана {statistics.median(redraws) * 1000:.2f} мс, "
+          f"максимум {max(redraws) * 1000:.2f} мс")
+    root.destroy()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Память и время доступа к товару: листы каталога в виде DataFrame (как было)
+против компактных ProductTable на массивах NumPy.
+
+Запуск:
+    python benchmarks/bench_catalog_memory.py [--lookups 20000]
+"""
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _app import CATALOG_FILE, load_engine_module
+
+
+def build_frames(columns_by_sheet):
+    """Прежнее представление: DataFrame на лист с приведением типов, как в normalize_sheet"""
+    import pandas as pd
+    sheets = {}
+    for name, columns in columns_by_sheet.items():
+        data = pd.DataFrame(columns)
+        data['Артикул'] = data['Артикул'].astype(str).str.strip()
+        data['Вес, кг'] = pd.to_numeric(data['Вес, кг'], errors='coerce').fillna(0)
+        data['Объем, м3'] = pd.to_numeric(data['Объем, м3'], errors='coerce').fillna(0)
+        sheets[name] = data
+    return sheets
+
+
+def build_tables(engine, columns_by_sheet):
+    return {name: engine.ProductTable(name, columns) for name, columns in columns_by_sheet.items()}
+
+
+def retained_bytes(builder, *args):
+    """Объем памяти, который остается занятым построенной структурой"""
+    gc.collect()
+    tracemalloc.start()
+    result = builder(*args)
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current
+
+
+def lookup_frames(sheets, keys):
+    """Прежний доступ из prepare_spec_data: маска по артикулу и float() каждого поля"""
+    total = 0.0
+    for sheet_name, art in keys:
+        data = sheets[sheet_name]
+        product = data.loc[data['Артикул'] == art].iloc[0]
+        total += float(product['Цена, руб']) + float(product['Вес, кг']) + float(product['Объем, м3'])
+    return total
+
+
+def lookup_catalog(catalog, keys):
+    """Доступ через индекс каталога: номер строки и чтение из массивов"""
+    total = 0.0
+    for sheet_name, art in keys:
+        product = catalog.product_by_key(sheet_name, art)
+        total += product.price + product.weight + product.volume
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lookups", type=int, default=20000, help="количество обращений к товарам")
+    args = parser.parse_args()
+
+    engine = load_engine_module()
+    reader = engine.StreamingCatalogReader(CATALOG_FILE)
+    columns_by_sheet = {
+        name: reader.read_columns(name)
+        for name in reader.sheet_names if name != engine.LazyCatalog.BRACKETS_SHEET
+    }
+    reader.close()
+
+    # Импортируем pandas заранее, чтобы не учитывать сам модуль в памяти DataFrame
+    import pandas  # noqa: F401
+
+    frames, frames_bytes = retained_bytes(build_frames, columns_by_sheet)
+    tables, tables_bytes = retained_bytes(build_tables, engine, columns_by_sheet)
+    products = sum(len(table) for table in tables.values())
+
+    print(f"Товаров в каталоге: {products}")
+    print(f"Память: DataFrame {frames_bytes / 1024:8.1f} КБ | ProductTable {tables_bytes / 1024:8.1f} КБ "
+          f"| меньше в {frames_bytes / tables_bytes:.1f} раза")
+
+    catalog = engine.LazyCatalog(sheets={name: table.to_columns() for name, table in tables.items()})
+    rnd = random.Random(42)
+    all_keys = [(name, art) for name, table in tables.items() for art in table.articles]
+    keys = [rnd.choice(all_keys) for _ in range(args.lookups)]
+
+    start = time.perf_counter()
+    before = lookup_frames(frames, keys)
+    t_before = time.perf_counter() - start
+
+    start = time.perf_counter()
+    after = lookup_catalog(catalog, keys)
+    t_after = time.perf_counter() - start
+
+    assert abs(before - after) < 1e-6 * max(1.0, abs(before)), "Значения различаются"
+    print(f"Доступ к товару: DataFrame {t_before / args.lookups * 1e6:8.2f} мкс | "
+          f"ProductTable {t_after / args.lookups * 1e6:6.2f} мкс | ускорение x{t_before / t_after:.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Сравнение способов чтения "Матрица.xlsx": pd.read_excel и потоковое чтение openpyxl.
+
+Каждый вариант запускается в отдельном процессе, чтобы честно замерить
+время (включая импорт модулей) и пиковое потребление памяти.
+
+Запуск:
+    python benchmarks/bench_catalog_reader.py [--repeat 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+MODES = {
+    "pandas": "pd.read_excel -> ProductTable (LazyCatalog)",
+    "openpyxl": "openpyxl read_only -> ProductTable (LazyCatalog)",
+    "openpyxl-columns": "openpyxl read_only -> списки столбцов, без DataFrame",
+}
+
+
+def run_child(mode):
+    """Выполняет один замер внутри дочернего процесса и печатает JSON"""
+    start = time.perf_counter()
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from _app import CATALOG_FILE, load_engine_module, peak_rss_mb
+
+    engine = load_engine_module()
+    imported = time.perf_counter()
+
+    if mode == "openpyxl-columns":
+        reader = engine.StreamingCatalogReader(CATALOG_FILE)
+        sheets = {name: reader.read_columns(name) for name in reader.sheet_names}
+        reader.close()
+        rows = sum(len(next(iter(cols.values()), [])) for cols in sheets.values())
+    else:
+        catalog = engine.LazyCatalog(CATALOG_FILE, reader=mode)
+        catalog.load_all()
+        rows = sum(len(catalog[name]) for name in catalog) + len(catalog.brackets())
+    finished = time.perf_counter()
+
+    print(json.dumps({
+        "import_s": imported - start,
+        "load_s": finished - imported,
+        "total_s": finished - start,
+        "rows": rows,
+        "peak_rss_mb": peak_rss_mb(),
+        "pandas_imported": "pandas" in sys.modules,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="количество запусков каждого варианта")
+    parser.add_argument("--child", choices=list(MODES), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child)
+        return
+
+    print(f"{'Вариант':<18} {'импорт, мс':>11} {'чтение, мс':>11} {'всего, мс':>10} {'пик RSS, МБ':>12}  pandas")
+    for mode, title in MODES.items():
+        results = []
+        for _ in range(args.repeat):
+            out = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child", mode],
+                check=True, capture_output=True, text=True
+            ).stdout
+            results.append(json.loads(out.strip().splitlines()[-1]))
+
+        def median(key):
+            return statistics.median(r[key] for r in results) * 1000
+
+        rss = [r["peak_rss_mb"] for r in results if r["peak_rss_mb"] is not None]
+        rss_text = f"{statistics.median(rss):.1f}" if rss else "н/д"
+        print(f"{mode:<18} {median('import_s'):>11.1f} {median('load_s'):>11.1f} "
+              f"{median('total_s'):>10.1f} {rss_text:>12}  {'да' if results[0]['pandas_imported'] else 'нет'}")
+        print(f"  {title}, строк: {results[0]['rows']}")
+
+
+if __name__ == "__main__":
+    main()
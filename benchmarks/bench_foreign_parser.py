@@ -0,0 +1,110 @@
+"""
+Разбор наименований радиаторов других производителей для спецификации на 100 000
+строк: прежняя цепочка из четырех регулярных выражений против ForeignNameParser
+(без кэша и с заполненным LRU-кэшем) и полный подбор аналогов match_foreign.
+
+Запуск:
+    python benchmarks/bench_foreign_parser.py [--lines 100000] [--unique 3000]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _app import load_engine_module
+from bench_spec_pipeline import HEIGHTS, LENGTHS, TYPES, make_engine, synthetic_catalog
+
+# Форматы наименований, которые распознавала прежняя реализация
+NAME_FORMATS = (
+    "C {t}-{h}-{l}",
+    "CV {t}-{h}-{l}",
+    "Радиатор стальной панельный {t}/{h}/{l}",
+    "Радиатор тип {t} / {h} / {l} нижнее подключение",
+    "Радиатор K-Profil {t} {h} {l}",
+    "Радиатор VK-Profil {t}\\{h}\\{l} белый",
+)
+
+
+def parse_name_loop(name):
+    """Прежняя реализация: подключение и параметры - отдельными выражениями по очереди"""
+    name_lower = name.lower()
+    if re.match(r'^cv\s*\d+', name_lower, re.IGNORECASE):
+        connection = "VK-правое"
+    elif 'vk' in name_lower or 'нижн' in name_lower:
+        connection = "VK-правое"
+    else:
+        connection = "K-боковое"
+
+    match = re.match(r'^[cv]\s*(\d+)\s*[\-\s]\s*(\d+)\s*[\-\s]\s*(\d+)', name, re.IGNORECASE)
+    if match:
+        return connection, match.group(1), match.group(2), match.group(3)
+    match = re.search(r'(тип\s*)?(\d+)[\\\/\s\-]*(\d+)[\\\/\s\-]*(\d+)', name, re.IGNORECASE)
+    if match:
+        return connection, match.group(2), match.group(3), match.group(4)
+    match = re.search(r'(\d+)\s+(\d+)\s+(\d+)', name)
+    if match:
+        return connection, match.group(1), match.group(2), match.group(3)
+    match = re.search(r'тип\s*(\d+)\s*/\s*(\d+)\s*/\s*(\d+)', name, re.IGNORECASE)
+    if match:
+        return connection, match.group(1), match.group(2), match.group(3)
+    return None
+
+
+def synthetic_names(lines, unique, rnd):
+    """Строки спецификации: unique различных наименований, повторяющихся до lines строк"""
+    names = [rnd.choice(NAME_FORMATS).format(t=rnd.choice(TYPES), h=rnd.choice(HEIGHTS),
+                                             l=rnd.choice(LENGTHS))
+             for _ in range(unique)]
+    return [(rnd.choice(names), rnd.randint(1, 5)) for _ in range(lines)]
+
+
+def lines_per_second(func, rows):
+    start = time.perf_counter()
+    result = func(rows)
+    return len(rows) / (time.perf_counter() - start), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lines", type=int, default=100000, help="количество строк спецификации")
+    parser.add_argument("--unique", type=int, default=3000, help="количество различных наименований")
+    args = parser.parse_args()
+
+    engine_module = load_engine_module()
+    rows = synthetic_names(args.lines, args.unique, random.Random(42))
+
+    def loop(rows):
+        return [parse_name_loop(name) for name, _ in rows]
+
+    # Форматы NAME_FORMATS шаблоны брендов разбирают так же, как прежняя цепочка
+    parser_cold = engine_module.ForeignNameParser(cache_size=0)
+    parser_warm = engine_module.ForeignNameParser()
+
+    def parse(name_parser):
+        return lambda rows: [name_parser.parse(name) for name, _ in rows]
+
+    rate_loop, before = lines_per_second(loop, rows)
+    rate_cold, after = lines_per_second(parse(parser_cold), rows)
+    parse(parser_warm)(rows)
+    rate_warm, cached = lines_per_second(parse(parser_warm), rows)
+
+    assert [tuple(parsed) for parsed in after] == before, "Результаты разбора различаются"
+    assert cached == after, "Результаты из кэша отличаются"
+
+    engine = make_engine(engine_module, synthetic_catalog(engine_module))
+    engine.name_parser = engine_module.ForeignNameParser()
+    rate_match, matched = lines_per_second(engine.match_foreign, rows)
+
+    print(f"Строк: {len(rows)}, различных наименований: {args.unique}, "
+          f"сопоставлено позиций: {len(matched.quantities)}")
+    print(f"Цепочка выражений:      {rate_loop:12,.0f} строк/с")
+    print(f"Грамматика без кэша:    {rate_cold:12,.0f} строк/с (x{rate_cold / rate_loop:.1f})")
+    print(f"Грамматика с LRU-кэшем: {rate_warm:12,.0f} строк/с (x{rate_warm / rate_loop:.1f})")
+    print(f"Подбор match_foreign:   {rate_match:12,.0f} строк/с")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Отчет о времени импорта модулей при запуске программы (в стиле python -X importtime).
+
+Сравниваются два варианта:
+  before - pandas, openpyxl и pyperclip импортируются до программы,
+           как это было при импорте на верхнем уровне start_v8.8.py;
+  after  - импортируется только start_v8.8.py (тяжелые модули отложены);
+  engine - только расчетное ядро radiatool_engine (без tkinter, для CLI и сервера).
+
+Запуск:
+    python benchmarks/bench_import_time.py [--top 10]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+
+LOAD_APP = (
+    "import sys; sys.path.insert(0, {bench_dir!r}); "
+    "from _app import load_app_module; load_app_module()"
+)
+
+LOAD_ENGINE = (
+    "import sys; sys.path.insert(0, {bench_dir!r}); "
+    "from _app import load_engine_module; load_engine_module()"
+)
+
+VARIANTS = {
+    "before": "import pandas, openpyxl, openpyxl.styles, pyperclip; " + LOAD_APP,
+    "after": LOAD_APP,
+    "engine": LOAD_ENGINE,
+}
+
+
+def measure(code):
+    """Запускает код с -X importtime и возвращает список (модуль, self_us, cumulative_us, уровень)"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code.format(bench_dir=BENCH_DIR)],
+        check=True, capture_output=True, text=True
+    )
+    records = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        level = (len(name) - len(name.lstrip())) // 2
+        records.append((name.strip(), int(self_us), int(cumulative_us), level))
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--top", type=int, default=10, help="сколько самых тяжелых импортов показать")
+    args = parser.parse_args()
+
+    totals = {}
+    for variant, code in VARIANTS.items():
+        records = measure(code)
+        top_level = [r for r in records if r[3] == 0]
+        total_ms = sum(r[2] for r in top_level) / 1000
+        totals[variant] = total_ms
+
+        print(f"== {variant}: всего {total_ms:.1f} мс, модулей {len(records)}")
+        print(f"   {'cumulative, мс':>14} {'self, мс':>9}  модуль")
+        for name, self_us, cumulative_us, _ in sorted(top_level, key=lambda r: -r[2])[:args.top]:
+            print(f"   {cumulative_us / 1000:>14.1f} {self_us / 1000:>9.1f}  {name}")
+        heavy = [name for name in ("tkinter", "pandas", "numpy", "openpyxl", "pyperclip")
+                 if any(r[0] == name for r in records)]
+        print(f"   загружены тяжелые модули: {', '.join(heavy) or 'нет'}")
+        print()
+
+    print(f"Экономия при запуске: {totals['before'] - totals['after']:.1f} мс "
+          f"({totals['before']:.1f} -> {totals['after']:.1f})")
+
+
+if __name__ == "__main__":
+    main()
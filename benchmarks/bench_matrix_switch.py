@@ -0,0 +1,73 @@
+"""
+Переключение листов матрицы: задержка show_selected_matrix, число виджетов,
+команд Tcl и объектов Python на протяжении многих переключений подряд.
+Требуется графический дисплей.
+
+Запуск:
+    python benchmarks/bench_matrix_switch.py [--switches 1000]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _app import REPO_DIR, load_app_module
+
+
+def count_widgets(widget):
+    """Число виджетов в дереве, начиная с widget"""
+    return 1 + sum(count_widgets(child) for child in widget.winfo_children())
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--switches", type=int, default=1000, help="количество переключений листа")
+    args = parser.parse_args()
+
+    # resource_path ищет "Матрица.xlsx" в текущей папке
+    os.chdir(REPO_DIR)
+    app_module = load_app_module()
+    import tkinter as tk
+
+    root = tk.Tk()
+    app = app_module.RadiatorApp(root)
+    app.catalog.wait_loaded()
+    sheets = list(app.catalog)
+    root.update()
+    print("Ресурсы до переключений:")
+    before = app.debug_resource_report()
+
+    latencies = []
+    widgets = []
+    for i in range(args.switches):
+        connection, radiator_type = sheets[i % len(sheets)].rsplit(" ", 1)
+        start = time.perf_counter()
+        app.connection_var.set(connection)
+        app.radiator_type_var.set(radiator_type)
+        app.show_selected_matrix()
+        root.update_idletasks()
+        latencies.append(time.perf_counter() - start)
+        widgets.append(count_widgets(root))
+
+    window = max(1, args.switches // 10)
+    print(f"Переключений: {args.switches}, листов: {len(sheets)}")
+    for title, part in (("первые", slice(0, window)), ("последние", slice(-window, None))):
+        chunk = latencies[part]
+        print(f"{title:>9} {window}: медиана {statistics.median(chunk) * 1000:6.2f} мс | "
+              f"p95 {percentile(chunk, 0.95) * 1000:6.2f} мс | виджетов {widgets[part][-1]}")
+    print(f"Виджетов: min {min(widgets)}, max {max(widgets)}")
+    print("Ресурсы после переключений:")
+    after = app.debug_resource_report()
+    print("Прирост: " + ", ".join(f"{name} {after[name] - before[name]:+d}" for name in before))
+    root.destroy()
+
+
+if __name__ == "__main__":
+    main()
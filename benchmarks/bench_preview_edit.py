@@ -0,0 +1,79 @@
+"""
+Итоги предпросмотра при изменении количества в одной строке: полный пересчет
+(строка "Итого" через query, мощность, вес и объем по всем строкам) против
+обновления на разницу в SpecTable. Спецификация на 3000 строк.
+
+Запуск:
+    python benchmarks/bench_preview_edit.py [--positions 3000] [--edits 200]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _app import load_engine_module
+from bench_spec_pipeline import OPTIONS, make_engine, synthetic_catalog
+
+
+def full_totals(engine_module, engine, spec_data):
+    """Прежний пересчет после каждой правки: три прохода по таблице"""
+    parse = engine_module.parse_quantity
+    total_sum = spec_data["Сумма, руб (с НДС)"].sum()
+    radiators = sum(spec_data.query("Наименование.str.contains('Радиатор')")["Кол-во"].apply(parse))
+    brackets = sum(spec_data.query("Наименование.str.contains('Кронштейн')")["Кол-во"].apply(parse))
+    power = engine_module.spec_power(spec_data)
+    weight, volume = engine.spec_weight_volume(spec_data)
+    return radiators, brackets, round(total_sum, 2), power, round(weight, 3), round(volume, 5)
+
+
+def delta_totals(totals):
+    return (totals.radiators, totals.brackets, round(totals.total, 2), round(totals.power, 2),
+            round(totals.weight, 3), round(totals.volume, 5))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--positions", type=int, default=3000, help="количество позиций спецификации")
+    parser.add_argument("--edits", type=int, default=200, help="количество правок")
+    args = parser.parse_args()
+
+    engine_module = load_engine_module()
+    catalog = synthetic_catalog(engine_module)
+    engine = make_engine(engine_module, catalog)
+    keys = [(name, art) for name in catalog for art in catalog[name].articles]
+    rnd = random.Random(42)
+    values = {key: rnd.choice(["1", "2", "3+1", "10"]) for key in rnd.sample(keys, args.positions)}
+    spec_data = engine.build_spec(values, **OPTIONS)
+
+    start = time.perf_counter()
+    table = engine_module.SpecTable.from_frame(engine, spec_data)
+    t_init = time.perf_counter() - start
+
+    edits = [(rnd.randrange(len(spec_data)), rnd.randint(0, 20)) for _ in range(args.edits)]
+    t_full = t_delta = 0.0
+    for index, qty in edits:
+        line_sum = float(spec_data.at[index, "Цена со скидкой, руб (с НДС)"]) * qty
+        spec_data.at[index, "Кол-во"] = qty
+        spec_data.at[index, "Сумма, руб (с НДС)"] = line_sum
+
+        start = time.perf_counter()
+        expected = full_totals(engine_module, engine, spec_data)
+        t_full += time.perf_counter() - start
+
+        start = time.perf_counter()
+        table.set_qty(table.row_id(index), qty)
+        actual = delta_totals(table)
+        t_delta += time.perf_counter() - start
+
+        assert expected == actual, f"Итоги различаются: {expected} != {actual}"
+
+    print(f"Строк спецификации: {len(spec_data)}, правок: {args.edits}, "
+          f"построение SpecTable {t_init * 1000:.1f} мс")
+    print(f"Итоги на одну правку: полный пересчет {t_full / args.edits * 1000:8.2f} мс | "
+          f"на разницу {t_delta / args.edits * 1e6:6.1f} мкс | ускорение x{t_full / t_delta:.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Таблица предпросмотра для спецификации на несколько тысяч строк: открытие с
+вставкой всех строк в ttk.Treeview против VirtualTreeview (форматируются только
+показанные строки) и перерисовка при прокрутке. Требуется графический дисплей.
+
+Запуск:
+    python benchmarks/bench_preview_virtual.py [--positions 5000] [--scrolls 200]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _app import load_app_module, load_engine_module
+from bench_spec_pipeline import OPTIONS, make_engine, synthetic_catalog
+
+
+class BenchApp:
+    """Форматирование строк предпросмотра без остального интерфейса программы"""
+
+    def __init__(self, app_module):
+        self.format_preview_row = app_module.RadiatorApp.format_preview_row.__get__(self)
+        self.preview_total_values = app_module.RadiatorApp.preview_total_values.__get__(self)
+        self.preview_rows = app_module.RadiatorApp.preview_rows.__get__(self)
+
+
+def open_full(root, app, table, columns):
+    """Прежний способ: все строки вставляются в Treeview при открытии"""
+    import tkinter as tk
+    from tkinter import ttk
+    window = tk.Toplevel(root)
+    tree = ttk.Treeview(window, columns=columns, show="headings")
+    tree.pack(fill="both", expand=True)
+    for row in table.rows(0, len(table)):
+        tree.insert("", "end", values=app.format_preview_row(row))
+    tree.insert("", "end", values=app.preview_total_values(table), tags=("total",))
+    root.update()
+    return window
+
+
+def open_virtual(root, app_module, app, table, columns):
+    import tkinter as tk
+    window = tk.Toplevel(root)
+    view = app_module.VirtualTreeview(
+        window, columns,
+        row_count=lambda: len(table) + 1,
+        rows=lambda start, stop: app.preview_rows(table, start, stop),
+        show="headings",
+    )
+    view.frame.pack(fill="both", expand=True)
+    view.refresh()
+    root.update()
+    return window, view
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--positions", type=int, default=5000, help="количество позиций спецификации")
+    parser.add_argument("--scrolls", type=int, default=200, help="количество шагов прокрутки")
+    args = parser.parse_args()
+
+    app_module = load_app_module()
+    engine_module = load_engine_module()
+    import tkinter as tk
+
+    catalog = synthetic_catalog(engine_module)
+    engine = make_engine(engine_module, catalog)
+    keys = [(name, art) for name in catalog for art in catalog[name].articles]
+    rnd = random.Random(42)
+    values = {key: rnd.choice(["1", "2", "3+1", "10"]) for key in rnd.sample(keys, args.positions)}
+    spec_data = engine.build_spec(values, **OPTIONS)
+    table = engine_module.SpecTable.from_frame(engine, spec_data)
+    columns = list(spec_data.columns)
+    app = BenchApp(app_module)
+
+    root = tk.Tk()
+    root.withdraw()
+
+    start = time.perf_counter()
+    window = open_full(root, app, table, columns)
+    t_full = time.perf_counter() - start
+    window.destroy()
+
+    start = time.perf_counter()
+    window, view = open_virtual(root, app_module, app, table, columns)
+    t_virtual = time.perf_counter() - start
+
+    redraws = []
+    for step in range(args.scrolls):
+        start = time.perf_counter()
+        view.yview("moveto", (step * 37 % 100) / 100)
+        root.update_idletasks()
+        redraws.append(time.perf_counter() - start)
+
+    print(f"Строк спецификации: {len(table)}, строк Treeview в окне: {len(view.tree.get_children())}")
+    print(f"Открытие таблицы: все строки {t_full * 1000:8.1f} мс | виртуальная {t_virtual * 1000:6.1f} мс")
+    print(f"Перерисовка при прокрутке: медиана {statistics.median(redraws) * 1000:.2f} мс, "
+          f"максимум {max(redraws) * 1000:.2f} мс")
+    root.destroy()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Нагрузочный тест HTTP-сервера расчета (radiatool_server): параллельные клиенты
+отправляют запросы POST /quote (и часть - /quote.xlsx), отчет - запросы/с и задержки p50/p99.
+Перед нагрузкой проверяется, что некорректные количества отклоняются с кодом 400.
+
+Без --url сервер запускается в этом же процессе на свободном порту.
+
+Запуск:
+    python benchmarks/bench_server_load.py [--requests 2000] [--concurrency 16] [--items 20]
+        [--xlsx-share 0.05] [--url http://127.0.0.1:8765]
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _app import CATALOG_FILE, load_engine_module
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def make_payloads(engine, count, items, seed=42):
+    """Тела запросов со случайными артикулами, скидками и типом монтажа"""
+    articles = [art for name in engine.catalog for art in engine.catalog[name].articles]
+    rnd = random.Random(seed)
+    return [json.dumps({
+        "items": [{"article": rnd.choice(articles), "qty": rnd.randint(1, 5)} for _ in range(items)],
+        "radiator_discount": rnd.choice([0, 10, 12.5]),
+        "bracket_discount": rnd.choice([0, 5]),
+        "mount": rnd.choice(["wall", "floor", "none"]),
+    }).encode("utf-8") for _ in range(count)]
+
+
+# Количества, которые сервер должен отклонить (400), а не считать нулем или вычитать из суммы
+INVALID_QUANTITIES = [None, "None", "abc", "-3", -3, 0, "0+0", 2.5, True, ""]
+
+
+def check_invalid_quantities(host, port, article):
+    """Запросы с некорректным количеством получают 400, а не расчет с нулевыми или отрицательными строками"""
+    for qty in INVALID_QUANTITIES:
+        connection = http.client.HTTPConnection(host, port, timeout=60)
+        try:
+            body = json.dumps({"items": [{"article": article, "qty": qty}]}).encode("utf-8")
+            connection.request("POST", "/quote", body=body, headers={"Content-Type": "application/json"})
+            response = connection.getresponse()
+            response.read()
+            assert response.status == 400, f"qty={qty!r}: ожидался ответ 400, получен {response.status}"
+        finally:
+            connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000, help="всего запросов")
+    parser.add_argument("--concurrency", type=int, default=16, help="параллельных клиентов")
+    parser.add_argument("--items", type=int, default=20, help="позиций в запросе")
+    parser.add_argument("--xlsx-share", type=float, default=0.05, help="доля запросов /quote.xlsx")
+    parser.add_argument("--url", default=None, help="адрес запущенного сервера")
+    args = parser.parse_args()
+
+    engine_module = load_engine_module()
+    engine = engine_module.RadiatorEngine.from_file(CATALOG_FILE)
+    server = None
+    if args.url:
+        address = urlsplit(args.url)
+        host, port = address.hostname, address.port or 80
+    else:
+        import radiatool_server
+        import pandas  # noqa: F401
+        server = radiatool_server.QuoteServer(("127.0.0.1", 0), engine, quiet=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        host, port = "127.0.0.1", server.server_port
+
+    first_sheet = next(iter(engine.catalog))
+    check_invalid_quantities(host, port, engine.catalog[first_sheet].articles[0])
+    print(f"Некорректные количества отклонены: {len(INVALID_QUANTITIES)} запросов, ответ 400")
+
+    payloads = make_payloads(engine, args.requests, args.items)
+    rnd = random.Random(7)
+    paths = ["/quote.xlsx" if rnd.random() < args.xlsx_share else "/quote" for _ in payloads]
+
+    def send(index):
+        start = time.perf_counter()
+        connection = http.client.HTTPConnection(host, port, timeout=60)
+        try:
+            connection.request("POST", paths[index], body=payloads[index],
+                               headers={"Content-Type": "application/json"})
+            response = connection.getresponse()
+            response.read()
+            ok = response.status == 200
+        except OSError:
+            ok = False
+        finally:
+            connection.close()
+        return paths[index], time.perf_counter() - start, ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(send, range(len(payloads))))
+    elapsed = time.perf_counter() - start
+    if server is not None:
+        server.shutdown()
+        server.server_close()
+
+    errors = sum(not ok for _, _, ok in results)
+    print(f"Запросов: {len(results)} за {elapsed:.2f} с, клиентов {args.concurrency}, "
+          f"позиций в запросе {args.items}, ошибок {errors}")
+    print(f"Пропускная способность: {len(results) / elapsed:.1f} запросов/с")
+    for path in ("/quote", "/quote.xlsx"):
+        latencies = [latency for p, latency, _ in results if p == path]
+        if latencies:
+            print(f"{path:12} {len(latencies):6d} запросов | p50 {percentile(latencies, 0.5) * 1000:7.1f} мс | "
+                  f"p99 {percentile(latencies, 0.99) * 1000:7.1f} мс | максимум {max(latencies) * 1000:7.1f} мс")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Живая спецификация SpecModel: стоимость обновления итогов при вводе одной ячейки
+и время получения таблицы для предпросмотра (из кэша и с полным построением).
+
+Запуск:
+    python benchmarks/bench_spec_model.py [--positions 5000] [--edits 2000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _app import load_engine_module
+from bench_spec_pipeline import OPTIONS, make_engine, synthetic_catalog
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--positions", type=int, default=5000, help="количество заполненных позиций")
+    parser.add_argument("--edits", type=int, default=2000, help="количество изменений ячеек")
+    args = parser.parse_args()
+
+    engine_module = load_engine_module()
+    catalog = synthetic_catalog(engine_module)
+    keys = [(name, art) for name in catalog for art in catalog[name].articles]
+    rnd = random.Random(42)
+    values = {key: rnd.choice(["1", "2", "3+1", "10"]) for key in rnd.sample(keys, args.positions)}
+
+    quantities = engine_module.QuantityModel()
+    options = engine_module.SpecOptions(**OPTIONS)
+    model = engine_module.SpecModel(make_engine(engine_module, catalog), quantities, lambda: options)
+    quantities.subscribe(model.on_quantity_changed)
+    quantities.update(values)
+
+    edited = list(values)
+    start = time.perf_counter()
+    for i in range(args.edits):
+        quantities[rnd.choice(edited)] = str(i % 9 + 1)
+    t_edit = (time.perf_counter() - start) / args.edits
+
+    start = time.perf_counter()
+    model.rebuild()
+    t_rebuild = time.perf_counter() - start
+
+    # Импортируем pandas заранее, чтобы не учитывать импорт во времени построения
+    import pandas  # noqa: F401
+
+    start = time.perf_counter()
+    frame = model.snapshot()
+    t_build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    cached = model.snapshot()
+    t_cached = time.perf_counter() - start
+
+    assert frame.equals(cached), "Снимок из кэша отличается от построенного"
+    print(f"Позиций: {len(model.lines)}, строк спецификации: {len(frame)}, сумма {model.total:.2f} руб.")
+    print(f"Обновление итогов на одно изменение: {t_edit * 1e6:8.1f} мкс "
+          f"(полный пересчет итогов {t_rebuild * 1000:.1f} мс)")
+    print(f"Таблица для предпросмотра: построение {t_build * 1000:7.2f} мс | из кэша {t_cached * 1000:6.2f} мс")
+
+
+if __name__ == "__main__":
+    main()
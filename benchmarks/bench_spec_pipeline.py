@@ -0,0 +1,136 @@
+"""
+Формирование спецификации: прежний поштучный цикл по позициям против пакетного
+расчета RadiatorEngine.build_spec на массивах (10, 500 и 5000 различных позиций).
+
+Запуск:
+    python benchmarks/bench_spec_pipeline.py [--repeat 5]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _app import load_engine_module
+
+CONNECTIONS = ("VK-правое", "VK-левое", "K-боковое")
+TYPES = ("10", "11", "20", "21", "22", "30", "33")
+HEIGHTS = (300, 400, 500, 600, 900)
+LENGTHS = tuple(range(400, 5200, 100))
+
+
+OPTIONS = dict(radiator_discount=12.5, bracket_discount=7.0, mount="Настенные кронштейны")
+
+
+def synthetic_catalog(engine):
+    """Каталог на 21 лист с 5040 радиаторами и кронштейнами из встроенных правил"""
+    sheets = {}
+    for connection in CONNECTIONS:
+        for radiator_type in TYPES:
+            columns = {"Артикул": [], "Наименование": [], "Цена, руб": [], "Мощность, Вт": [],
+                       "Вес, кг": [], "Объем, м3": []}
+            for height in HEIGHTS:
+                for length in LENGTHS:
+                    columns["Артикул"].append(f"{connection[0]}{radiator_type}{height:04d}{length:05d}")
+                    columns["Наименование"].append(f"Радиатор {radiator_type}/{height}/{length}")
+                    columns["Цена, руб"].append(round(length * 7.37 + height * 1.13, 2))
+                    columns["Мощность, Вт"].append(height * length / 600)
+                    columns["Вес, кг"].append(length / 100)
+                    columns["Объем, м3"].append(0.01)
+            sheets[f"{connection} {radiator_type}"] = columns
+    articles = dict.fromkeys(rule.article for rule in engine.DEFAULT_BRACKET_RULES)
+    brackets = [(art, f"Кронштейн {art}", 45.6 + 3.3 * i, "") for i, art in enumerate(articles)]
+    return engine.LazyCatalog(sheets=sheets, brackets=brackets)
+
+
+def make_engine(engine_module, catalog):
+    engine = engine_module.RadiatorEngine(catalog)
+    engine.bracket_rules.compile()
+    return engine
+
+
+def prepare_spec_loop(engine, quantities, radiator_discount, bracket_discount, mount):
+    """Прежняя реализация: товар, скидка и кронштейны считаются отдельно для каждой позиции"""
+    import pandas as pd
+    from radiatool_engine import parse_quantity
+
+    radiator_data = []
+    brackets_temp = {}
+    for (sheet_name, art), value in quantities.items():
+        if value and sheet_name in engine.catalog:
+            qty_radiator = parse_quantity(value)
+            product = engine.catalog.product_by_key(sheet_name, art)
+            if product is None:
+                continue
+            radiator_type = sheet_name.split()[-1]
+            price = float(product.price)
+            discount = radiator_discount
+            discounted_price = round(price * (1 - discount / 100), 2)
+            height = int(product.height)
+            length = int(product.length)
+            radiator_data.append({
+                "Артикул": product.article, "Наименование": str(product.name),
+                "Мощность, Вт": float(product.power), "Цена, руб (с НДС)": price,
+                "Скидка, %": discount, "Цена со скидкой, руб (с НДС)": discounted_price,
+                "Кол-во": int(qty_radiator),
+                "Сумма, руб (с НДС)": round(discounted_price * qty_radiator, 2),
+                "key": (0 if "VK" in sheet_name else 1, int(radiator_type), height, length),
+            })
+            for item in engine.bracket_rules.resolve(radiator_type, height, length, mount):
+                if item.price is None:
+                    continue
+                if item.article not in brackets_temp:
+                    brackets_temp[item.article] = {"Артикул": item.article, "Наименование": item.name,
+                                                   "Цена, руб (с НДС)": item.price, "Кол-во": 0,
+                                                   "Сумма, руб (с НДС)": 0.0}
+                discounted_price_bracket = round(item.price * (1 - bracket_discount / 100), 2)
+                qty_total = item.qty * qty_radiator
+                brackets_temp[item.article]["Кол-во"] += int(qty_total)
+                brackets_temp[item.article]["Сумма, руб (с НДС)"] += round(discounted_price_bracket * qty_total, 2)
+
+    radiator_data.sort(key=lambda x: x.pop("key"))
+    bracket_data = [{
+        "Артикул": str(b["Артикул"]), "Наименование": str(b["Наименование"]), "Мощность, Вт": 0.0,
+        "Цена, руб (с НДС)": float(b["Цена, руб (с НДС)"]), "Скидка, %": bracket_discount,
+        "Цена со скидкой, руб (с НДС)": round(float(b["Цена, руб (с НДС)"]) * (1 - bracket_discount / 100), 2),
+        "Кол-во": int(b["Кол-во"]), "Сумма, руб (с НДС)": float(b["Сумма, руб (с НДС)"]),
+    } for b in brackets_temp.values()]
+    combined = radiator_data + bracket_data
+    for i, row in enumerate(combined, 1):
+        row["№"] = i
+    return pd.DataFrame(combined, columns=engine.SPEC_COLUMNS)
+
+
+def best_time(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="количество повторов (берется лучшее время)")
+    args = parser.parse_args()
+
+    engine_module = load_engine_module()
+    catalog = synthetic_catalog(engine_module)
+    engine = make_engine(engine_module, catalog)
+    keys = [(name, art) for name in catalog for art in catalog[name].articles]
+    rnd = random.Random(42)
+
+    for size in (10, 500, 5000):
+        values = {key: rnd.choice(["1", "2", "3+1", "10", "0"]) for key in rnd.sample(keys, size)}
+        t_loop, before = best_time(lambda: prepare_spec_loop(engine, values, **OPTIONS), args.repeat)
+        t_batch, after = best_time(lambda: engine.build_spec(values, **OPTIONS), args.repeat)
+
+        assert before.to_csv() == after.to_csv(), "Спецификации различаются"
+        print(f"Позиций {size:5d} (строк {len(after):5d}): цикл {t_loop * 1000:8.2f} мс | "
+              f"пакетно {t_batch * 1000:7.2f} мс | ускорение x{t_loop / t_batch:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Таблица предпросмотра на 10 000 строк: прежний DataFrame (добавление через
+.loc[len(df)], правка через .at, удаление drop + reset_index, итоги полным
+пересчетом) против SpecTable на столбцах-массивах с итогами на разницу.
+
+Запуск:
+    python benchmarks/bench_spec_table.py [--rows 10000] [--operations 200]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _app import load_engine_module
+from bench_preview_edit import delta_totals, full_totals
+from bench_spec_pipeline import OPTIONS, make_engine, synthetic_catalog
+
+
+def large_spec(engine, rows, rnd):
+    """Спецификация на rows строк: строки сформированной спецификации повторяются"""
+    import pandas as pd
+
+    keys = [(name, art) for name in engine.catalog for art in engine.catalog[name].articles]
+    values = {key: rnd.choice(["1", "2", "3+1", "10"]) for key in keys}
+    spec_data = engine.build_spec(values, **OPTIONS)
+    spec_data = pd.concat([spec_data] * (rows // len(spec_data) + 1), ignore_index=True).iloc[:rows].copy()
+    spec_data["№"] = range(1, len(spec_data) + 1)
+    return spec_data
+
+
+def per_operation(func, operations):
+    start = time.perf_counter()
+    for operation in operations:
+        func(*operation)
+    return (time.perf_counter() - start) / len(operations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000, help="количество строк спецификации")
+    parser.add_argument("--operations", type=int, default=200, help="количество операций каждого вида")
+    args = parser.parse_args()
+
+    engine_module = load_engine_module()
+    engine = make_engine(engine_module, synthetic_catalog(engine_module))
+    rnd = random.Random(42)
+    spec_data = large_spec(engine, args.rows, rnd)
+    table = engine_module.SpecTable.from_frame(engine, spec_data)
+    article, name, price = spec_data.iloc[-1][["Артикул", "Наименование", "Цена, руб (с НДС)"]]
+    discount = OPTIONS["bracket_discount"]
+    discounted_price = price * (1 - discount / 100)
+
+    # Добавление строк
+    appends = [(rnd.randint(1, 9),) for _ in range(args.operations)]
+
+    def frame_append(qty):
+        spec_data.loc[len(spec_data)] = {
+            "№": len(spec_data) + 1, "Артикул": article, "Наименование": name, "Мощность, Вт": 0.0,
+            "Цена, руб (с НДС)": price, "Скидка, %": discount, "Цена со скидкой, руб (с НДС)": discounted_price,
+            "Кол-во": qty, "Сумма, руб (с НДС)": round(discounted_price * qty, 2),
+        }
+
+    def table_append(qty):
+        table.append(article, name, 0.0, price, discount, discounted_price, qty, round(discounted_price * qty, 2))
+
+    t_frame_append = per_operation(frame_append, appends)
+    t_table_append = per_operation(table_append, appends)
+
+    # Правка количества в строке, выбранной по номеру
+    edits = [(rnd.randrange(len(spec_data)), rnd.randint(0, 20)) for _ in range(args.operations)]
+
+    def frame_edit(index, qty):
+        spec_data.at[index, "Кол-во"] = qty
+        spec_data.at[index, "Сумма, руб (с НДС)"] = float(spec_data.at[index, "Цена со скидкой, руб (с НДС)"]) * qty
+
+    def table_edit(index, qty):
+        table.set_qty(table.row_id(index), qty)
+
+    t_frame_edit = per_operation(frame_edit, edits)
+    t_table_edit = per_operation(table_edit, edits)
+
+    # Итоги после правки
+    repeats = [()] * max(1, args.operations // 10)
+    t_frame_totals = per_operation(lambda: full_totals(engine_module, engine, spec_data), repeats)
+    t_table_totals = per_operation(lambda: delta_totals(table), repeats)
+    expected = full_totals(engine_module, engine, spec_data)
+    assert expected == delta_totals(table), f"Итоги различаются: {expected} != {delta_totals(table)}"
+
+    # Удаление строк
+    deletes = [(rnd.randrange(len(spec_data) - args.operations),) for _ in range(args.operations)]
+
+    def frame_delete(index):
+        spec_data.drop(index, inplace=True)
+        spec_data.reset_index(drop=True, inplace=True)
+        spec_data["№"] = range(1, len(spec_data) + 1)
+
+    def table_delete(index):
+        table.remove(table.row_id(index))
+
+    t_frame_delete = per_operation(frame_delete, deletes)
+    t_table_delete = per_operation(table_delete, deletes)
+
+    start = time.perf_counter()
+    frame = table.to_frame()
+    t_export = time.perf_counter() - start
+    assert frame.to_csv() == spec_data.to_csv(), "Таблица отличается от DataFrame"
+
+    print(f"Строк: {len(table)}, операций каждого вида: {args.operations}")
+    for label, t_frame, t_table in (("Добавление строки", t_frame_append, t_table_append),
+                                    ("Правка количества", t_frame_edit, t_table_edit),
+                                    ("Итоги после правки", t_frame_totals, t_table_totals),
+                                    ("Удаление строки", t_frame_delete, t_table_delete)):
+        print(f"{label:20}: DataFrame {t_frame * 1e6:9.1f} мкс | SpecTable {t_table * 1e6:7.1f} мкс | "
+              f"ускорение x{t_frame / t_table:.0f}")
+    print(f"DataFrame для выгрузки (to_frame): {t_export * 1000:.1f} мс")
+
+
+if __name__ == "__main__":
+    main()
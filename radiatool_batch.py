@@ -0,0 +1,178 @@
+"""
+Пакетный расчет спецификаций заказчиков без графического интерфейса.
+
+Каждый входной файл (.xlsx, .xls, .csv) обрабатывается как в программе: загрузка
+спецификации (артикулы Meteor или подбор аналогов по наименованиям), формирование
+спецификации и сохранение книги "Расчёт стоимости" (с листом "Таблица соответствия",
+если выполнялся подбор аналогов). Файлы обрабатываются параллельно в пуле процессов,
+каталог загружается один раз в каждом процессе. В папку результатов также
+записывается сводка "Сводка.csv" со временем обработки и несопоставленными строками.
+
+Запуск:
+    python radiatool_batch.py "Заявки/*.xlsx" Заявки/срочно --radiator-discount 12 \\
+        --bracket-discount 5 --mount wall --out Результаты [--jobs 4]
+"""
+import argparse
+import csv
+import glob
+import os
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from radiatool_engine import (
+    MOUNT_MODES, CatalogCache, ForeignNameParser, RadiatorEngine, SpecOptions, default_catalog_path,
+    load_settings,
+)
+
+SPEC_EXTENSIONS = (".xlsx", ".xls", ".csv")
+
+REPORT_NAME = "Сводка.csv"
+
+# Результат обработки одного файла: статус "ok", "empty" (нет позиций) или "error",
+# количество позиций и сумма спецификации, время обработки (с) и несопоставленные строки
+BatchResult = namedtuple("BatchResult", [
+    "source", "output", "status", "positions", "total", "seconds", "unmatched", "error",
+])
+
+# Расчетное ядро процесса пула (загружается в init_worker)
+_engine = None
+
+
+def collect_inputs(patterns):
+    """Раскрывает папки и шаблоны в отсортированный список файлов спецификаций без повторов"""
+    files = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = [os.path.join(pattern, name) for name in os.listdir(pattern)]
+        else:
+            matches = glob.glob(pattern)
+        for path in sorted(matches):
+            name = os.path.basename(path)
+            # Временные файлы Excel ("~$Заявка.xlsx") пропускаем
+            if name.lower().endswith(SPEC_EXTENSIONS) and not name.startswith("~$") and os.path.isfile(path):
+                files.append(os.path.abspath(path))
+    return list(dict.fromkeys(files))
+
+
+def output_paths(files, out_dir):
+    """Имя книги "<файл> - Расчёт стоимости.xlsx" для каждого входа; повторы нумеруются"""
+    used = set()
+    paths = []
+    for file_path in files:
+        base_name = f"{os.path.splitext(os.path.basename(file_path))[0]} - Расчёт стоимости"
+        name = base_name
+        counter = 1
+        while name.lower() in used:
+            name = f"{base_name}_{counter}"
+            counter += 1
+        used.add(name.lower())
+        paths.append(os.path.join(out_dir, f"{name}.xlsx"))
+    return paths
+
+
+def init_worker(catalog_path, reader):
+    """Загружает каталог один раз на процесс пула (из кэша, если он актуален)"""
+    global _engine
+    _engine = RadiatorEngine.from_file(catalog_path, reader=reader, cache=CatalogCache())
+    _engine.name_parser = ForeignNameParser.from_settings()
+    # Импортируем заранее, чтобы время первого файла не включало загрузку библиотек
+    import pandas  # noqa: F401
+    import openpyxl  # noqa: F401
+
+
+def convert_file(file_path, output_path, options, spec_format="auto"):
+    """Загружает спецификацию заказчика, рассчитывает и сохраняет ее. Возвращает BatchResult"""
+    start = time.perf_counter()
+    try:
+        imported = _engine.import_spec(file_path, spec_format)
+        spec_data = _engine.build_spec(imported.quantities, *options)
+        if spec_data is None or spec_data.empty:
+            return BatchResult(file_path, "", "empty", 0, 0.0,
+                               time.perf_counter() - start, imported.unmatched, "")
+        _engine.save_excel(spec_data, output_path, imported.correspondence)
+        totals = _engine.spec_totals(spec_data)
+        return BatchResult(file_path, output_path, "ok", len(imported.quantities), totals.total,
+                           time.perf_counter() - start, imported.unmatched, "")
+    except Exception as e:
+        return BatchResult(file_path, "", "error", 0, 0.0, time.perf_counter() - start, [], str(e))
+
+
+def write_report(results, path):
+    """Сохраняет сводку по файлам в CSV (разделитель ";", как при выгрузке из программы)"""
+    with open(path, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.writer(f, delimiter=";")
+        writer.writerow(["Файл", "Результат", "Статус", "Позиций", "Сумма, руб (с НДС)",
+                         "Время, с", "Не сопоставлено", "Несопоставленные строки", "Ошибка"])
+        for result in results:
+            writer.writerow([
+                os.path.basename(result.source), os.path.basename(result.output), result.status,
+                result.positions, f"{result.total:.2f}", f"{result.seconds:.3f}",
+                len(result.unmatched), "; ".join(result.unmatched), result.error,
+            ])
+
+
+def run_batch(files, out_dir, options, catalog_path, reader="pandas", jobs=None, spec_format="auto"):
+    """Обрабатывает файлы в пуле процессов. Возвращает список BatchResult в порядке files"""
+    os.makedirs(out_dir, exist_ok=True)
+    # Заполняем кэш каталога заранее, чтобы процессы пула не разбирали Excel одновременно
+    cache = CatalogCache()
+    if cache.load(catalog_path) is None:
+        RadiatorEngine.from_file(catalog_path, reader=reader, cache=cache)
+
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(files)))
+    with ProcessPoolExecutor(max_workers=jobs, initializer=init_worker,
+                             initargs=(catalog_path, reader)) as pool:
+        futures = [pool.submit(convert_file, file_path, output_path, options, spec_format)
+                   for file_path, output_path in zip(files, output_paths(files, out_dir))]
+        return [future.result() for future in futures]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("inputs", nargs="+", help="файлы, папки или шаблоны (*.xlsx, *.xls, *.csv)")
+    parser.add_argument("--radiator-discount", type=float, default=0.0, help="скидка на радиаторы, %%")
+    parser.add_argument("--bracket-discount", type=float, default=0.0, help="скидка на кронштейны, %%")
+    parser.add_argument("--mount", choices=list(MOUNT_MODES), default="wall",
+                        help="кронштейны: wall - настенные, floor - напольные, none - без кронштейнов")
+    parser.add_argument("--format", dest="spec_format", choices=["auto", "articles", "foreign"], default="auto",
+                        help="содержимое файлов: артикулы Meteor, наименования других производителей "
+                             "или auto (аналоги подбираются, если артикулы не найдены)")
+    parser.add_argument("--out", default="Расчеты", help="папка для результатов и сводки")
+    parser.add_argument("--jobs", type=int, default=None, help="количество процессов (по умолчанию - число ядер)")
+    parser.add_argument("--catalog", default=None, help="файл каталога (по умолчанию - из настроек)")
+    args = parser.parse_args(argv)
+
+    files = collect_inputs(args.inputs)
+    if not files:
+        print("Не найдено файлов спецификаций")
+        return 1
+
+    options = SpecOptions(args.radiator_discount, args.bracket_discount, MOUNT_MODES[args.mount])
+    catalog_path = args.catalog or default_catalog_path()
+    start = time.perf_counter()
+    results = run_batch(files, args.out, options, catalog_path, load_settings()["catalog_reader"],
+                        args.jobs, args.spec_format)
+    elapsed = time.perf_counter() - start
+
+    report_path = os.path.join(args.out, REPORT_NAME)
+    write_report(results, report_path)
+
+    for result in results:
+        line = f"{result.seconds:7.2f} с  {result.status:5}  {os.path.basename(result.source)}"
+        if result.status == "ok":
+            line += f": позиций {result.positions}, сумма {result.total:.2f} руб."
+        if result.unmatched:
+            line += f", не сопоставлено {len(result.unmatched)}"
+        if result.error:
+            line += f": {result.error}"
+        print(line)
+    failed = sum(result.status == "error" for result in results)
+    print(f"Обработано файлов: {len(results)} за {elapsed:.2f} с, с ошибками: {failed}")
+    print(f"Сводка: {report_path}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,2616 @@
+"""
+Расчетное ядро RadiaTool без графического интерфейса: каталог радиаторов и его кэш,
+настройки, подбор кронштейнов, разбор количеств, формирование спецификации, итоги
+и выгрузка в Excel. Модуль не импортирует tkinter; pandas, numpy и openpyxl
+загружаются при первом использовании.
+"""
+import os
+import sys
+import tempfile
+import platform
+import re
+import hashlib
+import json
+import pickle
+import threading
+from collections import namedtuple
+from collections.abc import Mapping, MutableMapping
+from functools import lru_cache
+from operator import itemgetter
+
+# Версия программы (используется в заголовке окна и для инвалидации кэша)
+APP_VERSION = "1.9"
+
+
+class CatalogCache:
+    """
+    Бинарный кэш нормализованного каталога (листы радиаторов + кронштейны).
+    Ключ кэша - размер, время изменения и SHA-256 файла "Матрица.xlsx",
+    а также версия программы и формата кэша.
+    """
+    FORMAT_VERSION = 3
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir or self.default_dir()
+
+    @staticmethod
+    def default_dir():
+        """Возвращает папку для кэша в профиле пользователя"""
+        if platform.system() == "Windows":
+            base = os.environ.get("LOCALAPPDATA") or os.environ.get("APPDATA") or os.path.expanduser("~")
+            return os.path.join(base, "RadiaTool")
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+        return os.path.join(base, "radiatool")
+
+    def cache_path(self, source_path):
+        """Путь к файлу кэша для конкретного файла каталога"""
+        source_id = hashlib.sha1(os.path.abspath(source_path).encode("utf-8")).hexdigest()[:12]
+        return os.path.join(self.cache_dir, f"catalog_{source_id}.cache")
+
+    def make_key(self, source_path):
+        """Формирует ключ кэша по содержимому и атрибутам файла каталога"""
+        stat = os.stat(source_path)
+        digest = hashlib.sha256()
+        with open(source_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return {
+            "format": self.FORMAT_VERSION,
+            "app_version": APP_VERSION,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": digest.hexdigest(),
+        }
+
+    def load(self, source_path):
+        """
+        Загружает каталог из кэша.
+        Возвращает None, если кэша нет, он устарел или поврежден.
+        """
+        path = self.cache_path(source_path)
+        if not os.path.exists(path):
+            return None
+        try:
+            key = self.make_key(source_path)
+            with open(path, "rb") as f:
+                # Сначала читаем только заголовок, чтобы не распаковывать устаревшие данные
+                header = pickle.load(f)
+                if header != key:
+                    return None
+                return pickle.load(f)
+        except Exception as e:
+            print(f"Кэш каталога поврежден, будет выполнена полная загрузка: {e}")
+            self.invalidate(source_path)
+            return None
+
+    def save(self, source_path, payload):
+        """Сохраняет каталог в кэш (атомарно, через временный файл)"""
+        path = self.cache_path(source_path)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            key = self.make_key(source_path)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    pickle.dump(key, f, protocol=pickle.HIGHEST_PROTOCOL)
+                    pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, path)
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+        except Exception as e:
+            print(f"Не удалось сохранить кэш каталога: {e}")
+
+    def invalidate(self, source_path):
+        """Удаляет файл кэша"""
+        try:
+            os.remove(self.cache_path(source_path))
+        except OSError:
+            pass
+
+
+DEFAULT_SETTINGS = {
+    # Способ чтения "Матрица.xlsx": "pandas" (pd.read_excel) или "openpyxl" (потоковое чтение)
+    "catalog_reader": "pandas",
+    # Внешний файл каталога; пустая строка - "Матрица.xlsx" рядом с программой
+    "catalog_path": "",
+    # Период проверки файла каталога на изменения, мс (0 - не следить)
+    "catalog_watch_interval_ms": 2000,
+    # Отрисовка матрицы: "widgets" (Entry на каждую ячейку) или "canvas" (один Canvas для больших каталогов)
+    "matrix_renderer": "widgets",
+    # Задержка перед показом подсказки при наведении, мс
+    "tooltip_delay_ms": 300,
+    # Дополнительные шаблоны наименований других производителей для подбора аналогов:
+    # {"Бренд": "регулярное выражение с группами type, height, length и необязательной vk"}
+    "foreign_name_patterns": {},
+}
+
+
+def load_settings():
+    """
+    Загружает настройки программы из settings.json в папке данных пользователя.
+    Отдельные параметры можно переопределить переменными окружения RADIATOOL_<ПАРАМЕТР>.
+    """
+    settings = dict(DEFAULT_SETTINGS)
+    settings_path = os.path.join(CatalogCache.default_dir(), "settings.json")
+    try:
+        if os.path.exists(settings_path):
+            with open(settings_path, "r", encoding="utf-8") as f:
+                settings.update(json.load(f))
+    except Exception as e:
+        print(f"Не удалось прочитать настройки {settings_path}: {e}")
+
+    for key in DEFAULT_SETTINGS:
+        env_value = os.environ.get(f"RADIATOOL_{key.upper()}")
+        if env_value:
+            settings[key] = env_value
+    return settings
+
+
+def default_catalog_path(settings=None):
+    """Каталог из настроек или "Матрица.xlsx" рядом с программой (и в сборке PyInstaller)"""
+    settings = settings if settings is not None else load_settings()
+    base_path = getattr(sys, "_MEIPASS", os.path.dirname(os.path.abspath(__file__)))
+    return settings.get("catalog_path") or os.path.join(base_path, "Матрица.xlsx")
+
+
+class PandasCatalogReader:
+    """Чтение листов каталога через pd.read_excel"""
+
+    def __init__(self, file_path):
+        import pandas as pd
+        self._book = pd.ExcelFile(file_path, engine='openpyxl')
+        self.sheet_names = list(self._book.sheet_names)
+
+    def read_columns(self, sheet_name):
+        """Возвращает словарь {заголовок столбца: список значений}"""
+        data = self._book.parse(sheet_name)
+        return {str(column): data[column].tolist() for column in data.columns}
+
+    def close(self):
+        self._book.close()
+
+
+class StreamingCatalogReader:
+    """
+    Потоковое чтение листов каталога через openpyxl в режиме read_only.
+    Лист читается построчно в столбцы из обычных списков Python, без pandas.
+    """
+
+    def __init__(self, file_path):
+        from openpyxl import load_workbook
+        self._book = load_workbook(file_path, read_only=True, data_only=True)
+        self.sheet_names = list(self._book.sheetnames)
+
+    def read_columns(self, sheet_name):
+        """Возвращает словарь {заголовок столбца: список значений}"""
+        rows = self._book[sheet_name].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return {}
+
+        # Пустые заголовки нумеруем так же, как pandas
+        names = [str(name) if name is not None else f"Unnamed: {i}" for i, name in enumerate(header)]
+        columns = [[] for _ in names]
+        width = len(names)
+
+        for row in rows:
+            if row is None or all(value is None for value in row):
+                continue  # Пустые строки pandas тоже пропускает
+            for i in range(width):
+                value = row[i] if i < len(row) else None
+                # Целые числа, сохраненные как float, pandas читает как int
+                if isinstance(value, float) and value.is_integer():
+                    value = int(value)
+                columns[i].append(value)
+
+        return dict(zip(names, columns))
+
+    def close(self):
+        self._book.close()
+
+
+CATALOG_READERS = {
+    "pandas": PandasCatalogReader,
+    "openpyxl": StreamingCatalogReader,
+}
+
+
+def parse_radiator_size(name):
+    """
+    Извлекает высоту и длину из наименования вида "... 10/300/400 ra".
+    Возвращает (высота, длина) или None, если формат не распознан.
+    """
+    try:
+        parts = str(name).split('/')
+        height = int(parts[-2].replace('мм', '').strip())
+        length = int(parts[-1].replace('мм', '').strip().split()[0])
+        return height, length
+    except (ValueError, IndexError):
+        return None
+
+
+def _is_missing(value):
+    """Пустая ячейка: None или NaN"""
+    return value is None or (isinstance(value, float) and value != value)
+
+
+def _to_float_array(values, fill=float("nan")):
+    """Преобразует значения столбца в массив float, нечисловые значения заменяются на fill"""
+    import numpy as np
+    result = np.empty(len(values), dtype=np.float64)
+    for i, value in enumerate(values):
+        try:
+            result[i] = fill if _is_missing(value) else float(value)
+        except (TypeError, ValueError):
+            result[i] = fill
+    return result
+
+
+def round_money(values):
+    """
+    Поэлементно округляет массив до 2 знаков с тем же результатом, что и round(x, 2).
+    Значения вблизи половины копейки, где умножение на 100 может внести погрешность,
+    округляются встроенной round, которая работает с точным десятичным значением.
+    """
+    import numpy as np
+    values = np.asarray(values, dtype=np.float64)
+    scaled = values * 100
+    result = np.rint(scaled) / 100
+    distance = np.abs(scaled - np.floor(scaled) - 0.5)
+    ambiguous = (distance <= 1e-7 + np.abs(scaled) * 1e-13) | (np.abs(values) >= 1e12)
+    for i in np.flatnonzero(ambiguous):
+        result[i] = round(float(values[i]), 2)
+    return result
+
+
+class ProductTable:
+    """
+    Компактное хранение одного листа радиаторов: строки в списках,
+    числовые характеристики в массивах NumPy. Строка адресуется целым индексом.
+    """
+    NUMERIC_COLUMNS = {
+        "Цена, руб": "price",
+        "Мощность, Вт": "power",
+        "Вес, кг": "weight",
+        "Объем, м3": "volume",
+    }
+
+    def __init__(self, sheet_name, columns):
+        import numpy as np
+
+        self.sheet = sheet_name
+        self.columns = list(columns.keys())
+        size = len(next(iter(columns.values()), []))
+
+        self.articles = [str(a).strip() for a in columns.get("Артикул", [None] * size)]
+        self.names = ["" if _is_missing(n) else str(n) for n in columns.get("Наименование", [None] * size)]
+        self.price = _to_float_array(columns.get("Цена, руб", [None] * size))
+        self.power = _to_float_array(columns.get("Мощность, Вт", [None] * size))
+        self.weight = _to_float_array(columns.get("Вес, кг", [None] * size), fill=0.0)
+        self.volume = _to_float_array(columns.get("Объем, м3", [None] * size), fill=0.0)
+
+        # Высота и длина разбираются из наименования один раз (0 - размер не распознан)
+        self.height = np.zeros(size, dtype=np.int32)
+        self.length = np.zeros(size, dtype=np.int32)
+        for row, name in enumerate(self.names):
+            parsed = parse_radiator_size(name) if name else None
+            if parsed:
+                self.height[row], self.length[row] = parsed
+
+        # Тексты подсказок ячеек матрицы: строятся при первом наведении и запоминаются
+        # (заранее для всех строк они заняли бы больше памяти, чем сами данные листа)
+        self._tooltips = {}
+
+        # Прочие столбцы листа (например, "Кол-во") нужны только для выгрузки в DataFrame
+        known = {"Артикул", "Наименование", *self.NUMERIC_COLUMNS}
+        self.extra = {name: values for name, values in columns.items() if name not in known}
+
+    def __len__(self):
+        return len(self.articles)
+
+    def tooltip(self, row):
+        """Текст подсказки для строки row (из памяти или построенный при первом обращении)"""
+        text = self._tooltips.get(row)
+        if text is None:
+            text = self._tooltips[row] = self.format_tooltip(row)
+        return text
+
+    def format_tooltip(self, row):
+        power = float(self.power[row])
+        power_text = f"Мощность: {power} Вт" if power else "Мощность: не указана"
+        return (f"Артикул: {self.articles[row]}\n"
+                f"{power_text}\n"
+                f"Вес: {float(self.weight[row])} кг\n"
+                f"Объем: {float(self.volume[row])} м³")
+
+    def product(self, row):
+        return Product(self, row)
+
+    def column(self, column):
+        """Значения столбца листа в исходном порядке строк"""
+        if column == "Артикул":
+            return self.articles
+        if column == "Наименование":
+            return self.names
+        if column in self.NUMERIC_COLUMNS:
+            return getattr(self, self.NUMERIC_COLUMNS[column])
+        return self.extra[column]
+
+    def to_columns(self):
+        """Столбцы листа в виде обычных списков (для кэша на диске)"""
+        columns = {}
+        for column in self.columns:
+            values = self.column(column)
+            columns[column] = values.tolist() if hasattr(values, "tolist") else list(values)
+        return columns
+
+    def to_frame(self):
+        """Материализует лист в DataFrame (только для выгрузки и сравнения)"""
+        import pandas as pd
+        return pd.DataFrame({column: self.column(column) for column in self.columns})
+
+    def signature(self, row):
+        """Данные строки для сравнения каталогов (NaN заменяется на None)"""
+        values = (self.price[row], self.power[row], self.weight[row], self.volume[row])
+        return (self.articles[row], self.names[row]) + tuple(None if v != v else float(v) for v in values)
+
+    def nbytes(self):
+        """Примерный объем памяти, занимаемый листом, в байтах"""
+        arrays = (self.price, self.power, self.weight, self.volume, self.height, self.length)
+        strings = sum(sys.getsizeof(s) for s in self.articles) + sum(sys.getsizeof(s) for s in self.names)
+        lists = sys.getsizeof(self.articles) + sys.getsizeof(self.names)
+        return sum(a.nbytes for a in arrays) + strings + lists
+
+
+class Product:
+    """Легковесное представление строки ProductTable"""
+    __slots__ = ("table", "row")
+
+    def __init__(self, table, row):
+        self.table = table
+        self.row = row
+
+    @property
+    def sheet(self):
+        return self.table.sheet
+
+    @property
+    def article(self):
+        return self.table.articles[self.row]
+
+    @property
+    def name(self):
+        return self.table.names[self.row]
+
+    @property
+    def price(self):
+        return float(self.table.price[self.row])
+
+    @property
+    def power(self):
+        return float(self.table.power[self.row])
+
+    @property
+    def weight(self):
+        return float(self.table.weight[self.row])
+
+    @property
+    def volume(self):
+        return float(self.table.volume[self.row])
+
+    @property
+    def tooltip(self):
+        return self.table.tooltip(self.row)
+
+    @property
+    def height(self):
+        return int(self.table.height[self.row]) or None
+
+    @property
+    def length(self):
+        return int(self.table.length[self.row]) or None
+
+    def __eq__(self, other):
+        return isinstance(other, Product) and self.table is other.table and self.row == other.row
+
+    def __hash__(self):
+        return hash((id(self.table), self.row))
+
+    def __repr__(self):
+        return f"Product({self.sheet!r}, {self.article!r}, {self.name!r})"
+
+
+# Кронштейн из листа "Кронштейны"
+BracketRecord = namedtuple("BracketRecord", ["article", "name", "price", "mount"])
+
+# Строка таблицы подбора кронштейнов: кронштейн article в количестве qty на один радиатор
+# для типа монтажа mount, типов радиаторов types и диапазонов высоты и длины (границы включительно,
+# None - без ограничения). Порядок строк задает порядок кронштейнов в спецификации.
+BracketRule = namedtuple("BracketRule", [
+    "mount", "types", "height_min", "height_max", "length_min", "length_max", "article", "qty"
+])
+
+WALL_BRACKETS = "Настенные кронштейны"
+FLOOR_BRACKETS = "Напольные кронштейны"
+NO_BRACKETS = "Без кронштейнов"
+
+# Краткие обозначения типа монтажа для командной строки и HTTP-сервера
+MOUNT_MODES = {"wall": WALL_BRACKETS, "floor": FLOOR_BRACKETS, "none": NO_BRACKETS}
+
+DEFAULT_BRACKET_RULES = [
+    # Настенные: однорядные радиаторы
+    BracketRule(WALL_BRACKETS, ("10", "11"), None, None, None, None, "К9.2L", 2),
+    BracketRule(WALL_BRACKETS, ("10", "11"), None, None, None, None, "К9.2R", 2),
+    BracketRule(WALL_BRACKETS, ("10", "11"), None, None, 1700, 2000, "К9.3-40", 1),
+    # Настенные: многорядные радиаторы
+    BracketRule(WALL_BRACKETS, ("20", "21", "22", "30", "33"), 300, 300, 400, 1600, "К15.4300", 2),
+    BracketRule(WALL_BRACKETS, ("20", "21", "22", "30", "33"), 300, 300, 1700, 2000, "К15.4300", 3),
+    BracketRule(WALL_BRACKETS, ("20", "21", "22", "30", "33"), 400, 400, 400, 1600, "К15.4400", 2),
+    BracketRule(WALL_BRACKETS, ("20", "21", "22", "30", "33"), 400, 400, 1700, 2000, "К15.4400", 3),
+    BracketRule(WALL_BRACKETS, ("20", "21", "22", "30", "33"), 500, 500, 400, 1600, "К15.4500", 2),
+    BracketRule(WALL_BRACKETS, ("20", "21", "22", "30", "33"), 500, 500, 1700, 2000, "К15.4500", 3),
+    BracketRule(WALL_BRACKETS, ("20", "21", "22", "30", "33"), 600, 600, 400, 1600, "К15.4600", 2),
+    BracketRule(WALL_BRACKETS, ("20", "21", "22", "30", "33"), 600, 600, 1700, 2000, "К15.4600", 3),
+    BracketRule(WALL_BRACKETS, ("20", "21", "22", "30", "33"), 900, 900, 400, 1600, "К15.4900", 2),
+    BracketRule(WALL_BRACKETS, ("20", "21", "22", "30", "33"), 900, 900, 1700, 2000, "К15.4900", 3),
+    # Напольные: однорядные радиаторы
+    BracketRule(FLOOR_BRACKETS, ("10", "11"), 300, 400, None, None, "КНС450", 2),
+    BracketRule(FLOOR_BRACKETS, ("10", "11"), 500, 600, None, None, "КНС470", 2),
+    BracketRule(FLOOR_BRACKETS, ("10", "11"), 900, 900, None, None, "КНС4100", 2),
+    BracketRule(FLOOR_BRACKETS, ("10", "11"), 300, 400, 1700, 2000, "КНС430", 1),
+    BracketRule(FLOOR_BRACKETS, ("10", "11"), 500, 600, 1700, 2000, "КНС430", 1),
+    BracketRule(FLOOR_BRACKETS, ("10", "11"), 900, 900, 1700, 2000, "КНС430", 1),
+    # Напольные: тип 21
+    BracketRule(FLOOR_BRACKETS, ("21",), 300, 400, 400, 1000, "КНС650", 2),
+    BracketRule(FLOOR_BRACKETS, ("21",), 300, 400, 1100, 1600, "КНС650", 3),
+    BracketRule(FLOOR_BRACKETS, ("21",), 300, 400, 1700, 2000, "КНС650", 4),
+    BracketRule(FLOOR_BRACKETS, ("21",), 500, 600, 400, 1000, "КНС670", 2),
+    BracketRule(FLOOR_BRACKETS, ("21",), 500, 600, 1100, 1600, "КНС670", 3),
+    BracketRule(FLOOR_BRACKETS, ("21",), 500, 600, 1700, 2000, "КНС670", 4),
+    BracketRule(FLOOR_BRACKETS, ("21",), 900, 900, 400, 1000, "КНС6100", 2),
+    BracketRule(FLOOR_BRACKETS, ("21",), 900, 900, 1100, 1600, "КНС6100", 3),
+    BracketRule(FLOOR_BRACKETS, ("21",), 900, 900, 1700, 2000, "КНС6100", 4),
+    # Напольные: типы 20, 22, 30, 33
+    BracketRule(FLOOR_BRACKETS, ("20", "22", "30", "33"), 300, 400, 400, 1000, "КНС550", 2),
+    BracketRule(FLOOR_BRACKETS, ("20", "22", "30", "33"), 300, 400, 1100, 1600, "КНС550", 3),
+    BracketRule(FLOOR_BRACKETS, ("20", "22", "30", "33"), 300, 400, 1700, 2000, "КНС550", 4),
+    BracketRule(FLOOR_BRACKETS, ("20", "22", "30", "33"), 500, 600, 400, 1000, "КНС570", 2),
+    BracketRule(FLOOR_BRACKETS, ("20", "22", "30", "33"), 500, 600, 1100, 1600, "КНС570", 3),
+    BracketRule(FLOOR_BRACKETS, ("20", "22", "30", "33"), 500, 600, 1700, 2000, "КНС570", 4),
+    BracketRule(FLOOR_BRACKETS, ("20", "22", "30", "33"), 900, 900, 400, 1000, "КНС5100", 2),
+    BracketRule(FLOOR_BRACKETS, ("20", "22", "30", "33"), 900, 900, 1100, 1600, "КНС5100", 3),
+    BracketRule(FLOOR_BRACKETS, ("20", "22", "30", "33"), 900, 900, 1700, 2000, "КНС5100", 4),
+]
+
+
+class LazyCatalog(Mapping):
+    """
+    Каталог радиаторов с ленивой загрузкой листов "Матрица.xlsx".
+    Ведет себя как словарь {имя листа: ProductTable}: лист разбирается при первом
+    обращении, остальные листы догружаются в фоновом потоке.
+    """
+    BRACKETS_SHEET = "Кронштейны"
+    RULES_SHEET = "Правила кронштейнов"
+    SERVICE_SHEETS = (BRACKETS_SHEET, RULES_SHEET)
+
+    def __init__(self, file_path=None, sheets=None, brackets=None, bracket_rules=None, reader="pandas"):
+        self.file_path = file_path
+        self._lock = threading.RLock()
+        self._loaded = threading.Event()
+        self._thread = None
+        self._errors = {}
+
+        # Индексы товаров хранят номера строк: (лист, высота, длина) -> строка, (лист, артикул) -> строка
+        self._size_index = {}
+        self._key_index = {}
+        # Глобальный индекс артикул -> (лист, строка) строится после загрузки всех листов
+        self._article_index = None
+
+        if sheets is not None:
+            # Каталог уже загружен (например, из кэша): листы заданы столбцами, кронштейны кортежами
+            self._reader = None
+            self._names = list(sheets.keys())
+            self._sheets = {name: ProductTable(name, columns) for name, columns in sheets.items()}
+            self._brackets = {bracket[0]: BracketRecord(*bracket) for bracket in (brackets or [])}
+            self._bracket_rules = [BracketRule(*rule) for rule in bracket_rules] if bracket_rules else None
+            self._rules_loaded = True
+            for table in self._sheets.values():
+                self._index_sheet(table)
+            self._build_article_index()
+            self._loaded.set()
+            return
+
+        reader_class = CATALOG_READERS.get(reader)
+        if reader_class is None:
+            raise ValueError(f"Неизвестный способ чтения каталога: {reader}")
+        self._reader = reader_class(file_path)
+        self._names = [name for name in self._reader.sheet_names if name not in self.SERVICE_SHEETS]
+        self._has_brackets = self.BRACKETS_SHEET in self._reader.sheet_names
+        self._has_rules = self.RULES_SHEET in self._reader.sheet_names
+        self._sheets = {}
+        self._brackets = None
+        self._bracket_rules = None
+        self._rules_loaded = False
+
+    @staticmethod
+    def parse_brackets(columns):
+        """Преобразует столбцы листа кронштейнов в словарь артикул -> BracketRecord"""
+        brackets = {}
+        size = len(columns.get("Артикул", []))
+        names = columns.get("Наименование", [""] * size)
+        prices = _to_float_array(columns.get("Цена, руб", [None] * size))
+        mounts = columns.get("Тип монтажа", [""] * size)
+        for art, name, price, mount in zip(columns.get("Артикул", []), names, prices, mounts):
+            art = str(art).strip()
+            brackets.setdefault(art, BracketRecord(art, "" if _is_missing(name) else str(name),
+                                                   float(price), "" if _is_missing(mount) else str(mount)))
+        return brackets
+
+    @staticmethod
+    def parse_bracket_rules(columns):
+        """
+        Преобразует столбцы листа "Правила кронштейнов" в список BracketRule.
+        Столбцы: Тип монтажа, Типы радиаторов ("20, 22"), Высота от, Высота до,
+        Длина от, Длина до, Артикул, Кол-во на радиатор. Пустая граница - без ограничения.
+        """
+        def bound(value):
+            return None if _is_missing(value) or value == "" else int(value)
+
+        rules = []
+        size = len(columns.get("Артикул", []))
+        empty = [None] * size
+        for mount, types, h_min, h_max, l_min, l_max, art, qty in zip(
+                columns.get("Тип монтажа", empty), columns.get("Типы радиаторов", empty),
+                columns.get("Высота от", empty), columns.get("Высота до", empty),
+                columns.get("Длина от", empty), columns.get("Длина до", empty),
+                columns.get("Артикул", empty), columns.get("Кол-во на радиатор", empty)):
+            if _is_missing(art) or _is_missing(mount):
+                continue
+            types = tuple(t for t in re.split(r"[,;\s]+", str(types).strip()) if t)
+            rules.append(BracketRule(str(mount).strip(), types, bound(h_min), bound(h_max),
+                                     bound(l_min), bound(l_max), str(art).strip(), int(qty)))
+        return rules
+
+    def __getitem__(self, sheet_name):
+        if sheet_name not in self._names:
+            raise KeyError(sheet_name)
+        sheet = self._sheets.get(sheet_name)
+        if sheet is None:
+            sheet = self._load_sheet(sheet_name)
+        return sheet
+
+    def __iter__(self):
+        return iter(self._names)
+
+    def __len__(self):
+        return len(self._names)
+
+    def __contains__(self, sheet_name):
+        # Проверка наличия листа не должна запускать его разбор
+        return sheet_name in self._names
+
+    @property
+    def is_loaded(self):
+        return self._loaded.is_set()
+
+    def _load_sheet(self, sheet_name):
+        with self._lock:
+            if sheet_name in self._sheets:
+                return self._sheets[sheet_name]
+            if sheet_name in self._errors:
+                raise self._errors[sheet_name]
+            try:
+                table = ProductTable(sheet_name, self._reader.read_columns(sheet_name))
+            except Exception as e:
+                self._errors[sheet_name] = e
+                raise
+            self._index_sheet(table)
+            self._sheets[sheet_name] = table
+            return table
+
+    def _index_sheet(self, table):
+        """Заполняет индексы листа по уже разобранным размерам"""
+        sheet_name = table.sheet
+        for row, (art, height, length) in enumerate(zip(table.articles, table.height.tolist(), table.length.tolist())):
+            # Как и при поиске по DataFrame, берется первая подходящая строка листа
+            self._key_index.setdefault((sheet_name, art), row)
+            if height and length:
+                self._size_index.setdefault((sheet_name, height, length), row)
+
+    def _build_article_index(self):
+        """
+        Строит индекс артикул -> (лист, строка) по всем листам.
+        Листы обходятся в порядке книги, при повторах побеждает первый лист.
+        """
+        article_index = {}
+        for sheet_name in self._names:
+            for row, art in enumerate(self._sheets[sheet_name].articles):
+                article_index.setdefault(art, (sheet_name, row))
+        self._article_index = article_index
+
+    def find_article(self, art):
+        """
+        Ищет радиатор по артикулу во всех листах каталога.
+        Возвращает Product (с именем листа в поле sheet) или None.
+        """
+        if self._article_index is None:
+            self.load_all()
+        found = self._article_index.get(art)
+        if found is None:
+            return None
+        sheet_name, row = found
+        return Product(self._sheets[sheet_name], row)
+
+    def product_by_size(self, sheet_name, height, length):
+        """Возвращает радиатор листа с заданными высотой и длиной (или None)"""
+        table = self._sheets.get(sheet_name)
+        if table is None:
+            if sheet_name not in self._names:
+                return None
+            table = self._load_sheet(sheet_name)
+        row = self._size_index.get((sheet_name, height, length))
+        return None if row is None else Product(table, row)
+
+    def product_by_key(self, sheet_name, art):
+        """Возвращает радиатор по листу и артикулу (или None)"""
+        found = self.locate(sheet_name, art)
+        return None if found is None else Product(*found)
+
+    def locate(self, sheet_name, art):
+        """Возвращает (ProductTable, номер строки) радиатора по листу и артикулу (или None)"""
+        table = self._sheets.get(sheet_name)
+        if table is None:
+            if sheet_name not in self._names:
+                return None
+            table = self._load_sheet(sheet_name)
+        row = self._key_index.get((sheet_name, art))
+        return None if row is None else (table, row)
+
+    def _load_brackets(self):
+        with self._lock:
+            if self._brackets is not None:
+                return
+            if self._has_brackets:
+                self._brackets = self.parse_brackets(self._reader.read_columns(self.BRACKETS_SHEET))
+            else:
+                self._brackets = {}
+
+    def brackets(self):
+        """Список всех кронштейнов в порядке листа"""
+        if self._brackets is None:
+            self._load_brackets()
+        return list(self._brackets.values())
+
+    def bracket(self, art):
+        """Кронштейн по артикулу (или None)"""
+        if self._brackets is None:
+            self._load_brackets()
+        return self._brackets.get(art)
+
+    def bracket_rules(self):
+        """Правила подбора кронштейнов из листа книги или None, если листа нет"""
+        if not self._rules_loaded:
+            with self._lock:
+                if not self._rules_loaded:
+                    if self._has_rules:
+                        self._bracket_rules = self.parse_bracket_rules(self._reader.read_columns(self.RULES_SHEET))
+                    self._rules_loaded = True
+        return self._bracket_rules
+
+    def sizes(self):
+        """Все сочетания (тип радиатора, высота, длина) из загруженных листов"""
+        sizes = set()
+        for sheet_name, table in list(self._sheets.items()):
+            radiator_type = sheet_name.split()[-1]
+            for height, length in zip(table.height.tolist(), table.length.tolist()):
+                if height and length:
+                    sizes.add((radiator_type, height, length))
+        return sizes
+
+    def load_all(self):
+        """Синхронно загружает все листы, которые еще не разобраны"""
+        for sheet_name in self._names:
+            self._load_sheet(sheet_name)
+        self._load_brackets()
+        self.bracket_rules()
+        with self._lock:
+            if self._reader is not None:
+                self._reader.close()
+                self._reader = None
+            if self._article_index is None:
+                self._build_article_index()
+        self._loaded.set()
+
+    def start_warmup(self, on_complete=None):
+        """
+        Запускает фоновую догрузку остальных листов.
+        on_complete(catalog) вызывается из фонового потока после загрузки всех листов.
+        """
+        if self.is_loaded:
+            return
+
+        def worker():
+            try:
+                self.load_all()
+            except Exception as e:
+                print(f"Ошибка фоновой загрузки каталога: {e}")
+                return
+            if on_complete:
+                on_complete(self)
+
+        self._thread = threading.Thread(target=worker, name="catalog-warmup", daemon=True)
+        self._thread.start()
+
+    def wait_loaded(self, timeout=None):
+        """Ожидает окончания фоновой загрузки"""
+        return self._loaded.wait(timeout)
+
+    def snapshot(self):
+        """
+        Возвращает полностью загруженные данные в виде (листы, кронштейны, правила кронштейнов)
+        из простых типов Python, пригодных для pickle независимо от имени модуля.
+        """
+        self.load_all()
+        sheets = {name: self._sheets[name].to_columns() for name in self._names}
+        brackets = [tuple(bracket) for bracket in self._brackets.values()]
+        rules = [tuple(rule) for rule in self._bracket_rules] if self._bracket_rules else None
+        return sheets, brackets, rules
+
+    def nbytes(self):
+        """Примерный объем памяти, занимаемый каталогом, в байтах"""
+        return sum(table.nbytes() for table in self._sheets.values())
+
+
+# Результат сравнения двух версий каталога:
+# changed_cells - ячейки матрицы (лист, высота, длина), в которых изменился товар;
+# changed - радиаторы (лист, артикул), которые появились или у которых изменились данные;
+# vanished - радиаторы (лист, артикул), которых нет в новой версии каталога
+CatalogDiff = namedtuple("CatalogDiff", ["changed_cells", "changed", "vanished"])
+
+
+def diff_catalogs(old, new):
+    """Сравнивает два полностью загруженных каталога"""
+    changed_cells = set()
+    changed = set()
+    vanished = []
+
+    for sheet_name in dict.fromkeys(list(old) + list(new)):
+        old_table = old[sheet_name] if sheet_name in old else None
+        new_table = new[sheet_name] if sheet_name in new else None
+
+        old_rows = {art: row for row, art in reversed(list(enumerate(old_table.articles)))} if old_table else {}
+        new_rows = {art: row for row, art in reversed(list(enumerate(new_table.articles)))} if new_table else {}
+        for art in old_rows:
+            if art not in new_rows:
+                vanished.append((sheet_name, art))
+        for art, row in new_rows.items():
+            if art not in old_rows or old_table.signature(old_rows[art]) != new_table.signature(row):
+                changed.add((sheet_name, art))
+
+        # Ячейка перерисовывается, если в ней сменился товар или его данные
+        sizes = set()
+        for table in (old_table, new_table):
+            if table is not None:
+                sizes.update(zip(table.height.tolist(), table.length.tolist()))
+        for height, length in sizes:
+            if not (height and length):
+                continue
+            old_product = old.product_by_size(sheet_name, height, length) if old_table else None
+            new_product = new.product_by_size(sheet_name, height, length) if new_table else None
+            old_signature = old_product.table.signature(old_product.row) if old_product else None
+            new_signature = new_product.table.signature(new_product.row) if new_product else None
+            if old_signature != new_signature:
+                changed_cells.add((sheet_name, height, length))
+
+    return CatalogDiff(changed_cells, changed, vanished)
+
+
+class CatalogWatcher:
+    """Отслеживает изменения файлов каталога по времени изменения и размеру"""
+
+    def __init__(self, paths):
+        self.paths = list(paths)
+        self._stamps = {path: self._stamp(path) for path in self.paths}
+
+    @staticmethod
+    def _stamp(path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def poll(self):
+        """Возвращает список файлов, изменившихся с прошлой проверки"""
+        changed = []
+        for path in self.paths:
+            stamp = self._stamp(path)
+            # Пропавший файл (например, на время сохранения из Excel) не считается изменением
+            if stamp is not None and stamp != self._stamps.get(path):
+                self._stamps[path] = stamp
+                changed.append(path)
+        return changed
+
+
+# Кронштейн, подобранный для одного радиатора: количество на радиатор и данные из каталога
+# (name и price равны None, если артикула нет на листе "Кронштейны")
+BracketItem = namedtuple("BracketItem", ["article", "qty", "name", "price"])
+
+
+class BracketRules:
+    """
+    Таблица подбора кронштейнов, скомпилированная в словарь
+    (тип радиатора, высота, длина, тип монтажа) -> кортеж BracketItem.
+    Размеры, которых нет в каталоге, вычисляются по правилам при первом обращении.
+    """
+
+    def __init__(self, rules, catalog):
+        self.rules = list(rules)
+        self.mounts = list(dict.fromkeys(rule.mount for rule in self.rules))
+        self._catalog = catalog
+        self._table = {}
+        # Полная таблица на массивах (BracketGrid), строится в compile()
+        self.grid = None
+
+    @classmethod
+    def for_catalog(cls, catalog):
+        """Правила из листа каталога, а при его отсутствии - встроенные по умолчанию"""
+        return cls(catalog.bracket_rules() or DEFAULT_BRACKET_RULES, catalog)
+
+    @staticmethod
+    def _in_range(value, low, high):
+        return (low is None or value >= low) and (high is None or value <= high)
+
+    def match(self, radiator_type, height, length, mount):
+        """Применяет правила таблицы по порядку, возвращает кортеж BracketItem"""
+        items = []
+        for rule in self.rules:
+            if (rule.mount == mount and radiator_type in rule.types
+                    and self._in_range(height, rule.height_min, rule.height_max)
+                    and self._in_range(length, rule.length_min, rule.length_max)):
+                bracket = self._catalog.bracket(rule.article)
+                if bracket is None:
+                    items.append(BracketItem(rule.article, rule.qty, None, None))
+                else:
+                    items.append(BracketItem(rule.article, rule.qty, bracket.name, bracket.price))
+        return tuple(items)
+
+    def compile(self):
+        """
+        Заранее заполняет таблицу для всех сочетаний типов, высот и длин каталога
+        и всех типов монтажа, а также строит по ней BracketGrid
+        """
+        sizes = self._catalog.sizes()
+        types = sorted({size[0] for size in sizes}, key=int)
+        heights = sorted({size[1] for size in sizes})
+        lengths = sorted({size[2] for size in sizes})
+        table = {}
+        for radiator_type in types:
+            for height in heights:
+                for length in lengths:
+                    for mount in self.mounts:
+                        table[(radiator_type, height, length, mount)] = self.match(radiator_type, height, length, mount)
+        # Подменяем словарь целиком, чтобы читатели из другого потока не видели его частично заполненным
+        self._table = table
+        self.grid = BracketGrid(table, types, heights, lengths, self.mounts)
+
+    def resolve(self, radiator_type, height, length, mount):
+        """Кронштейны для одного радиатора заданного размера и типа монтажа"""
+        key = (radiator_type, height, length, mount)
+        items = self._table.get(key)
+        if items is None:
+            items = self.match(radiator_type, height, length, mount)
+            self._table[key] = items
+        return items
+
+
+class BracketGrid:
+    """
+    Полная таблица подбора кронштейнов на массивах NumPy с осями
+    (тип радиатора, высота, длина, тип монтажа, позиция кронштейна).
+    Ячейка хранит код артикула (индекс в items, -1 - пусто) и количество
+    на один радиатор. Кронштейны без цены на листе "Кронштейны" в таблицу не попадают,
+    как и в спецификацию.
+    """
+
+    def __init__(self, table, types, heights, lengths, mounts):
+        import numpy as np
+
+        self.types = list(types)
+        self.heights = list(heights)
+        self.lengths = list(lengths)
+        self.mounts = list(mounts)
+        self.items = []
+        codes = {}
+        cells = {}
+        for (radiator_type, height, length, mount), items in table.items():
+            entries = []
+            for item in items:
+                if item.price is None:
+                    continue
+                code = codes.get(item.article)
+                if code is None:
+                    code = codes[item.article] = len(self.items)
+                    self.items.append(item)
+                entries.append((code, item.qty))
+            cells[(self.types.index(radiator_type), self.heights.index(height),
+                   self.lengths.index(length), self.mounts.index(mount))] = entries
+
+        slots = max((len(entries) for entries in cells.values()), default=0)
+        shape = (len(self.types), len(self.heights), len(self.lengths), len(self.mounts), max(slots, 1))
+        self.code = np.full(shape, -1, dtype=np.int32)
+        self.qty = np.zeros(shape, dtype=np.int64)
+        for index, entries in cells.items():
+            for slot, (code, qty) in enumerate(entries):
+                self.code[index + (slot,)] = code
+                self.qty[index + (slot,)] = qty
+
+        # Оси для поиска индексов через searchsorted (тип - числом, как в SpecSelection)
+        self._type_axis = np.array([int(radiator_type) for radiator_type in self.types], dtype=np.int64)
+        self._height_axis = np.array(self.heights, dtype=np.int64)
+        self._length_axis = np.array(self.lengths, dtype=np.int64)
+
+    @staticmethod
+    def _axis_index(axis, values):
+        """Индексы значений на оси или None, если какого-то значения на оси нет"""
+        import numpy as np
+
+        index = np.minimum(np.searchsorted(axis, values), len(axis) - 1)
+        if len(axis) == 0 or not np.array_equal(axis[index], values):
+            return None
+        return index
+
+    def pairs(self, selection, mount):
+        """
+        Кронштейны радиаторов выборки SpecSelection: (коды артикулов, количества)
+        в порядке радиаторов и правил, как при поштучном подборе.
+        Возвращает None, если размер какого-то радиатора не попал в таблицу.
+        """
+        import numpy as np
+
+        if mount not in self.mounts:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.int64)
+        type_index = self._axis_index(self._type_axis, selection.radiator_type)
+        height_index = self._axis_index(self._height_axis, selection.height)
+        length_index = self._axis_index(self._length_axis, selection.length)
+        if type_index is None or height_index is None or length_index is None:
+            return None
+
+        mount_index = self.mounts.index(mount)
+        codes = self.code[type_index, height_index, length_index, mount_index]
+        # Количество на один радиатор умножается на вектор количеств радиаторов
+        qty = self.qty[type_index, height_index, length_index, mount_index] * selection.quantity[:, None]
+        filled = codes >= 0
+        return codes[filled].astype(np.intp), qty[filled]
+
+    def verify(self, rules):
+        """
+        Сверяет таблицу с правилами (BracketRules.match) для каждого сочетания осей.
+        Возвращает список несовпадающих ключей (тип, высота, длина, монтаж).
+        """
+        mismatches = []
+        for type_index, radiator_type in enumerate(self.types):
+            for height_index, height in enumerate(self.heights):
+                for length_index, length in enumerate(self.lengths):
+                    for mount_index, mount in enumerate(self.mounts):
+                        expected = [(item.article, item.qty, item.name, item.price)
+                                    for item in rules.match(radiator_type, height, length, mount)
+                                    if item.price is not None]
+                        index = (type_index, height_index, length_index, mount_index)
+                        actual = [(self.items[code].article, int(qty), self.items[code].name, self.items[code].price)
+                                  for code, qty in zip(self.code[index].tolist(), self.qty[index].tolist())
+                                  if code >= 0]
+                        if actual != expected:
+                            mismatches.append((radiator_type, height, length, mount))
+        return mismatches
+
+
+class QuantityModel(MutableMapping):
+    """
+    Введенные количества радиаторов: (лист, артикул) -> строка вида "1+2".
+    Ведет счетчики заполненных ячеек по листам и всего и сообщает подписчикам
+    об изменениях: listener(key, old_value, new_value). При массовом изменении
+    (clear) вызывается один раз с key = None.
+    """
+
+    def __init__(self, values=None):
+        self._values = {}
+        self._sheet_counts = {}
+        self._filled = 0
+        self._listeners = []
+        if values:
+            for key, value in values.items():
+                self._values[key] = value
+                self._count(key, None, value)
+
+    def subscribe(self, listener):
+        self._listeners.append(listener)
+
+    def _notify(self, key, old_value, new_value):
+        for listener in self._listeners:
+            listener(key, old_value, new_value)
+
+    def _count(self, key, old_value, new_value):
+        delta = bool(new_value) - bool(old_value)
+        if delta:
+            self._filled += delta
+            sheet_name = key[0]
+            self._sheet_counts[sheet_name] = self._sheet_counts.get(sheet_name, 0) + delta
+
+    def __getitem__(self, key):
+        return self._values[key]
+
+    def __setitem__(self, key, value):
+        old_value = self._values.get(key)
+        self._values[key] = value
+        if old_value != value:
+            self._count(key, old_value, value)
+            self._notify(key, old_value, value)
+
+    def __delitem__(self, key):
+        old_value = self._values.pop(key)
+        self._count(key, old_value, None)
+        self._notify(key, old_value, None)
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __len__(self):
+        return len(self._values)
+
+    def __contains__(self, key):
+        return key in self._values
+
+    def clear(self):
+        """Удаляет все значения с одним уведомлением"""
+        if not self._values:
+            return
+        self._values.clear()
+        self._sheet_counts.clear()
+        self._filled = 0
+        self._notify(None, None, None)
+
+    def filled(self, sheet_name=None):
+        """Число заполненных ячеек на листе или во всех листах"""
+        if sheet_name is None:
+            return self._filled
+        return self._sheet_counts.get(sheet_name, 0)
+
+    def has_any(self):
+        return self._filled > 0
+
+    def __repr__(self):
+        return f"QuantityModel({self._values!r})"
+
+
+# Позиции спецификации, сопоставленные с каталогом: таблица и строка каждого радиатора,
+# количество и характеристики в массивах NumPy (все в порядке ввода)
+SpecSelection = namedtuple("SpecSelection", [
+    "tables", "rows", "quantity", "price", "power", "height", "length", "radiator_type", "connection"
+])
+
+
+def parse_quantity(value):
+    """
+    Преобразует введенное значение в количество радиаторов.
+    Обрабатывает целые числа, числа с плавающей точкой и комбинации с плюсами.
+    """
+    try:
+        # Если переданное значение — название столбца (например, "Кол-во"), вернуть 0
+        if isinstance(value, str) and value.strip() in ["Кол-во", "№"]:
+            return 0
+
+        if not value:
+            return 0
+
+        # Если значение уже число, сразу округляем до ближайшего целого
+        if isinstance(value, (int, float)):
+            return int(round(float(value)))
+
+        value = str(value).strip()
+
+        # Удаляем лишние знаки '+' в начале и конце
+        while value.startswith('+'):
+            value = value[1:]
+        while value.endswith('+'):
+            value = value[:-1]
+
+        # Если осталась пустая строка после очистки, возвращаем 0
+        if not value:
+            return 0
+
+        # Разбиваем строку по знакам '+' и суммируем отдельные части
+        parts = value.split('+')
+        total = 0
+        for part in parts:
+            part = part.strip()
+            if part:
+                # Преобразуем каждую часть в float, округляем и добавляем к сумме
+                total += int(round(float(part)))
+
+        return total
+    except Exception as e:
+        print(f"Ошибка преобразования количества: {str(e)}")
+        return 0
+
+
+def _spec_rows(spec_data):
+    """Маска строк спецификации без строки "Итого" (если столбца "№" нет - все строки)"""
+    if "№" not in spec_data.columns:
+        return [True] * len(spec_data)
+    return [number != "Итого" for number in spec_data["№"].tolist()]
+
+
+# Вид строки спецификации
+ROW_RADIATOR = 0
+ROW_BRACKET = 1
+ROW_OTHER = 2
+
+
+def spec_row_kind(name):
+    """Вид строки спецификации по наименованию: ROW_BRACKET, ROW_RADIATOR или ROW_OTHER"""
+    name = str(name)
+    if "Кронштейн" in name:
+        return ROW_BRACKET
+    if "Радиатор" in name:
+        return ROW_RADIATOR
+    return ROW_OTHER
+
+
+def _unit_power(value):
+    """Мощность строки спецификации (Вт) как число; пустые и ошибочные значения - 0"""
+    power_str = str(value).strip()
+    if power_str in ['', 'nan', 'None']:
+        return 0.0
+    try:
+        return float(power_str)
+    except ValueError:
+        print(f"Ошибка конвертации мощности: '{power_str}'")
+        return 0.0
+
+
+def spec_power(spec_data):
+    """Суммарная мощность спецификации (Вт) с учетом количества"""
+    total_power = 0.0
+
+    # Один проход по столбцам вместо iterrows; порядок сложения прежний
+    for index, (keep, power, qty) in enumerate(zip(
+            _spec_rows(spec_data), spec_data["Мощность, Вт"].tolist(), spec_data["Кол-во"].tolist())):
+        if not keep:
+            continue
+        power = _unit_power(power)
+        try:
+            if power >= 0 and qty >= 0:
+                total_power += power * qty
+            else:
+                print(f"Некорректные значения в строке {index}: мощность={power}, количество={qty}")
+        except TypeError:
+            print(f"Неправильный тип данных в строке {index}")
+
+    return round(total_power, 2)  # Округление до 2 знаков
+
+
+# Параметры расчета спецификации: скидки в процентах и тип монтажа кронштейнов
+SpecOptions = namedtuple("SpecOptions", ["radiator_discount", "bracket_discount", "mount"],
+                         defaults=(0.0, 0.0, WALL_BRACKETS))
+
+# Итоги спецификации: количество радиаторов и кронштейнов, мощность (Вт),
+# вес (кг) и объем (м3) радиаторов, сумма со скидками (руб)
+SpecTotals = namedtuple("SpecTotals", ["radiators", "brackets", "power", "weight", "volume", "total"])
+
+
+# Результат импорта спецификации заказчика: количества {(лист, артикул): значение},
+# несопоставленные строки, таблица соответствия (DataFrame или None) и число строк файла
+SpecImport = namedtuple("SpecImport", ["quantities", "unmatched", "correspondence", "rows"])
+
+# Результат подбора аналогов Meteor по наименованиям других производителей
+ForeignMatch = namedtuple("ForeignMatch", [
+    "quantities", "correspondence", "total_loaded", "total_qty",
+    "similar_loaded", "long_radiators", "not_found", "unknown_format",
+])
+
+CORRESPONDENCE_COLUMNS = [
+    "Оригинальное наименование", "Количество",
+    "Аналог Meteor", "Артикул Meteor", "Комментарий"
+]
+
+
+# Наименование радиатора другого производителя, разобранное ForeignNameParser:
+# тип подключения ("VK-правое" или "K-боковое"), тип радиатора, высота и длина (строки, мм)
+ForeignName = namedtuple("ForeignName", ["connection", "rad_type", "height", "length"])
+
+
+class ForeignNameParser:
+    """
+    Разбор наименований радиаторов других производителей заранее
+    скомпилированной грамматикой: шаблоны брендов (BRAND_PATTERNS и
+    дополнительные из настроек) объединены в одно выражение, которое ищется
+    в наименовании за один проход (побеждает совпадение левее, при равенстве -
+    бренд раньше в списке); если бренд не найден, проверяются общие форматы
+    ("C 11-400-400", "11/500/400", "тип 11 / 500 / 400", "K-Profil 11 500 400"),
+    также объединенные в одно выражение. Шаблон бренда задает группы type,
+    height, length (мм) или height_dm, length_dm (дм, как в артикулах Kermi
+    "FKO 22 0510"); совпавшая группа vk означает нижнее подключение.
+    Результаты кэшируются (LRU) по наименованию, приведенному к нижнему
+    регистру с одиночными пробелами.
+    """
+    # Разделитель размеров: дефис, косая черта, пробел или знак умножения ("500x1000", "500х1000")
+    _SEP = r"\s*[-/\\\sxх×*]\s*"
+
+    BRAND_PATTERNS = {
+        "Kermi": r"\b(?:(?P<vk>ftv|ftp|profil-v)|fko|fk0|profil-k)\b\D*?(?P<type>\d{2})\s*"
+                 r"(?:(?P<height_dm>\d{2})\s*(?P<length_dm>\d{2})\b"
+                 r"|[-/\sxх×*]\s*(?P<height>\d{3})" + _SEP + r"(?P<length>\d{3,4}))",
+        "Purmo": r"\b(?:(?P<vk>cv)|c)\s*(?P<type>\d{2})" + _SEP + r"(?P<height>\d{3})" + _SEP +
+                 r"(?P<length>\d{3,4})\b",
+        "Buderus": r"\b(?P<vk>vk)?-?profil\s*(?P<type>\d{2})" + _SEP + r"(?P<height>\d{3})" + _SEP +
+                   r"(?P<length>\d{3,4})\b",
+        "Prado": r"\bprado\s+(?:(?P<vk>universal)|classic)?\D*?(?P<type>\d{2})" + _SEP +
+                 r"(?P<height>\d{3})" + _SEP + r"(?P<length>\d{3,4})\b",
+    }
+
+    # Общие форматы: "C 11-400-400" в начале наименования, иначе первые три числа
+    # через разделители ("11/500/400", "тип 11 / 500 / 400", "K-Profil 11 500 400")
+    GENERIC_PATTERNS = (
+        r"[cv]\s*(?P<type>\d+)\s*[-\s]\s*(?P<height>\d+)\s*[-\s]\s*(?P<length>\d+)",
+        r".*?(?:тип\s*)?(?P<type>\d+)[\\/\s-]*(?P<height>\d+)[\\/\s-]*(?P<length>\d+)",
+    )
+
+    # Нижнее подключение: "CV 11..." в начале наименования, "vk" или "нижн" в любом месте
+    _CV_PREFIX = re.compile(r"cv\s*\d")
+
+    # Группы, которые может задавать альтернатива грамматики
+    _GROUPS = ("vk", "type", "height", "length", "height_dm", "length_dm")
+
+    def __init__(self, brand_patterns=None, cache_size=4096):
+        patterns = dict(self.BRAND_PATTERNS)
+        patterns.update(brand_patterns or {})
+        self.brands = list(patterns)
+        # Для каждой альтернативы - выборка ее групп _GROUPS из результата match
+        self._groups = {}
+        self.brand_pattern = self._compile(
+            [(f"b{i}", pattern) for i, pattern in enumerate(patterns.values())])
+        self.generic_pattern = self._compile(
+            [(f"g{i}", pattern) for i, pattern in enumerate(self.GENERIC_PATTERNS)])
+        self._parse_normalized = lru_cache(maxsize=cache_size)(self._parse)
+
+    @classmethod
+    def from_settings(cls, settings=None):
+        """Разборщик с дополнительными шаблонами брендов из настроек ("foreign_name_patterns")"""
+        settings = settings if settings is not None else load_settings()
+        try:
+            patterns = settings.get("foreign_name_patterns") or {}
+            if isinstance(patterns, str):
+                # Значение из переменной окружения - JSON-объект
+                patterns = json.loads(patterns)
+            return cls(patterns)
+        except (ValueError, re.error) as e:
+            print(f"Ошибка в шаблонах наименований foreign_name_patterns: {e}")
+            return cls()
+
+    def _compile(self, alternatives):
+        """
+        Объединяет шаблоны в одно выражение: группы каждого шаблона получают
+        префикс "<имя альтернативы>_", сама альтернатива - группу с ее именем
+        """
+        parts = []
+        for name, pattern in alternatives:
+            pattern = re.sub(r"\(\?P<(\w+)>", lambda m: f"(?P<{name}_{m.group(1)}>", pattern)
+            pattern = re.sub(r"\(\?P=(\w+)\)", lambda m: f"(?P={name}_{m.group(1)})", pattern)
+            parts.append(f"(?P<{name}>{pattern})")
+        # Без альтернатив - выражение, которое ничего не находит
+        compiled = re.compile("|".join(parts) or "(?!)", re.IGNORECASE | re.DOTALL)
+        for name, _ in alternatives:
+            # Номер группы в (None,) + match.groups(); 0 - у альтернативы нет такой группы
+            self._groups[name] = itemgetter(*(compiled.groupindex.get(f"{name}_{group}", 0)
+                                              for group in self._GROUPS))
+        return compiled
+
+    @staticmethod
+    def normalize(name):
+        """Ключ кэша: нижний регистр, пробелы по краям убраны, внутри - одиночные"""
+        return " ".join(str(name).split()).lower()
+
+    def parse(self, name):
+        """ForeignName для наименования или None, если формат не распознан"""
+        return self._parse_normalized(self.normalize(name))
+
+    def _parse(self, name):
+        match = self.brand_pattern.search(name) or self.generic_pattern.match(name)
+        if match is None:
+            return None
+        vk, rad_type, height, length, height_dm, length_dm = self._groups[match.lastgroup](
+            (None,) + match.groups())
+        if height is None and height_dm is not None:
+            height = str(int(height_dm) * 100)
+            length = str(int(length_dm) * 100)
+        if vk is None and ("vk" in name or "нижн" in name or self._CV_PREFIX.match(name)):
+            vk = True
+        return ForeignName("VK-правое" if vk else "K-боковое", rad_type, height, length)
+
+    def cache_info(self):
+        return self._parse_normalized.cache_info()
+
+
+def excel_engine(file_path):
+    """Движок pandas для чтения Excel-файла по расширению (None - формат не поддерживается)"""
+    if file_path.endswith('.xlsx'):
+        return 'openpyxl'
+    if file_path.endswith('.xls'):
+        return 'xlrd'
+    return None
+
+
+def read_article_spec(file_path):
+    """
+    Читает Excel-спецификацию с артикулами, автоматически находя нужные столбцы.
+    Возвращает (список пар (артикул, количество), число строк файла).
+    """
+    import pandas as pd
+
+    engine = excel_engine(file_path)
+    if engine is None:
+        raise ValueError("Неподдерживаемый формат файла")
+
+    # Читаем весь файл для анализа
+    df = pd.read_excel(file_path, engine=engine, header=None)
+
+    # 1. Находим столбцы с артикулами и количеством
+    art_col = None
+    qty_col = None
+    # Если заголовков нет, данные начинаются с первой строки
+    header_row = -1
+
+    # Перебираем все строки сверху вниз
+    for i, row in df.iterrows():
+        # Ищем в текущей строке нужные заголовки
+        for j, cell in enumerate(row):
+            cell_str = str(cell).strip().lower()
+
+            # Проверяем возможные варианты названий столбцов
+            if not art_col and any(x in cell_str for x in ['артикул', 'art', 'код']):
+                art_col = j
+            if not qty_col and any(x in cell_str for x in ['кол-во', 'количество', 'qty']):
+                qty_col = j
+
+        # Если нашли оба столбца - выходим из цикла
+        if art_col is not None and qty_col is not None:
+            header_row = i  # Запоминаем строку с заголовками
+            break
+
+    # Если не нашли нужные столбцы - берем первые два столбца
+    if art_col is None:
+        art_col = 0
+    if qty_col is None:
+        qty_col = 1 if len(df.columns) > 1 else 0
+
+    # 2. Читаем данные, начиная со строки после найденных заголовков
+    data_rows = []
+    for i in range(header_row + 1, len(df)):
+        art = str(df.iloc[i, art_col]).strip()
+        qty = df.iloc[i, qty_col]
+
+        # Пропускаем пустые строки и строки "Итого"
+        if not art or art.lower() == 'итого':
+            continue
+
+        try:
+            qty = float(qty)
+            if qty > 0:
+                data_rows.append((art, int(qty)))
+        except (ValueError, TypeError):
+            continue
+
+    return data_rows, len(df)
+
+
+def read_csv_spec(file_path):
+    """
+    Читает CSV-спецификацию (разделитель ";") с артикулами и количеством.
+    Количества одного артикула складываются.
+    Возвращает (список пар (артикул, количество), число строк файла).
+    """
+    import pandas as pd
+
+    encodings = ['utf-8-sig', 'cp1251', 'windows-1251', 'iso-8859-1']
+    df = None
+
+    for encoding in encodings:
+        try:
+            # Читаем файл без заголовков сначала
+            df = pd.read_csv(file_path, sep=';', encoding=encoding, header=None)
+
+            # Проверяем, есть ли заголовки
+            has_headers = not df.iloc[0, 0].replace('.', '').isdigit()
+
+            if has_headers:
+                # Читаем снова с заголовками
+                df = pd.read_csv(file_path, sep=';', encoding=encoding, header=0)
+            else:
+                # Берем первые два столбца как артикул и количество
+                df.columns = ['Артикул', 'Кол-во']
+
+            df = df[df.iloc[:, 0].notna()]
+            break
+        except UnicodeDecodeError:
+            continue
+
+    if df is None:
+        raise ValueError("Не удалось определить кодировку файла")
+
+    # Определяем индексы столбцов с артикулами и количеством
+    art_col = None
+    qty_col = None
+
+    # Ищем столбцы по возможным названиям
+    for col in df.columns:
+        col_lower = str(col).lower()
+        if 'артикул' in col_lower or 'art' in col_lower or 'код' in col_lower:
+            art_col = col
+        elif 'кол-во' in col_lower or 'количество' in col_lower or 'qty' in col_lower:
+            qty_col = col
+
+    # Если не нашли стандартные названия - берем первые два столбца
+    if art_col is None:
+        art_col = df.columns[0]
+    if qty_col is None:
+        qty_col = df.columns[1] if len(df.columns) > 1 else None
+
+    if qty_col is None:
+        raise ValueError("Не найден столбец с количеством")
+
+    # Удаляем пробелы из артикулов
+    df[art_col] = df[art_col].astype(str).str.replace(' ', '').str.strip()
+
+    # Преобразуем количество в целые числа
+    df[qty_col] = df[qty_col].astype(str).str.replace('.0', '').str.strip()
+    df[qty_col] = pd.to_numeric(df[qty_col], errors='coerce').fillna(0).astype(int)
+
+    # Группируем по артикулам и суммируем количества
+    grouped_df = df.groupby(art_col)[qty_col].sum().reset_index()
+    data_rows = [(str(art).strip(), int(qty)) for art, qty in zip(grouped_df[art_col], grouped_df[qty_col])]
+    return data_rows, len(df)
+
+
+# Наименование вида "C 11-400-400" / "CV 11-400-800" без слова "радиатор"
+_CV_NAME = re.compile(r'^[cv]\s*\d+', re.IGNORECASE)
+
+
+def read_foreign_spec(file_path):
+    """
+    Читает Excel-спецификацию других производителей: находит столбцы с наименованием
+    и количеством по заголовкам или эвристикам.
+    Возвращает список пар (наименование, количество) для строк с радиаторами.
+    """
+    import pandas as pd
+
+    engine = excel_engine(file_path)
+    if engine is None:
+        raise ValueError("Неподдерживаемый формат файла")
+
+    # Читаем весь файл для анализа
+    df = pd.read_excel(file_path, engine=engine, header=None)
+
+    # 1. Поиск строки с заголовками и столбцов с нужными данными
+    name_col = None
+    qty_col = None
+    header_row = 0
+
+    # Ищем строку, содержащую хотя бы одно из ключевых слов
+    keywords = ['радиатор', 'radiator', 'тип', 'type', 'кол-во', 'количество', 'qty', 'шт']
+
+    for i in range(min(20, len(df))):  # Проверяем первые 20 строк
+        row_str = ' '.join(str(cell).lower() for cell in df.iloc[i] if pd.notna(cell))
+        if any(keyword in row_str for keyword in keywords):
+            header_row = i
+            break
+
+    # Теперь ищем столбцы с названиями и количеством
+    for j in range(len(df.columns)):
+        col_str = str(df.iloc[header_row, j]).lower() if header_row < len(df) else ""
+
+        # Определяем столбец с наименованием
+        if not name_col and any(x in col_str for x in ['наименование', 'название', 'имя', 'номенклатура', 'товар', 'позиция', 'радиатор', 'radiator']):
+            name_col = j
+        # Определяем столбец с количеством
+        if not qty_col and any(x in col_str for x in ['кол-во', 'количество', 'qty', 'шт']):
+            qty_col = j
+
+    # Если не нашли по заголовкам, используем эвристики
+    if name_col is None:
+        # Ищем первый столбец, содержащий слово "радиатор" или "тип"
+        for j in range(len(df.columns)):
+            col_data = df.iloc[header_row+1:header_row+6, j].astype(str).str.lower()  # Проверяем 5 строк после заголовка
+            if any(('радиатор' in s or 'тип' in s or 'radiator' in s or 'type' in s) for s in col_data):
+                name_col = j
+                break
+        if name_col is None:
+            name_col = 0  # По умолчанию первый столбец
+
+    if qty_col is None:
+        # Ищем столбец с числовыми значениями после заголовка
+        for j in range(len(df.columns)):
+            if j == name_col:
+                continue
+            try:
+                # Пробуем преобразовать первые 5 значений в число (пропускаем заголовок)
+                test_values = df.iloc[header_row+1:header_row+6, j].apply(pd.to_numeric, errors='ignore')
+                if all(isinstance(x, (int, float)) for x in test_values if pd.notna(x)):
+                    qty_col = j
+                    break
+            except:
+                continue
+        if qty_col is None:
+            qty_col = 1 if len(df.columns) > 1 else 0  # По умолчанию второй столбец
+
+    # 2. Извлекаем данные из найденных столбцов
+    data_rows = []
+    for i in range(header_row + 1, len(df)):
+        name = str(df.iloc[i, name_col]).strip() if name_col is not None else ""
+        qty = df.iloc[i, qty_col] if qty_col is not None else 0
+
+        # Пропускаем пустые строки и строки "Итого"
+        if not name or name.lower() == 'итого':
+            continue
+
+        try:
+            qty = float(qty)
+            if qty > 0 and ('радиатор' in name.lower() or 'radiator' in name.lower() or
+                            _CV_NAME.match(name)):
+                data_rows.append((name, int(qty)))
+        except (ValueError, TypeError):
+            continue
+
+    return data_rows
+
+
+class RadiatorEngine:
+    """
+    Расчет спецификаций по каталогу без графического интерфейса: принимает простые
+    аргументы (словарь количеств, скидки, тип монтажа) и возвращает простые данные.
+    Загруженный каталог только читается, поэтому методы можно вызывать из нескольких
+    потоков одновременно.
+    """
+    SPEC_COLUMNS = [
+        "№", "Артикул", "Наименование", "Мощность, Вт",
+        "Цена, руб (с НДС)", "Скидка, %",
+        "Цена со скидкой, руб (с НДС)", "Кол-во",
+        "Сумма, руб (с НДС)"
+    ]
+
+    def __init__(self, catalog, bracket_rules=None, name_parser=None):
+        self.catalog = catalog
+        self.bracket_rules = bracket_rules or BracketRules.for_catalog(catalog)
+        # Разбор наименований других производителей (ForeignNameParser)
+        self.name_parser = name_parser or ForeignNameParser()
+
+    @classmethod
+    def from_file(cls, file_path, reader="pandas", cache=None, first_sheet=None, background=False):
+        """
+        Загружает каталог из файла или из кэша (cache - CatalogCache или None).
+        При background=True сразу разбирается только лист first_sheet, остальные
+        догружаются в фоне; иначе каталог загружается целиком до возврата.
+        После полной загрузки правила кронштейнов компилируются, а каталог
+        сохраняется в кэш.
+        """
+        cached = cache.load(file_path) if cache is not None else None
+        if cached is not None:
+            sheets, brackets, bracket_rules = cached
+            engine = cls(LazyCatalog(file_path, sheets=sheets, brackets=brackets, bracket_rules=bracket_rules))
+            engine.bracket_rules.compile()
+            return engine
+
+        catalog = LazyCatalog(file_path, reader=reader)
+        if first_sheet in catalog:
+            catalog[first_sheet]
+        engine = cls(catalog)
+
+        def on_catalog_loaded(catalog):
+            engine.bracket_rules.compile()
+            if cache is not None:
+                cache.save(file_path, catalog.snapshot())
+
+        if background:
+            catalog.start_warmup(on_complete=on_catalog_loaded)
+        else:
+            catalog.load_all()
+            on_catalog_loaded(catalog)
+        return engine
+
+    def calculate_brackets(self, radiator_type, length, height, bracket_type, qty_radiator=1):
+        """
+        Рассчитывает необходимые кронштейны для радиатора по таблице правил
+        (лист "Правила кронштейнов" или DEFAULT_BRACKET_RULES)
+
+        Параметры:
+            radiator_type (str): Тип радиатора ("10", "11", "20" и т.д.)
+            length (int): Длина радиатора в мм (400-2000)
+            height (int): Высота радиатора в мм (300,400,500,600,900)
+            bracket_type (str): Тип крепления
+            qty_radiator (int): Количество радиаторов (по умолчанию 1)
+
+        Возвращает:
+            list: Список кортежей (артикул, количество)
+        """
+        items = self.bracket_rules.resolve(radiator_type, height, length, bracket_type)
+        return [(item.article, item.qty * qty_radiator) for item in items]
+
+    def quantities_by_article(self, items):
+        """
+        Сопоставляет пары (артикул, количество) с каталогом.
+        Возвращает ({(лист, артикул): количество}, [артикулы, которых нет в каталоге]).
+        Количества одного артикула складываются.
+        """
+        quantities = {}
+        unmatched = []
+        for art, qty in items:
+            art = str(art).strip()
+            product = self.catalog.find_article(art)
+            if product is None:
+                unmatched.append(art)
+                continue
+            key = (product.sheet, product.article)
+            quantities[key] = str(parse_quantity(quantities.get(key)) + parse_quantity(qty))
+        return quantities, unmatched
+
+    def match_foreign(self, data_rows):
+        """
+        Подбирает аналоги Meteor для пар (наименование, количество) из спецификации
+        другого производителя: тип подключения, тип радиатора и размеры извлекаются
+        из наименования (self.name_parser), высота и длина приводятся к ближайшим из каталога.
+        Возвращает ForeignMatch.
+        """
+        import pandas as pd
+
+        quantities = {}
+        correspondence = []
+        total_loaded = 0
+        total_qty = 0
+        not_found = []
+        unknown_format = []
+        long_radiators = []
+        similar_loaded = []
+
+        parse_name = self.name_parser.parse
+        for name, qty in data_rows:
+            # Тип подключения, тип радиатора и размеры из наименования (один проход, с кэшем)
+            parsed = parse_name(name)
+            if parsed is None:
+                unknown_format.append(name)
+                correspondence.append([name, qty, "", "", "Не распознан формат"])
+                continue
+            connection, rad_type, height, length = parsed
+
+            if not rad_type or not height or not length:
+                unknown_format.append(name)
+                correspondence.append([name, qty, "", "", "Не удалось определить параметры"])
+                continue
+
+            # Корректируем тип радиатора
+            rad_type = rad_type.strip()
+
+            # Проверяем, что тип поддерживается
+            supported_types = ["10", "11", "20", "21", "22", "30", "33"]
+            if rad_type not in supported_types:
+                not_found.append(f"{name} (неподдерживаемый тип {rad_type})")
+                correspondence.append([name, qty, "", "", f"Неподдерживаемый тип {rad_type}"])
+                continue
+
+            # Корректируем высоту
+            try:
+                height = int(height)
+                if height not in [300, 400, 500, 600, 900]:
+                    original_height = height
+                    if height < 300:
+                        height = 300
+                    elif height < 400:
+                        height = 400
+                    elif height < 500:
+                        height = 500
+                    elif height < 600:
+                        height = 600
+                    else:
+                        height = 900
+                    similar_loaded.append(f"{name} → высота {height} (была {original_height})")
+
+                length = int(length)
+                if length > 2000:
+                    long_radiators.append(f"{name} (длина {length} мм)")
+                    correspondence.append([name, qty, "", "", f"Длина {length} мм > 2000 мм"])
+                    continue
+                elif length < 400:
+                    original_length = length
+                    length = 400
+                    similar_loaded.append(f"{name} → длина {length} (была {original_length})")
+                else:
+                    original_length = length
+                    length = round(length / 100) * 100
+                    if original_length != length:
+                        similar_loaded.append(f"{name} → длина {length} (была {original_length})")
+            except ValueError:
+                unknown_format.append(f"{name} (ошибка в размерах)")
+                correspondence.append([name, qty, "", "", "Ошибка в размерах"])
+                continue
+
+            # Формируем артикул Meteor
+            sheet_name = f"{connection} {rad_type}"
+
+            if sheet_name not in self.catalog:
+                not_found.append(f"{name} (неподдерживаемый тип {rad_type})")
+                correspondence.append([name, qty, "", "", f"Неподдерживаемый тип {rad_type}"])
+                continue
+
+            # Ищем радиатор с такой же высотой и длиной, иначе - с ближайшей длиной
+            product = self.catalog.product_by_size(sheet_name, height, length)
+            comment = "Успешно загружен"
+            if product is None:
+                possible_lengths = [l for l in range(400, 2100, 100)]
+                closest_length = min(possible_lengths, key=lambda x: abs(x - length))
+                product = self.catalog.product_by_size(sheet_name, height, closest_length)
+                if product is None:
+                    not_found.append(f"{name} (не найден аналог Meteor {height}x{length})")
+                    correspondence.append([name, qty, "", "", f"Не найден аналог Meteor {height}x{length}"])
+                    continue
+                similar_loaded.append(f"{name} → {product.name} (длина {length}→{closest_length} мм)")
+                comment = f"Длина скорректирована {length}→{closest_length} мм"
+
+            key = (sheet_name, product.article)
+            quantities[key] = str(parse_quantity(quantities.get(key)) + qty)
+            correspondence.append([name, qty, product.name, product.article, comment])
+            total_loaded += 1
+            total_qty += qty
+
+        return ForeignMatch(
+            quantities=quantities,
+            correspondence=pd.DataFrame(correspondence, columns=CORRESPONDENCE_COLUMNS),
+            total_loaded=total_loaded,
+            total_qty=total_qty,
+            similar_loaded=similar_loaded,
+            long_radiators=long_radiators,
+            not_found=not_found,
+            unknown_format=unknown_format,
+        )
+
+    def import_spec(self, file_path, spec_format="auto"):
+        """
+        Загружает спецификацию заказчика из .xlsx, .xls или .csv.
+        spec_format: "articles" - артикулы Meteor, "foreign" - наименования других
+        производителей, "auto" - сначала артикулы, а если ни один не найден - подбор аналогов.
+        Возвращает SpecImport.
+        """
+        if file_path.lower().endswith('.csv'):
+            data_rows, rows = read_csv_spec(file_path)
+            quantities, unmatched = self.quantities_by_article(data_rows)
+            return SpecImport(quantities, unmatched, None, rows)
+
+        if spec_format != "foreign":
+            data_rows, rows = read_article_spec(file_path)
+            quantities, unmatched = self.quantities_by_article(data_rows)
+            if quantities or spec_format == "articles":
+                return SpecImport(quantities, unmatched, None, rows)
+
+        data_rows = read_foreign_spec(file_path)
+        matched = self.match_foreign(data_rows)
+        correspondence = matched.correspondence
+        unmatched = [f"{name} ({comment})" for name, art, comment in zip(
+            correspondence["Оригинальное наименование"], correspondence["Артикул Meteor"],
+            correspondence["Комментарий"]) if not art]
+        return SpecImport(matched.quantities, unmatched, correspondence, len(data_rows))
+
+    def build_spec(self, quantities, radiator_discount=0.0, bracket_discount=0.0, mount=WALL_BRACKETS):
+        """
+        Формирует спецификацию пакетно: количества {(лист, артикул): значение} один раз
+        сопоставляются с каталогом, цены, скидки и суммы считаются над массивами,
+        кронштейны агрегируются одной группировкой по артикулу.
+        Возвращает DataFrame со столбцами SPEC_COLUMNS или None, если позиций нет.
+        При ошибке в данных каталога вызывает ValueError.
+        """
+        import numpy as np
+        import pandas as pd
+
+        parts = []
+        selection = self.select_positions(quantities)
+        if selection is not None:
+            parts.append(self.radiator_columns(selection, radiator_discount))
+            brackets = self.bracket_columns(selection, mount, bracket_discount)
+            if brackets is not None:
+                parts.append(brackets)
+        if not parts:
+            return None
+
+        columns = {}
+        for column in self.SPEC_COLUMNS[1:]:
+            values = [part[column] for part in parts]
+            if isinstance(values[0], list):
+                columns[column] = [value for part in values for value in part]
+            else:
+                columns[column] = np.concatenate(values)
+        columns["№"] = np.arange(1, len(columns["Артикул"]) + 1, dtype=np.int64)
+        return pd.DataFrame(columns, columns=self.SPEC_COLUMNS)
+
+    def select_positions(self, quantities):
+        """
+        Сопоставляет количества {(лист, артикул): значение} с каталогом.
+        Возвращает SpecSelection в порядке ввода или None, если радиаторов нет.
+        """
+        import numpy as np
+
+        tables, rows, counts = [], [], []
+        groups = {}
+        parsed = {}
+        for (sheet_name, art), value in quantities.items():
+            if value and sheet_name in self.catalog:
+                found = self.catalog.locate(sheet_name, art)
+                if found is None:
+                    continue
+                # Сумму вида "1+3" вычисляем только при формировании спецификации, один раз на строку
+                qty_radiator = parsed.get(value)
+                if qty_radiator is None:
+                    qty_radiator = parsed[value] = parse_quantity(value)
+                group = groups.get(sheet_name)
+                if group is None:
+                    group = groups[sheet_name] = (found[0], [], [])
+                group[1].append(len(rows))
+                group[2].append(found[1])
+                tables.append(found[0])
+                rows.append(found[1])
+                counts.append(qty_radiator)
+        if not rows:
+            return None
+
+        # Характеристики выбираются из массивов каждого листа одной операцией
+        count = len(rows)
+        price = np.empty(count)
+        power = np.empty(count)
+        height = np.empty(count, dtype=np.int64)
+        length = np.empty(count, dtype=np.int64)
+        radiator_type = np.empty(count, dtype=np.int64)
+        connection = np.empty(count, dtype=np.int64)
+        for sheet_name, (table, positions, sheet_rows) in groups.items():
+            price[positions] = table.price[sheet_rows]
+            power[positions] = table.power[sheet_rows]
+            height[positions] = table.height[sheet_rows]
+            length[positions] = table.length[sheet_rows]
+            radiator_type[positions] = int(sheet_name.split()[-1])
+            # Вид подключения для сортировки: сначала VK, потом K
+            connection[positions] = 0 if "VK" in sheet_name else 1
+
+        unknown = np.flatnonzero((height == 0) | (length == 0))
+        if len(unknown):
+            position = unknown[0]
+            raise ValueError(f"не удалось определить размер радиатора {tables[position].articles[rows[position]]}")
+
+        return SpecSelection(tables, rows, np.asarray(counts, dtype=np.int64),
+                             price, power, height, length, radiator_type, connection)
+
+    def radiator_columns(self, selection, discount=0.0):
+        """Столбцы радиаторов спецификации: VK перед K, затем по типу, высоте и длине"""
+        import numpy as np
+
+        discounted_price = round_money(selection.price * (1 - discount / 100))
+        total = round_money(discounted_price * selection.quantity)
+
+        # lexsort устойчива, поэтому одинаковые размеры остаются в порядке ввода
+        order = np.lexsort((selection.length, selection.height, selection.radiator_type, selection.connection))
+        tables, rows = selection.tables, selection.rows
+        return {
+            "Артикул": [tables[i].articles[rows[i]] for i in order],
+            "Наименование": [tables[i].names[rows[i]] for i in order],
+            "Мощность, Вт": selection.power[order],
+            "Цена, руб (с НДС)": selection.price[order],
+            "Скидка, %": np.full(len(order), discount),
+            "Цена со скидкой, руб (с НДС)": discounted_price[order],
+            "Кол-во": selection.quantity[order],
+            "Сумма, руб (с НДС)": total[order],
+        }
+
+    def bracket_columns(self, selection, mount=WALL_BRACKETS, discount=0.0):
+        """
+        Столбцы кронштейнов спецификации, сгруппированных по артикулу
+        в порядке первого появления. Возвращает None, если кронштейнов нет.
+        """
+        import numpy as np
+
+        if mount == NO_BRACKETS:
+            return None
+
+        grid = self.bracket_rules.grid
+        found = grid.pairs(selection, mount) if grid is not None else None
+        if found is None:
+            codes, pair_qty, items = self._bracket_pairs_by_rules(selection, mount)
+        else:
+            codes, pair_qty = found
+            # Коды таблицы переводятся в порядок первого появления артикула
+            unique, first = np.unique(codes, return_index=True)
+            order = unique[np.argsort(first, kind="stable")]
+            remap = np.empty(len(grid.items), dtype=np.intp)
+            remap[order] = np.arange(len(order))
+            codes = remap[codes]
+            items = [grid.items[code] for code in order.tolist()]
+        if not items:
+            return None
+
+        price = np.array([item.price for item in items], dtype=np.float64)
+        discounted_price = round_money(price * (1 - discount / 100))
+
+        # np.add.at складывает суммы строк по порядку радиаторов, как и поштучный подсчет
+        line_total = round_money(discounted_price[codes] * pair_qty)
+        total = np.zeros(len(items))
+        np.add.at(total, codes, line_total)
+        count = np.zeros(len(items), dtype=np.int64)
+        np.add.at(count, codes, pair_qty)
+        return {
+            "Артикул": [str(item.article) for item in items],
+            "Наименование": [str(item.name) for item in items],
+            "Мощность, Вт": np.zeros(len(items)),
+            "Цена, руб (с НДС)": price,
+            "Скидка, %": np.full(len(items), discount),
+            "Цена со скидкой, руб (с НДС)": discounted_price,
+            "Кол-во": count,
+            "Сумма, руб (с НДС)": total,
+        }
+
+    def _bracket_pairs_by_rules(self, selection, mount):
+        """
+        Поштучный подбор кронштейнов по правилам (пока BracketGrid не построена).
+        Возвращает (коды в порядке первого появления, количества, список BracketItem).
+        """
+        import numpy as np
+
+        groups = {}
+        codes, pair_qty = [], []
+        for table, height, length, qty_radiator in zip(
+                selection.tables, selection.height.tolist(), selection.length.tolist(),
+                selection.quantity.tolist()):
+            for item in self.bracket_rules.resolve(table.sheet.split()[-1], height, length, mount):
+                if item.price is None:
+                    continue  # Артикула нет на листе "Кронштейны"
+                group = groups.get(item.article)
+                if group is None:
+                    group = groups[item.article] = (len(groups), item)
+                codes.append(group[0])
+                pair_qty.append(item.qty * qty_radiator)
+        items = [item for _, item in groups.values()]
+        return np.asarray(codes, dtype=np.intp), np.asarray(pair_qty, dtype=np.int64), items
+
+    def spec_weight_volume(self, spec_data):
+        """
+        Общий вес (кг) и объем (м3) радиаторов спецификации без учета кронштейнов
+        (без округления)
+        """
+        total_weight = 0.0
+        total_volume = 0.0
+
+        names = spec_data["Наименование"].tolist() if "Наименование" in spec_data.columns else [""] * len(spec_data)
+        for keep, name, art, qty in zip(_spec_rows(spec_data), names,
+                                        spec_data["Артикул"].tolist(), spec_data["Кол-во"].tolist()):
+            # Пропускаем строку "Итого" и кронштейны
+            if not keep or spec_row_kind(name) == ROW_BRACKET:
+                continue
+            unit_weight, unit_volume = self.unit_weight_volume(art)
+            total_weight += unit_weight * int(qty)
+            total_volume += unit_volume * int(qty)
+
+        return float(total_weight), float(total_volume)
+
+    def unit_weight_volume(self, art):
+        """Вес (кг) и объем (м3) одного радиатора по артикулу; (0.0, 0.0), если артикула нет в каталоге"""
+        product = self.catalog.find_article(str(art).strip())
+        if product is None:
+            return 0.0, 0.0
+        return float(product.weight), float(product.volume)
+
+    def spec_totals(self, spec_data):
+        """Итоги спецификации (SpecTotals)"""
+        import numpy as np
+
+        is_bracket = np.array([spec_row_kind(name) == ROW_BRACKET for name in spec_data["Наименование"].tolist()],
+                              dtype=bool)
+        weight, volume = self.spec_weight_volume(spec_data)
+        return SpecTotals(
+            radiators=int(spec_data.loc[~is_bracket, "Кол-во"].sum()),
+            brackets=int(spec_data.loc[is_bracket, "Кол-во"].sum()),
+            power=spec_power(spec_data),
+            weight=round(weight, 1),
+            volume=round(volume, 3),
+            total=round(float(spec_data["Сумма, руб (с НДС)"].sum()), 2),
+        )
+
+    def save_excel(self, spec_data, path, correspondence_data=None):
+        """
+        Сохраняет спецификацию в Excel с сортировкой по типоразмеру.
+        path - путь к файлу или открытый двоичный поток (например, ответ HTTP-сервера).
+        """
+        from openpyxl import Workbook
+        from openpyxl.styles import Font, Alignment, Border, Side, numbers
+        from openpyxl.utils import get_column_letter
+
+        # Создаем книгу и лист
+        wb = Workbook()
+        ws = wb.active
+        ws.title = "Спецификация"
+
+        # Стили оформления
+        header_font = Font(name='Calibri', size=11, bold=True)
+        data_font = Font(name='Calibri', size=11)
+        bold_font = Font(name='Calibri', size=11, bold=True)
+        alignment_center = Alignment(horizontal='center', vertical='center')
+        alignment_left = Alignment(horizontal='left', vertical='center')
+        thin_border = Border(
+            left=Side(style='thin'), 
+            right=Side(style='thin'),
+            top=Side(style='thin'), 
+            bottom=Side(style='thin')
+        )
+        
+        # Стиль для денежных значений (2 знака после запятой)
+        money_style = numbers.FORMAT_NUMBER_COMMA_SEPARATED1
+
+        # Заголовки столбцов
+        headers = [
+            "№", "Артикул", "Наименование", "Мощность, Вт",
+            "Цена, руб (с НДС)", "Скидка, %", 
+            "Цена со скидкой, руб (с НДС)", "Кол-во", 
+            "Сумма, руб (с НДС)"
+        ]
+        ws.append(headers)
+
+        # Применяем стили к заголовкам
+        for col in range(1, len(headers) + 1):
+            cell = ws.cell(row=1, column=col)
+            cell.font = header_font
+            cell.alignment = alignment_center
+            cell.border = thin_border
+
+        # Разделяем радиаторы и кронштейны (вид строки определяется один раз)
+        radiator_data = []
+        bracket_data = []
+        kinds = [spec_row_kind(name) for name in spec_data["Наименование"].tolist()]
+
+        for (_, row), kind in zip(spec_data.iterrows(), kinds):
+            if kind == ROW_BRACKET:
+                bracket_data.append(row)
+            else:
+                radiator_data.append(row)
+        
+        # Функция для извлечения параметров сортировки из наименования
+        def get_sort_key(row):
+            name = str(row["Наименование"])
+            # Определяем тип подключения
+            connection_type = 0 if "VK" in name else 1  # Сначала VK, потом K
+            
+            # Извлекаем тип радиатора (10, 11, 20 и т.д.)
+            radiator_type = 0
+            if "тип 10" in name: radiator_type = 10
+            elif "тип 11" in name: radiator_type = 11
+            elif "тип 20" in name: radiator_type = 20
+            elif "тип 21" in name: radiator_type = 21
+            elif "тип 22" in name: radiator_type = 22
+            elif "тип 30" in name: radiator_type = 30
+            elif "тип 33" in name: radiator_type = 33
+            
+            # Извлекаем высоту и длину
+            parts = name.split('/')
+            height = int(parts[-2].replace('мм', '').strip())
+            length = int(parts[-1].replace('мм', '').strip().split()[0])
+            
+            return (connection_type, radiator_type, height, length)
+        
+        # Сортировка радиаторов
+        radiator_data_sorted = sorted(radiator_data, key=get_sort_key)
+        
+        # Объединение данных (отсортированные радиаторы + кронштейны)
+        combined_data = radiator_data_sorted + bracket_data
+        
+        # Заполняем Excel
+        for i, row in enumerate(combined_data, 2):  # Начинаем с 2 строки
+            # Для кронштейнов (они идут после радиаторов) заменяем 0 на пустую строку в столбце мощности
+            is_bracket = i - 2 >= len(radiator_data_sorted)
+            power_value = "" if is_bracket else row["Мощность, Вт"]
+            
+            ws.append([
+                i-1,  # №
+                str(row["Артикул"]),  # Артикул как строка
+                row["Наименование"],
+                power_value,
+                float(row['Цена, руб (с НДС)']),
+                float(row['Скидка, %']),
+                float(row['Цена со скидкой, руб (с НДС)']),
+                int(row['Кол-во']),
+                float(row['Сумма, руб (с НДС)'])
+            ])
+
+            # Форматируем строки данных
+            for col in range(1, len(headers) + 1):
+                cell = ws.cell(row=i, column=col)
+                cell.font = data_font
+                cell.border = thin_border
+                
+                # Устанавливаем числовые форматы
+                if col in [5, 7, 9]:  # Столбцы с ценами и суммами
+                    cell.number_format = money_style
+                    cell.alignment = alignment_center
+                elif col == 4:  # Столбец "Мощность, Вт" - центрируем
+                    cell.alignment = alignment_center
+                elif col in [1, 6, 8]:  # Другие числовые столбцы
+                    cell.alignment = alignment_center
+                else:
+                    cell.alignment = alignment_left
+
+        # Добавляем итоговую строку
+        total_row = len(combined_data) + 2
+        total_sum = spec_data["Сумма, руб (с НДС)"].sum()
+        quantities = [parse_quantity(qty) for qty in spec_data["Кол-во"].tolist()]
+        total_qty_radiators = sum(qty for qty, kind in zip(quantities, kinds) if kind == ROW_RADIATOR)
+        total_qty_brackets = sum(qty for qty, kind in zip(quantities, kinds) if kind == ROW_BRACKET)
+        
+        ws.append(["Итого", "", "", "", "", "", "", f"{total_qty_radiators}/{total_qty_brackets}", total_sum])
+        
+        # Форматируем итоговую строку
+        for col in range(1, len(headers) + 1):
+            cell = ws.cell(row=total_row, column=col)
+            cell.font = bold_font
+            cell.border = thin_border
+            cell.alignment = alignment_center
+            if col in [5, 7, 9]:  # Форматируем денежные столбцы
+                cell.number_format = money_style
+
+        # Добавляем вес и объем
+        total_weight, total_volume = self.spec_weight_volume(spec_data)
+        total_weight, total_volume = round(total_weight, 1), round(total_volume, 3)
+        
+        # Пустая строка
+        ws.append([])
+
+        # Строка с весом
+        ws.append([f"Суммарный вес радиаторов без учета упаковки и кронштейнов- {total_weight} кг."])
+        ws.merge_cells(start_row=total_row + 2, start_column=1, end_row=total_row + 2, end_column=9)
+        cell = ws.cell(row=total_row + 2, column=1)
+        cell.font = Font(name='Calibri', size=11)
+        cell.alignment = alignment_left
+
+        # Строка с объемом
+        ws.append([f"Суммарный объем радиаторов без учета упаковки и кронштейнов- {total_volume} м3."])
+        ws.merge_cells(start_row=total_row + 3, start_column=1, end_row=total_row + 3, end_column=9)
+        cell = ws.cell(row=total_row + 3, column=1)
+        cell.font = Font(name='Calibri', size=11)
+        cell.alignment = alignment_left
+
+        # Настраиваем ширину столбцов для основного листа
+        column_widths = {
+            'A': 5,    # №
+            'B': 12,   # Артикул
+            'C': 60,   # Наименование
+            'D': 15,   # Мощность
+            'E': 20,   # Цена
+            'F': 10,   # Скидка
+            'G': 30,   # Цена со скидкой
+            'H': 10,   # Кол-во
+            'I': 20    # Сумма
+        }
+
+        for col, width in column_widths.items():
+            ws.column_dimensions[col].width = width
+
+        # Добавляем лист с таблицей соответствия, если есть данные
+        if correspondence_data is not None and not correspondence_data.empty:
+            ws_corr = wb.create_sheet("Таблица соответствия")
+            
+            # Заголовки таблицы соответствия
+            corr_headers = list(correspondence_data.columns)
+            ws_corr.append(corr_headers)
+            
+            # Применяем стили к заголовкам
+            for col in range(1, len(corr_headers) + 1):
+                cell = ws_corr.cell(row=1, column=col)
+                cell.font = header_font
+                cell.alignment = alignment_center
+                cell.border = thin_border
+            
+            # Заполняем данные
+            for i, row in correspondence_data.iterrows():
+                ws_corr.append(list(row))
+                
+                # Форматируем строки данных
+                for col in range(1, len(corr_headers) + 1):
+                    cell = ws_corr.cell(row=i+2, column=col)
+                    cell.font = data_font
+                    cell.border = thin_border
+                    # Центрируем только столбец "Количество" (2-й столбец)
+                    if col == 2:
+                        cell.alignment = alignment_center
+                    else:
+                        cell.alignment = alignment_left
+            
+            # Автоподбор ширины столбцов для листа соответствия
+            for col_idx, column_name in enumerate(corr_headers, 1):
+                max_length = len(str(column_name))  # Начинаем с длины заголовка
+                column_letter = get_column_letter(col_idx)
+                
+                # Ищем максимальную длину содержимого в столбце
+                for row in ws_corr.iter_rows(min_col=col_idx, max_col=col_idx):
+                    for cell in row:
+                        try:
+                            cell_length = len(str(cell.value))
+                            if cell_length > max_length:
+                                max_length = cell_length
+                        except:
+                            pass
+                
+                # Устанавливаем ширину с небольшим запасом
+                adjusted_width = (max_length + 2) * 1.2
+                ws_corr.column_dimensions[column_letter].width = adjusted_width
+
+        # Сохраняем файл
+        wb.save(path)
+
+
+# Строка живой спецификации: радиатор, количество и подобранные к нему кронштейны
+SpecLine = namedtuple("SpecLine", ["product", "qty", "brackets"])
+
+
+class SpecModel:
+    """
+    Живая спецификация поверх QuantityModel. Каждое изменение ячейки обновляет
+    строку радиатора и текущие итоги (количество, мощность, вес, объем, суммы
+    в копейках, кронштейны по артикулам) за O(1). Таблица для предпросмотра
+    и выгрузки строится только по запросу (snapshot) и отдается из кэша до
+    следующего изменения; при вводе ячеек она не перестраивается.
+    Подписчики вызываются как listener(model) после каждого изменения итогов.
+
+    engine - RadiatorEngine (None, пока каталог не загружен), quantities - QuantityModel,
+    options - функция без аргументов, возвращающая текущие SpecOptions.
+    """
+
+    def __init__(self, engine, quantities, options):
+        self.engine = engine
+        self.quantities = quantities
+        self.options = options
+        self._listeners = []
+        self._frame = None
+        self._clear_totals()
+
+    def _clear_totals(self):
+        self.lines = {}
+        self.radiator_qty = 0
+        self.bracket_count = 0
+        self.power = 0.0
+        self.weight = 0.0
+        self.volume = 0.0
+        self.radiator_cents = 0
+        self.bracket_qty = {}
+        self.bracket_cents = 0
+        self._bracket_prices = {}  # артикул -> цена со скидкой в копейках
+
+    def subscribe(self, listener):
+        self._listeners.append(listener)
+
+    def _changed(self):
+        self._frame = None
+        for listener in self._listeners:
+            listener(self)
+
+    @staticmethod
+    def _cents(value):
+        """Сумма в копейках (NaN - неизвестная цена - считается нулем)"""
+        return 0 if value != value else int(round(value * 100))
+
+    def _line_cents(self, line):
+        price = line.product.price
+        discounted_price = round(price * (1 - self.options().radiator_discount / 100), 2)
+        return self._cents(round(discounted_price * line.qty, 2))
+
+    def _bracket_price_cents(self, item):
+        cents = self._bracket_prices.get(item.article)
+        if cents is None:
+            discount = self.options().bracket_discount
+            cents = self._bracket_prices[item.article] = self._cents(round(item.price * (1 - discount / 100), 2))
+        return cents
+
+    def _make_line(self, key, value):
+        if not value:
+            return None
+        product = self.engine.catalog.product_by_key(*key)
+        if product is None or product.height is None or product.length is None:
+            return None
+        brackets = ()
+        mount = self.options().mount
+        if mount != NO_BRACKETS:
+            items = self.engine.bracket_rules.resolve(key[0].split()[-1], product.height, product.length, mount)
+            brackets = tuple(item for item in items if item.price is not None)
+        return SpecLine(product, parse_quantity(value), brackets)
+
+    def _apply(self, line, sign):
+        """Добавляет (sign = 1) или вычитает (sign = -1) вклад строки в итоги"""
+        qty = sign * line.qty
+        product = line.product
+        self.radiator_qty += qty
+        if product.power == product.power:
+            self.power += product.power * qty
+        self.weight += product.weight * qty
+        self.volume += product.volume * qty
+        self.radiator_cents += sign * self._line_cents(line)
+        for item in line.brackets:
+            self.bracket_qty[item.article] = self.bracket_qty.get(item.article, 0) + item.qty * qty
+            self.bracket_count += item.qty * qty
+            self.bracket_cents += self._bracket_price_cents(item) * item.qty * qty
+
+    def on_quantity_changed(self, key, old_value, new_value):
+        """Подписчик QuantityModel: пересчитывает только измененную строку"""
+        if key is None:
+            self.rebuild()
+            return
+        line = self.lines.pop(key, None)
+        if line is not None:
+            self._apply(line, -1)
+            if not self.lines:
+                # Без строк итоги обнуляются точно, без накопленной погрешности float
+                self._clear_totals()
+        line = self._make_line(key, new_value)
+        if line is not None:
+            self.lines[key] = line
+            self._apply(line, 1)
+        self._changed()
+
+    def rebuild(self):
+        """Полный пересчет (сброс, смена каталога или типа монтажа)"""
+        self._clear_totals()
+        for key, value in self.quantities.items():
+            line = self._make_line(key, value)
+            if line is not None:
+                self.lines[key] = line
+                self._apply(line, 1)
+        self._changed()
+
+    def set_engine(self, engine):
+        """Подменяет расчетное ядро (новая версия каталога) и пересчитывает итоги"""
+        self.engine = engine
+        self.rebuild()
+
+    def refresh_prices(self):
+        """Пересчет сумм после изменения скидок: строки и количества не меняются"""
+        self._bracket_prices = {}
+        self.radiator_cents = sum(self._line_cents(line) for line in self.lines.values())
+        self.bracket_cents = sum(self._bracket_price_cents(item) * item.qty * line.qty
+                                 for line in self.lines.values() for item in line.brackets)
+        self._changed()
+
+    @property
+    def total(self):
+        """Сумма спецификации со скидками, руб"""
+        return (self.radiator_cents + self.bracket_cents) / 100
+
+    def snapshot(self):
+        """
+        Таблица спецификации (копия, ее можно изменять) или None, если позиций нет.
+        Строится заново только после изменений модели.
+        """
+        if self._frame is None:
+            options = self.options()
+            self._frame = self.engine.build_spec(self.quantities, options.radiator_discount,
+                                                 options.bracket_discount, options.mount)
+            if self._frame is None:
+                return None
+        return self._frame.copy()
+
+
+class SpecTable:
+    """
+    Спецификация окна предпросмотра в столбцах-массивах NumPy с запасом емкости.
+    Добавление строки - запись в конец массивов (амортизированно O(1)); удаление только
+    помечает строку, удаленные строки вычищаются, когда их становится больше, чем живых.
+    У каждой строки постоянный идентификатор row_id, не зависящий от номера "№".
+    Вид строки (ROW_RADIATOR, ROW_BRACKET) определяется один раз при добавлении,
+    итоги (количества как в строке "Итого", сумма, мощность, вес и объем) меняются
+    на разницу. DataFrame строится только для выгрузки (to_frame).
+    """
+    INITIAL_CAPACITY = 64
+
+    # Столбцы строки и их типы (мощность, вес и объем - на одно изделие)
+    DTYPES = {
+        "row_id": "int64", "kind": "int8", "alive": "bool",
+        "article": "object", "name": "object", "power": "float64",
+        "price": "float64", "discount": "float64", "discounted_price": "float64",
+        "qty": "int64", "line_sum": "float64", "weight": "float64", "volume": "float64",
+    }
+
+    # Столбцы SPEC_COLUMNS (кроме "№") -> столбцы таблицы
+    SPEC_FIELDS = {
+        "Артикул": "article", "Наименование": "name", "Мощность, Вт": "power",
+        "Цена, руб (с НДС)": "price", "Скидка, %": "discount",
+        "Цена со скидкой, руб (с НДС)": "discounted_price", "Кол-во": "qty",
+        "Сумма, руб (с НДС)": "line_sum",
+    }
+
+    def __init__(self, engine, capacity=INITIAL_CAPACITY):
+        import numpy as np
+
+        self.engine = engine
+        self._columns = {field: np.zeros(max(1, capacity), dtype=dtype) for field, dtype in self.DTYPES.items()}
+        self._size = 0  # Занятые строки массивов, включая удаленные
+        self._count = 0  # Живые строки
+        self._next_id = 0
+        self._positions = {}  # row_id -> строка массивов
+        self._order = None  # Строки массивов живых строк по порядку (кэш, если есть удаленные)
+        self.radiators = 0
+        self.brackets = 0
+        self.total = 0.0
+        self.power = 0.0
+        self.weight = 0.0
+        self.volume = 0.0
+
+    @classmethod
+    def from_frame(cls, engine, spec_data):
+        """Таблица по DataFrame спецификации (строка "Итого", если есть, пропускается)"""
+        import numpy as np
+
+        keep = np.asarray(_spec_rows(spec_data), dtype=bool)
+        count = int(keep.sum())
+        table = cls(engine, max(cls.INITIAL_CAPACITY, count))
+        if not count:
+            return table
+
+        c = table._columns
+        for column, field in cls.SPEC_FIELDS.items():
+            values = spec_data[column].tolist()
+            if field == "power":
+                values = [_unit_power(value) for value in values]
+            elif field == "qty":
+                values = [parse_quantity(value) for value in values]
+            c[field][:count] = np.asarray(values, dtype=cls.DTYPES[field])[keep]
+        c["kind"][:count] = [spec_row_kind(name) for name in c["name"][:count]]
+        for i in range(count):
+            if c["kind"][i] != ROW_BRACKET:
+                c["weight"][i], c["volume"][i] = engine.unit_weight_volume(c["article"][i])
+        c["row_id"][:count] = np.arange(count)
+        c["alive"][:count] = True
+        table._positions = dict(zip(range(count), range(count)))
+        table._size = table._count = table._next_id = count
+
+        for i in range(count):
+            table._apply(i, 1)
+        return table
+
+    def __len__(self):
+        return self._count
+
+    def _grow(self):
+        import numpy as np
+
+        for field, array in self._columns.items():
+            grown = np.zeros(len(array) * 2, dtype=array.dtype)
+            grown[:self._size] = array[:self._size]
+            self._columns[field] = grown
+
+    def _apply(self, position, sign):
+        """Добавляет (sign=1) или вычитает (sign=-1) строку position из итогов"""
+        c = self._columns
+        kind = c["kind"][position]
+        qty = int(c["qty"][position])
+        if kind == ROW_RADIATOR:
+            self.radiators += sign * qty
+        if kind == ROW_BRACKET:
+            self.brackets += sign * qty
+        else:
+            self.weight += sign * float(c["weight"][position]) * qty
+            self.volume += sign * float(c["volume"][position]) * qty
+        self.power += sign * max(float(c["power"][position]), 0.0) * qty
+        self.total += sign * float(c["line_sum"][position])
+
+    def _live_positions(self):
+        """Строки массивов живых строк по порядку"""
+        import numpy as np
+
+        if self._order is None:
+            self._order = np.flatnonzero(self._columns["alive"][:self._size])
+        return self._order
+
+    def _position(self, index):
+        if self._count == self._size:
+            return index
+        return int(self._live_positions()[index])
+
+    def row_id(self, index):
+        """Идентификатор строки с порядковым номером index (с 0, "№" = index + 1)"""
+        if not 0 <= index < self._count:
+            raise IndexError(index)
+        return int(self._columns["row_id"][self._position(index)])
+
+    def index_of(self, row_id):
+        """Порядковый номер строки row_id (с 0)"""
+        import numpy as np
+
+        position = self._positions[row_id]
+        if self._count == self._size:
+            return position
+        return int(np.searchsorted(self._live_positions(), position))
+
+    def append(self, art, name, power, price, discount, discounted_price, qty, line_sum, kind=None):
+        """Добавляет строку в конец таблицы. Возвращает ее row_id"""
+        if self._size == len(self._columns["row_id"]):
+            self._grow()
+        position = self._size
+        row_id = self._next_id
+        kind = spec_row_kind(name) if kind is None else kind
+        weight, volume = (0.0, 0.0) if kind == ROW_BRACKET else self.engine.unit_weight_volume(art)
+
+        c = self._columns
+        for field, value in (("row_id", row_id), ("kind", kind), ("alive", True), ("article", art),
+                             ("name", name), ("power", _unit_power(power)), ("price", price),
+                             ("discount", discount), ("discounted_price", discounted_price),
+                             ("qty", parse_quantity(qty)), ("line_sum", line_sum),
+                             ("weight", weight), ("volume", volume)):
+            c[field][position] = value
+        self._positions[row_id] = position
+        self._next_id += 1
+        self._size += 1
+        self._count += 1
+        self._order = None
+        self._apply(position, 1)
+        return row_id
+
+    def set_qty(self, row_id, qty):
+        """Меняет количество строки row_id и пересчитывает ее сумму. Возвращает новую сумму"""
+        position = self._positions[row_id]
+        c = self._columns
+        self._apply(position, -1)
+        c["qty"][position] = qty
+        c["line_sum"][position] = float(c["discounted_price"][position]) * float(qty)
+        self._apply(position, 1)
+        return float(c["line_sum"][position])
+
+    def remove(self, row_id):
+        """Удаляет строку row_id (следующие строки получают номера на единицу меньше)"""
+        position = self._positions.pop(row_id)
+        self._apply(position, -1)
+        self._columns["alive"][position] = False
+        self._count -= 1
+        self._order = None
+        if self._size - self._count > max(self._count, self.INITIAL_CAPACITY):
+            self._compact()
+
+    def _compact(self):
+        """Вычищает удаленные строки из массивов"""
+        keep = self._live_positions()
+        for field, array in self._columns.items():
+            array[:self._count] = array[keep]
+        self._size = self._count
+        self._order = None
+        self._positions = dict(zip(self._columns["row_id"][:self._count].tolist(), range(self._count)))
+
+    def rows(self, start, stop):
+        """
+        Строки с порядковыми номерами start..stop-1: кортежи значений в порядке
+        SPEC_COLUMNS и вид строки последним элементом
+        """
+        stop = min(stop, self._count)
+        if start >= stop:
+            return []
+        if self._count == self._size:
+            positions = slice(start, stop)
+        else:
+            positions = self._live_positions()[start:stop]
+        c = self._columns
+        return list(zip(
+            range(start + 1, stop + 1),
+            *(c[field][positions].tolist() for field in self.SPEC_FIELDS.values()),
+            c["kind"][positions].tolist(),
+        ))
+
+    def column(self, name):
+        """Значения столбца SPEC_COLUMNS по порядку строк (списком)"""
+        if name == "№":
+            return list(range(1, self._count + 1))
+        values = self._columns[self.SPEC_FIELDS[name]][:self._size]
+        if self._count != self._size:
+            values = values[self._live_positions()]
+        return values.tolist()
+
+    def to_frame(self):
+        """DataFrame со столбцами SPEC_COLUMNS (для выгрузки в Excel и CSV)"""
+        import pandas as pd
+
+        columns = self.engine.SPEC_COLUMNS
+        return pd.DataFrame({name: self.column(name) for name in columns}, columns=columns)
@@ -0,0 +1,218 @@
+"""
+Локальный HTTP-сервер расчета стоимости на ядре RadiaTool (для интернет-магазина и CRM).
+
+Каталог и индексы загружаются один раз и хранятся в памяти; запросы обрабатываются
+параллельно в отдельных потоках (ThreadingHTTPServer), расчетное ядро только читает каталог.
+
+Методы:
+    GET  /health      - состояние сервера и каталога
+    POST /quote       - спецификация с ценами и итогами в JSON
+    POST /quote.xlsx  - та же спецификация книгой Excel "Расчёт стоимости" (потоком)
+
+Тело запроса POST (JSON):
+    {
+        "items": [{"article": "7724651304", "qty": 2}, {"article": "7724652309", "qty": "3+1"}],
+        "radiator_discount": 12.5,
+        "bracket_discount": 5,
+        "mount": "wall"
+    }
+qty: положительное целое число или строка-сумма вида "3+1"; иначе ответ 400.
+mount: "wall", "floor", "none" или название из программы ("Настенные кронштейны" и т.д.).
+
+Запуск:
+    python radiatool_server.py [--host 127.0.0.1] [--port 8765] [--catalog Матрица.xlsx]
+"""
+import argparse
+import json
+import re
+import sys
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote
+
+from radiatool_engine import (
+    APP_VERSION, MOUNT_MODES, CatalogCache, ForeignNameParser, RadiatorEngine, SpecOptions,
+    default_catalog_path, load_settings,
+)
+
+# Ограничение размера тела запроса, байт
+MAX_BODY_SIZE = 10 * 1024 * 1024
+
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+XLSX_FILE_NAME = "Расчёт стоимости.xlsx"
+
+# Количество в строке: целое число или сумма целых ("3+1")
+QUANTITY_PATTERN = re.compile(r"\d+(?:\s*\+\s*\d+)*")
+
+
+def parse_item_quantity(article, qty):
+    """
+    Проверяет количество позиции: положительное целое число JSON или строка
+    вида "3" / "3+1" из неотрицательных целых с положительной суммой.
+    Возвращает количество строкой; при ошибке вызывает ValueError.
+    """
+    if isinstance(qty, int) and not isinstance(qty, bool):
+        total = qty
+    elif isinstance(qty, str) and QUANTITY_PATTERN.fullmatch(qty.strip()):
+        total = sum(int(part) for part in qty.split("+"))
+    else:
+        total = 0
+    if total <= 0:
+        raise ValueError(f"Некорректное количество для артикула {article}: {json.dumps(qty, ensure_ascii=False)}")
+    return str(total)
+
+
+def parse_quote_request(payload):
+    """
+    Проверяет тело запроса расчета.
+    Возвращает (список пар (артикул, количество), SpecOptions); при ошибке вызывает ValueError.
+    """
+    if not isinstance(payload, dict):
+        raise ValueError("Ожидается объект JSON")
+
+    items = payload.get("items")
+    if not isinstance(items, list) or not items:
+        raise ValueError("Поле items должно быть непустым списком позиций")
+    pairs = []
+    for item in items:
+        if not isinstance(item, dict) or "article" not in item or "qty" not in item:
+            raise ValueError("Каждая позиция должна содержать article и qty")
+        article = str(item["article"])
+        pairs.append((article, parse_item_quantity(article, item["qty"])))
+
+    discounts = []
+    for name in ("radiator_discount", "bracket_discount"):
+        try:
+            value = float(payload.get(name) or 0.0)
+        except (TypeError, ValueError):
+            raise ValueError(f"Некорректное значение {name}")
+        if not 0 <= value <= 100:
+            raise ValueError(f"Значение {name} должно быть от 0 до 100")
+        discounts.append(value)
+
+    mount = payload.get("mount", "wall")
+    mount = MOUNT_MODES.get(mount, mount) if isinstance(mount, str) else None
+    if mount not in MOUNT_MODES.values():
+        raise ValueError(f"Неизвестный тип монтажа: {payload.get('mount')}")
+    return pairs, SpecOptions(discounts[0], discounts[1], mount)
+
+
+class QuoteHandler(BaseHTTPRequestHandler):
+    """Обработчик запросов расчета; расчетное ядро берется из self.server.engine"""
+    server_version = f"RadiaTool/{APP_VERSION}"
+
+    def do_GET(self):
+        if self.path != "/health":
+            self.send_json({"error": "Не найдено"}, HTTPStatus.NOT_FOUND)
+            return
+        catalog = self.server.engine.catalog
+        self.send_json({"status": "ok", "version": APP_VERSION,
+                        "sheets": len(catalog), "loaded": catalog.is_loaded})
+
+    def do_POST(self):
+        if self.path not in ("/quote", "/quote.xlsx"):
+            self.send_json({"error": "Не найдено"}, HTTPStatus.NOT_FOUND)
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            if length > MAX_BODY_SIZE:
+                self.send_json({"error": "Слишком большой запрос"}, HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+                return
+            pairs, options = parse_quote_request(json.loads(self.rfile.read(length) or b"null"))
+        except ValueError as e:
+            # json.JSONDecodeError - тоже ValueError
+            self.send_json({"error": str(e)}, HTTPStatus.BAD_REQUEST)
+            return
+
+        engine = self.server.engine
+        try:
+            quantities, unmatched = engine.quantities_by_article(pairs)
+            spec_data = engine.build_spec(quantities, *options)
+        except Exception as e:
+            print(f"Ошибка расчета: {e}")
+            self.send_json({"error": f"Ошибка расчета: {e}"}, HTTPStatus.INTERNAL_SERVER_ERROR)
+            return
+
+        if self.path == "/quote.xlsx":
+            if spec_data is None:
+                self.send_json({"error": "Нет позиций для спецификации", "unmatched": unmatched},
+                               HTTPStatus.UNPROCESSABLE_ENTITY)
+                return
+            self.send_xlsx(spec_data)
+            return
+
+        if spec_data is None:
+            self.send_json({"spec": [], "totals": None, "unmatched": unmatched})
+            return
+        self.send_json({
+            "spec": spec_data.to_dict("records"),
+            "totals": engine.spec_totals(spec_data)._asdict(),
+            "unmatched": unmatched,
+        })
+
+    def send_json(self, data, status=HTTPStatus.OK):
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_xlsx(self, spec_data):
+        """Пишет книгу прямо в сокет; конец ответа - закрытие соединения (HTTP/1.0)"""
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", XLSX_CONTENT_TYPE)
+        self.send_header("Content-Disposition", f"attachment; filename*=UTF-8''{quote(XLSX_FILE_NAME)}")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.server.engine.save_excel(spec_data, self.wfile)
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+class QuoteServer(ThreadingHTTPServer):
+    """HTTP-сервер с общим расчетным ядром"""
+    daemon_threads = True
+    # Очередь входящих соединений для пиковой нагрузки (по умолчанию в socketserver - 5)
+    request_queue_size = 128
+
+    def __init__(self, address, engine, quiet=False):
+        self.engine = engine
+        self.quiet = quiet
+        super().__init__(address, QuoteHandler)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1", help="адрес (по умолчанию только локальный)")
+    parser.add_argument("--port", type=int, default=8765, help="порт")
+    parser.add_argument("--catalog", default=None, help="файл каталога (по умолчанию - из настроек)")
+    parser.add_argument("--quiet", action="store_true", help="не выводить журнал запросов")
+    args = parser.parse_args(argv)
+
+    settings = load_settings()
+    catalog_path = args.catalog or default_catalog_path(settings)
+    start = time.perf_counter()
+    engine = RadiatorEngine.from_file(catalog_path, reader=settings["catalog_reader"], cache=CatalogCache())
+    engine.name_parser = ForeignNameParser.from_settings(settings)
+    # Импортируем заранее, чтобы первый запрос не ждал загрузки библиотек
+    import pandas  # noqa: F401
+    import openpyxl  # noqa: F401
+    print(f"Каталог загружен за {time.perf_counter() - start:.2f} с: {catalog_path}")
+
+    server = QuoteServer((args.host, args.port), engine, quiet=args.quiet)
+    print(f"RadiaTool {APP_VERSION}: сервер расчета на http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,31 +1,640 @@
-import pandas as pd
-import pyperclip
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, Border, Side
-import pyperclip
 import os
 import sys
 import webbrowser
 import tempfile
 import subprocess
 import platform
-import re
 import traceback
+import threading
+import queue
+
+from radiatool_engine import (
+    APP_VERSION, NO_BRACKETS, CatalogCache, CatalogWatcher, ForeignNameParser, QuantityModel,
+    RadiatorEngine, SpecModel, SpecOptions, diff_catalogs, excel_engine, load_settings, parse_quantity,
+    ROW_BRACKET, SpecTable, read_article_spec, read_csv_spec, read_foreign_spec, spec_power,
+)
+
+
+class CanvasMatrixView:
+    """
+    Матрица радиаторов, нарисованная на одном tk.Canvas.
+    Рисуются только видимые ячейки, для ввода используется одно плавающее поле Entry,
+    которое переносится в выбранную ячейку. Оси матрицы берутся из размеров товаров листа.
+    """
+    CELL_WIDTH = 64
+    CELL_HEIGHT = 24
+    HEADER_WIDTH = 56
+    HEADER_HEIGHT = 24
+    MAX_WIDTH = 900
+    MAX_HEIGHT = 560
+    FILLED_COLOR = '#e6f3ff'
+    EMPTY_COLOR = 'white'
+
+    def __init__(self, app, parent):
+        self.app = app
+        self.sheet_name = None
+        self.heights = []
+        self.lengths = []
+        self.products = {}  # (высота, длина) -> Product
+        self._order = {}  # (высота, длина) -> номер ячейки при обходе по строкам (Tab)
+        self._cells = []  # Ячейки с товарами в порядке обхода
+        self._editing = None  # Ячейка (высота, длина), в которой открыт редактор
+        self._editor_window = None
+        self._hover = None
+        self._redraw_pending = False
+        self._size = None
+
+        self.frame = ttk.Frame(parent)
+        self.canvas = tk.Canvas(self.frame, highlightthickness=0, background='white')
+        vbar = ttk.Scrollbar(self.frame, orient="vertical", command=self._yview)
+        hbar = ttk.Scrollbar(self.frame, orient="horizontal", command=self._xview)
+        self.canvas.configure(yscrollcommand=vbar.set, xscrollcommand=hbar.set)
+        self.canvas.grid(row=0, column=0, sticky="nsew")
+        vbar.grid(row=0, column=1, sticky="ns")
+        hbar.grid(row=1, column=0, sticky="ew")
+        self.frame.rowconfigure(0, weight=1)
+        self.frame.columnconfigure(0, weight=1)
+
+        # Единственное поле ввода, которое переносится в выбранную ячейку
+        self.editor = tk.Entry(
+            self.canvas,
+            width=8,
+            justify="center",
+            relief='solid',
+            borderwidth=1,
+            validate='key',
+            validatecommand=app.cell_validate_command()
+        )
+        self.editor.bind("<FocusIn>", lambda e: self.app.on_entry_focus_in(e))
+        self.editor.bind("<FocusOut>", self._on_focus_out)
+        self.editor.bind("<Return>", self._commit_edit)
+        # Tab / Shift-Tab переходят к соседней ячейке, как в матрице из полей ввода
+        self.editor.bind("<Tab>", lambda e: self._move_edit(1))
+        self.editor.bind("<<PrevWindow>>", lambda e: self._move_edit(-1))
+        self.editor.bind("<Escape>", lambda e: self.end_edit())
+
+        self.canvas.bind("<Button-1>", self._on_click)
+        self.canvas.bind("<Motion>", self._on_motion)
+        self.canvas.bind("<Leave>", self._on_leave)
+        self.canvas.bind("<Configure>", lambda e: self.schedule_redraw())
+        self.canvas.bind("<MouseWheel>", lambda e: self._yview("scroll", -1 if e.delta > 0 else 1, "units"))
+        self.canvas.bind("<Button-4>", lambda e: self._yview("scroll", -1, "units"))
+        self.canvas.bind("<Button-5>", lambda e: self._yview("scroll", 1, "units"))
+
+    def show(self, sheet_name):
+        """
+        Привязывает матрицу к листу каталога и перерисовывает видимую часть.
+        Возвращает True, если изменился размер Canvas.
+        """
+        self.end_edit()
+        catalog = self.app.catalog
+        table = catalog[sheet_name]
+        self.sheet_name = sheet_name
+        self.heights = sorted(set(h for h in table.height.tolist() if h))
+        self.lengths = sorted(set(length for length in table.length.tolist() if length))
+
+        self.products = {}
+        for height in self.heights:
+            for length in self.lengths:
+                product = catalog.product_by_size(sheet_name, height, length)
+                if product is not None:
+                    self.products[(height, length)] = product
+        # Порядок обхода - по строкам (длинам), внутри строки - по высотам
+        self._cells = sorted(self.products, key=lambda pos: (pos[1], pos[0]))
+        self._order = {pos: i for i, pos in enumerate(self._cells)}
+
+        width = self.HEADER_WIDTH + self.CELL_WIDTH * len(self.heights)
+        height = self.HEADER_HEIGHT + self.CELL_HEIGHT * len(self.lengths)
+        size = (min(width, self.MAX_WIDTH), min(height, self.MAX_HEIGHT))
+        resized = size != self._size
+        self._size = size
+        self.canvas.configure(scrollregion=(0, 0, width, height), width=size[0], height=size[1])
+        self.canvas.xview_moveto(0)
+        self.canvas.yview_moveto(0)
+        self.redraw()
+        return resized
+
+    def _xview(self, *args):
+        self.canvas.xview(*args)
+        self.schedule_redraw()
+
+    def _yview(self, *args):
+        self.canvas.yview(*args)
+        self.schedule_redraw()
+
+    def schedule_redraw(self):
+        """Объединяет несколько запросов перерисовки в одну"""
+        if not self._redraw_pending:
+            self._redraw_pending = True
+            self.app.root.after_idle(self.redraw)
+
+    def visible_range(self):
+        """Диапазоны индексов видимых строк (длины) и столбцов (высоты)"""
+        x0 = self.canvas.canvasx(0)
+        y0 = self.canvas.canvasy(0)
+        x1 = self.canvas.canvasx(max(self.canvas.winfo_width(), int(self.canvas.cget("width"))))
+        y1 = self.canvas.canvasy(max(self.canvas.winfo_height(), int(self.canvas.cget("height"))))
+        cols = range(max(0, int((x0 - self.HEADER_WIDTH) // self.CELL_WIDTH)),
+                     min(len(self.heights), int((x1 - self.HEADER_WIDTH) // self.CELL_WIDTH) + 1))
+        rows = range(max(0, int((y0 - self.HEADER_HEIGHT) // self.CELL_HEIGHT)),
+                     min(len(self.lengths), int((y1 - self.HEADER_HEIGHT) // self.CELL_HEIGHT) + 1))
+        return rows, cols
+
+    def redraw(self):
+        """Перерисовывает заголовки и ячейки видимой области"""
+        self._redraw_pending = False
+        canvas = self.canvas
+        canvas.delete("cell")
+        if self.sheet_name is None:
+            return
+
+        rows, cols = self.visible_range()
+        values = self.app.entry_values
+        fill = self.FILLED_COLOR if self.app.has_any_value() else self.EMPTY_COLOR
+
+        for j in cols:
+            x = self.HEADER_WIDTH + j * self.CELL_WIDTH
+            canvas.create_text(x + self.CELL_WIDTH / 2, self.HEADER_HEIGHT / 2,
+                               text=str(self.heights[j]), tags="cell")
+        for i in rows:
+            y = self.HEADER_HEIGHT + i * self.CELL_HEIGHT
+            length = self.lengths[i]
+            canvas.create_text(self.HEADER_WIDTH / 2, y + self.CELL_HEIGHT / 2, text=str(length), tags="cell")
+            for j in cols:
+                product = self.products.get((self.heights[j], length))
+                if product is None:
+                    continue  # Ячейка без товара не отображается
+                x = self.HEADER_WIDTH + j * self.CELL_WIDTH
+                canvas.create_rectangle(x + 1, y + 1, x + self.CELL_WIDTH - 1, y + self.CELL_HEIGHT - 1,
+                                        fill=fill, outline='black', tags="cell")
+                value = values.get((self.sheet_name, product.article), "")
+                if value:
+                    canvas.create_text(x + self.CELL_WIDTH / 2, y + self.CELL_HEIGHT / 2,
+                                       text=value, width=self.CELL_WIDTH - 4, tags="cell")
+        canvas.tag_raise("editor")
+
+    def cell_at(self, x, y):
+        """Ячейка (высота, длина) под точкой окна Canvas или None"""
+        cx = self.canvas.canvasx(x) - self.HEADER_WIDTH
+        cy = self.canvas.canvasy(y) - self.HEADER_HEIGHT
+        if cx < 0 or cy < 0:
+            return None
+        j, i = int(cx // self.CELL_WIDTH), int(cy // self.CELL_HEIGHT)
+        if j >= len(self.heights) or i >= len(self.lengths):
+            return None
+        return self.heights[j], self.lengths[i]
+
+    def _on_click(self, event):
+        pos = self.cell_at(event.x, event.y)
+        if pos in self.products:
+            self.begin_edit(pos)
+
+    def cell_origin(self, pos):
+        """Левый верхний угол ячейки pos в координатах Canvas"""
+        height, length = pos
+        return (self.HEADER_WIDTH + self.heights.index(height) * self.CELL_WIDTH,
+                self.HEADER_HEIGHT + self.lengths.index(length) * self.CELL_HEIGHT)
+
+    def see(self, pos):
+        """Прокручивает Canvas так, чтобы ячейка pos была видна целиком"""
+        x, y = self.cell_origin(pos)
+        width = self.HEADER_WIDTH + self.CELL_WIDTH * len(self.heights)
+        height = self.HEADER_HEIGHT + self.CELL_HEIGHT * len(self.lengths)
+        x0, y0 = self.canvas.canvasx(0), self.canvas.canvasy(0)
+        view_width, view_height = self.canvas.winfo_width(), self.canvas.winfo_height()
+        if x < x0:
+            self._xview("moveto", x / width)
+        elif x + self.CELL_WIDTH > x0 + view_width:
+            self._xview("moveto", (x + self.CELL_WIDTH - view_width) / width)
+        if y < y0:
+            self._yview("moveto", y / height)
+        elif y + self.CELL_HEIGHT > y0 + view_height:
+            self._yview("moveto", (y + self.CELL_HEIGHT - view_height) / height)
+
+    def begin_edit(self, pos):
+        """Открывает редактор в ячейке pos; значение ранее открытой ячейки сохраняется"""
+        # Щелчок по Canvas не забирает фокус у редактора, поэтому FocusOut не придет
+        self._save_edit()
+        product = self.products[pos]
+        x, y = self.cell_origin(pos)
+
+        # Ключ ячейки меняется до подстановки нового значения
+        self.app.entries.clear()
+        self._editing = pos
+        self.editor.delete(0, tk.END)
+        self.editor.insert(0, self.app.entry_values.get((self.sheet_name, product.article), ""))
+        self.editor.config(bg=self.FILLED_COLOR if self.app.has_any_value() else self.EMPTY_COLOR)
+        if self._editor_window is None:
+            self._editor_window = self.canvas.create_window(
+                x, y, window=self.editor, anchor="nw",
+                width=self.CELL_WIDTH, height=self.CELL_HEIGHT, tags="editor"
+            )
+        else:
+            # Перенос без удаления окна: поле не скрывается и не теряет фокус
+            self.canvas.coords(self._editor_window, x, y)
+        # Пока редактор открыт, он считается ячейкой текущего листа
+        self.app.entries[(self.sheet_name, product.article)] = self.editor
+        self.editor.focus_set()
+        self.schedule_redraw()
+
+    def _save_edit(self):
+        """Сохраняет значение редактора в открытую ячейку (если она есть)"""
+        product = self.products.get(self._editing)
+        if product is not None:
+            self.app.save_value(self.sheet_name, product.article)
+
+    def _commit_edit(self, event=None):
+        """Сохраняет значение открытой ячейки и закрывает редактор"""
+        if self._editing is None:
+            return
+        self._save_edit()
+        self.end_edit()
+
+    def _on_focus_out(self, event):
+        # Запоздавшее событие, пока фокус остается в редакторе, ячейку не закрывает
+        if self.editor.focus_get() is self.editor:
+            return
+        self._commit_edit(event)
+
+    def _move_edit(self, step):
+        """
+        Tab / Shift-Tab: сохраняет значение и открывает следующую (предыдущую) ячейку.
+        За последней (перед первой) ячейкой фокус переходит к другим элементам окна.
+        """
+        if self._editing is None:
+            return None
+        index = self._order[self._editing] + step
+        if not 0 <= index < len(self._cells):
+            self._commit_edit()
+            return None
+        pos = self._cells[index]
+        self.see(pos)
+        self.begin_edit(pos)
+        return "break"
+
+    def end_edit(self):
+        """Закрывает редактор без сохранения"""
+        if self._editor_window is not None:
+            self.canvas.delete(self._editor_window)
+            self._editor_window = None
+        self._editing = None
+        self.app.entries.clear()
+        self.schedule_redraw()
+
+    def _on_motion(self, event):
+        pos = self.cell_at(event.x, event.y)
+        if pos == self._hover:
+            return
+        self._hover = pos
+        product = self.products.get(pos)
+        if product is not None:
+            self.app.show_tooltip_on_hover(product)
+        else:
+            self.app.hide_tooltip_on_leave()
+
+    def _on_leave(self, event):
+        self._hover = None
+        self.app.hide_tooltip_on_leave()
+
+
+class VirtualTreeview:
+    """
+    ttk.Treeview с виртуальной прокруткой для длинных таблиц.
+    В Treeview всегда столько строк, сколько помещается в окне (плюс небольшой запас);
+    при прокрутке эти же строки заполняются значениями других строк таблицы.
+    Значения берутся из функции rows(start, stop) -> [(values, tags), ...] и
+    форматируются только для показанных строк. Индекс строки таблицы для строки
+    Treeview возвращает row_of(item), выделение хранится по индексам строк таблицы.
+    """
+    BUFFER_ROWS = 3
+    WHEEL_ROWS = 3
+
+    def __init__(self, parent, columns, row_count, rows, **tree_options):
+        self.row_count = row_count
+        self.rows = rows
+        self.first = 0  # Индекс строки таблицы в верхней строке Treeview
+        self.selected = set()  # Индексы выделенных строк таблицы
+        self._items = []  # Строки Treeview (iid - номер строки окна)
+        self._shown = 0  # Сколько строк Treeview сейчас показано
+        self._applied = ()  # Выделение, установленное при последней отрисовке
+        self.before_scroll = None  # Вызывается перед сменой показанных строк
+
+        self.frame = ttk.Frame(parent)
+        self.tree = ttk.Treeview(self.frame, columns=columns, **tree_options)
+        self.vbar = ttk.Scrollbar(self.frame, orient="vertical", command=self.yview)
+        hbar = ttk.Scrollbar(self.frame, orient="horizontal", command=self.tree.xview)
+        # Собственная прокрутка Treeview (клавиши, tree.see) переводится в смену строк
+        self.tree.configure(yscrollcommand=self._on_tree_scroll, xscrollcommand=hbar.set)
+        self.tree.grid(row=0, column=0, sticky="nsew")
+        self.vbar.grid(row=0, column=1, sticky="ns")
+        hbar.grid(row=1, column=0, sticky="ew")
+        self.frame.rowconfigure(0, weight=1)
+        self.frame.columnconfigure(0, weight=1)
+
+        self.tree.bind("<Configure>", lambda e: self.refresh())
+        self.tree.bind("<<TreeviewSelect>>", self._on_select)
+        self.tree.bind("<MouseWheel>", lambda e: self.scroll(-self.WHEEL_ROWS if e.delta > 0 else self.WHEEL_ROWS))
+        self.tree.bind("<Button-4>", lambda e: self.scroll(-self.WHEEL_ROWS))
+        self.tree.bind("<Button-5>", lambda e: self.scroll(self.WHEEL_ROWS))
+        self.tree.bind("<Up>", self._on_key_up)
+        self.tree.bind("<Prior>", lambda e: self.yview("scroll", -1, "pages"))
+        self.tree.bind("<Next>", lambda e: self.yview("scroll", 1, "pages"))
+
+    def page_size(self):
+        """Количество строк, помещающихся в окне Treeview"""
+        height = self.tree.winfo_height()
+        if self._items and height > 1:
+            bbox = self.tree.bbox(self._items[0])
+            if bbox:
+                # bbox первой строки: y - высота заголовка, bbox[3] - высота строки
+                return max(1, (height - bbox[1]) // bbox[3])
+        return int(self.tree.cget("height"))
+
+    def row_of(self, item):
+        """Индекс строки таблицы, показанной в строке Treeview item"""
+        return self.first + int(item)
+
+    def item_of(self, index):
+        """Строка Treeview, в которой показана строка таблицы index, или None"""
+        slot = index - self.first
+        return self._items[slot] if 0 <= slot < self._shown else None
+
+    def refresh(self):
+        """Перерисовывает показанные строки (после изменения данных или размера окна)"""
+        page = self.page_size()
+        total = self.row_count()
+        self.first = max(0, min(self.first, total - page))
+        count = min(page + self.BUFFER_ROWS, total - self.first)
+
+        tree = self.tree
+        while len(self._items) < count:
+            self._items.append(tree.insert("", "end", iid=str(len(self._items))))
+        for item in self._items[count:self._shown]:
+            tree.detach(item)
+        for slot, (values, tags) in enumerate(self.rows(self.first, self.first + count)):
+            item = self._items[slot]
+            if slot >= self._shown:
+                tree.move(item, "", slot)
+            tree.item(item, values=values, tags=tags)
+        self._shown = count
+
+        self._applied = tuple(self._items[index - self.first] for index in sorted(self.selected)
+                              if 0 <= index - self.first < count)
+        tree.selection_set(self._applied)
+        tree.yview_moveto(0)
+        if total:
+            self.vbar.set(self.first / total, min(1.0, (self.first + page) / total))
+        else:
+            self.vbar.set(0, 1)
+
+    def refresh_row(self, index):
+        """Перерисовывает одну строку таблицы, если она показана"""
+        item = self.item_of(index)
+        if item is not None:
+            (values, tags), = self.rows(index, index + 1)
+            self.tree.item(item, values=values, tags=tags)
+
+    def scroll_to(self, first):
+        """Показывает строки таблицы начиная с first"""
+        first = max(0, min(first, self.row_count() - self.page_size()))
+        if first != self.first:
+            if self.before_scroll is not None:
+                self.before_scroll()
+            self.first = first
+            self.refresh()
+        return "break"
+
+    def scroll(self, rows):
+        return self.scroll_to(self.first + rows)
+
+    def yview(self, *args):
+        """Команда полосы прокрутки: ("moveto", доля) или ("scroll", n, "units"/"pages")"""
+        if args[0] == "moveto":
+            return self.scroll_to(round(float(args[1]) * self.row_count()))
+        step = int(args[1])
+        return self.scroll(step * self.page_size() if args[2] == "pages" else step)
+
+    def set_selection(self, indexes):
+        self.selected = set(indexes)
+        self.refresh()
+
+    def _on_select(self, event):
+        selection = self.tree.selection()
+        if selection != self._applied:
+            # Выделение изменил пользователь
+            self._applied = selection
+            self.selected = {self.row_of(item) for item in selection}
+
+    def _on_tree_scroll(self, first, last):
+        # Treeview сам прокрутился к строке запаса (например, клавишей Down):
+        # возвращаем его в начало и сдвигаем строки таблицы
+        if float(first) > 0 and self._shown:
+            focus = self.tree.focus()
+            focus_row = self.row_of(focus) if focus else None
+            self.tree.yview_moveto(0)
+            self.scroll(round(float(first) * self._shown))
+            if focus_row is not None:
+                self._focus_row(focus_row)
+
+    def _on_key_up(self, event):
+        focus = self.tree.focus()
+        if focus and int(focus) == 0 and self.first > 0:
+            self.scroll(-1)
+            self._focus_row(self.first)
+            return "break"
+
+    def _focus_row(self, index):
+        item = self.item_of(index)
+        if item is not None:
+            self.tree.focus(item)
+            self.tree.selection_set(item)
+
+
+class TooltipPool:
+    """
+    Подсказки при наведении на переиспользуемых окнах Toplevel.
+    Показ откладывается на delay мс, поэтому при быстром проходе курсора
+    по матрице окна не создаются. Картинки загружаются при первом показе и кэшируются.
+    """
+    BACKGROUND = "#ffffe0"
+
+    def __init__(self, root, delay=300):
+        self.root = root
+        self.delay = delay
+        self._free = []  # Скрытые окна, готовые к повторному использованию
+        self._shown = {}  # владелец -> окно
+        self._pending = {}  # владелец -> (ключ, id задачи after)
+        self._keys = {}  # владелец -> ключ показанной подсказки
+        self._images = {}
+        self.created = 0
+
+    def _acquire(self):
+        if self._free:
+            return self._free.pop()
+        window = tk.Toplevel(self.root)
+        window.wm_overrideredirect(True)
+        window.withdraw()
+        label = ttk.Label(window, background=self.BACKGROUND, relief="solid", padding=5, font=("Segoe UI", 9))
+        label.pack()
+        window.label = label
+        self.created += 1
+        return window
+
+    def image(self, path):
+        """PhotoImage из файла (None, если файла нет); декодируется один раз"""
+        if path not in self._images:
+            image = None
+            if os.path.exists(path):
+                try:
+                    image = tk.PhotoImage(file=path)
+                except tk.TclError as e:
+                    print(f"Ошибка загрузки изображения для подсказки: {e}")
+            else:
+                print(f"Файл изображения не найден: {path}")
+            self._images[path] = image
+        return self._images[path]
+
+    def show(self, owner, key, position, text="", image_path=None, delay=None):
+        """
+        Показывает подсказку владельца owner через delay мс.
+        key определяет содержимое: повторный вызов с тем же ключом ничего не делает.
+        position(window) возвращает экранные координаты (x, y) в момент показа.
+        """
+        pending = self._pending.get(owner)
+        if pending is not None and pending[0] == key:
+            return
+        if pending is None and self._keys.get(owner) == key and owner in self._shown:
+            return
+        self.hide(owner)
+        after_id = self.root.after(self.delay if delay is None else delay,
+                                   lambda: self._show_now(owner, key, position, text, image_path))
+        self._pending[owner] = (key, after_id)
+
+    def _show_now(self, owner, key, position, text, image_path):
+        self._pending.pop(owner, None)
+        image = self.image(image_path) if image_path else None
+        if image_path and image is None:
+            return
+        window = self._acquire()
+        if image is not None:
+            window.label.config(image=image, text="", padding=0)
+        else:
+            window.label.config(image="", text=text, padding=5)
+        x, y = position(window)
+        window.wm_geometry(f"+{x}+{y}")
+        window.deiconify()
+        window.lift()
+        self._shown[owner] = window
+        self._keys[owner] = key
+
+    def hide(self, owner):
+        """Отменяет отложенный показ и скрывает подсказку владельца"""
+        pending = self._pending.pop(owner, None)
+        if pending is not None:
+            self.root.after_cancel(pending[1])
+        self._keys.pop(owner, None)
+        window = self._shown.pop(owner, None)
+        if window is not None:
+            try:
+                window.withdraw()
+                self._free.append(window)
+            except tk.TclError:
+                pass
+
+    def hide_all(self):
+        for owner in list(self._shown) + list(self._pending):
+            self.hide(owner)
+
+
+class LayoutScheduler:
+    """
+    Откладывает пересчет геометрии окна до простоя цикла событий Tk (after_idle).
+    Повторные запросы с одним именем в пределах одного оборота цикла объединяются,
+    измеренные размеры виджетов кэшируются до вызова invalidate().
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self._tasks = {}  # имя задачи -> функция, в порядке первого запроса
+        self._pending = None
+        self._synced = False
+        self._sizes = {}
+        # Счетчики для диагностики
+        self.requested = 0
+        self.executed = 0
+        self.measured = 0
+        self.cache_hits = 0
+
+    def request(self, name, func):
+        """Ставит задачу в очередь; повторный запрос до выполнения только заменяет функцию"""
+        self.requested += 1
+        self._tasks[name] = func
+        if self._pending is None:
+            self._pending = self.root.after_idle(self._run)
+
+    def _run(self):
+        self._pending = None
+        self._synced = False
+        tasks, self._tasks = self._tasks, {}
+        for func in tasks.values():
+            self.executed += 1
+            func()
+
+    def flush(self):
+        """Немедленно выполняет отложенные задачи"""
+        if self._pending is not None:
+            self.root.after_cancel(self._pending)
+            self._run()
+
+    def measure(self, widget):
+        """Запрошенные размеры виджета (ширина, высота) с кэшированием"""
+        key = str(widget)
+        size = self._sizes.get(key)
+        if size is not None:
+            self.cache_hits += 1
+            return size
+        if not self._synced:
+            # Один раз за проход, чтобы геометрия отражала последние изменения
+            self.root.update_idletasks()
+            self._synced = True
+        self.measured += 1
+        size = (widget.winfo_reqwidth(), widget.winfo_reqheight())
+        self._sizes[key] = size
+        return size
+
+    def invalidate(self, widget=None):
+        """Сбрасывает кэш размеров виджета (или всех виджетов) после изменения содержимого"""
+        if widget is None:
+            self._sizes.clear()
+        else:
+            self._sizes.pop(str(widget), None)
+
+    def stats(self):
+        return {
+            "requested": self.requested,
+            "executed": self.executed,
+            "measured": self.measured,
+            "cache_hits": self.cache_hits,
+        }
+
 
 class RadiatorApp:
+    # Оси матрицы радиаторов: длины (строки) и высоты (столбцы), мм
+    MATRIX_LENGTHS = list(range(400, 2100, 100))
+    MATRIX_HEIGHTS = [300, 400, 500, 600, 900]
+
     def __init__(self, root):
         """
         Инициализация главного окна программы
         """
         self.root = root
-        self.tooltip = None
         if not self.root.winfo_exists():  
             self.root = tk.Tk()  
         
         # Устанавливаем заголовок окна
-        self.root.title("RadiaTool v1.9")
+        self.root.title(f"RadiaTool v{APP_VERSION}")
         
         # Получаем размеры экрана
         screen_width = self.root.winfo_screenwidth()
@@ -38,6 +647,18 @@ class RadiatorApp:
         # Устанавливаем начальное положение окна
         self.root.geometry(f"+{x}+{y}")
 
+        # Настройки программы (settings.json в папке данных пользователя)
+        self.settings = load_settings()
+
+        # Разбор наименований других производителей; кэш сохраняется при перезагрузке каталога
+        self.name_parser = ForeignNameParser.from_settings(self.settings)
+
+        # Пересчет размеров окна выполняется один раз за оборот цикла событий
+        self.layout = LayoutScheduler(self.root)
+
+        # Подсказки при наведении (общий пул окон)
+        self.tooltips = TooltipPool(self.root, delay=int(self.settings["tooltip_delay_ms"]))
+
         # По умолчанию подсказки включены
         self.show_tooltips_var = tk.BooleanVar(value=False) 
 
@@ -53,25 +674,50 @@ class RadiatorApp:
         self.bracket_var = tk.StringVar(value="Настенные кронштейны")
         self.radiator_discount_var = tk.StringVar(value="0")
         self.bracket_discount_var = tk.StringVar(value="0")
-        self.entry_values = {}
+        self.entry_values = QuantityModel()
+        self.entry_values.subscribe(self.on_quantity_changed)
+        self._matrix_has_values = False
+        # Живая спецификация: итоги обновляются при каждом вводе, таблица берется из кэша
+        self.engine = None
+        self.spec_model = SpecModel(self.engine, self.entry_values, self.spec_options)
+        self.entry_values.subscribe(self.spec_model.on_quantity_changed)
+        self.spec_model.subscribe(self.on_spec_changed)
+        self.radiator_discount_var.trace_add("write", lambda *args: self.spec_model.refresh_prices())
+        self.bracket_discount_var.trace_add("write", lambda *args: self.spec_model.refresh_prices())
+        self.bracket_var.trace_add("write", lambda *args: self.spec_model.rebuild())
+        self.totals_bar_var = tk.StringVar(value="Спецификация пуста")
+        # Ячейки текущего листа: (лист, артикул) -> Entry
         self.entries = {}
-        
-        # Загрузка данных
-        self.load_data()
+        # Постоянная сетка ячеек: (высота, длина) -> Entry и привязанный к ячейке товар
+        self.matrix_cells = {}
+        self.cell_products = {}
+        # Матрица на Canvas (настройка matrix_renderer = "canvas")
+        self.matrix_view = None
+        # Общие для всех ячеек команда проверки ввода и обработчики событий
+        self._validate_cell_command = None
+        self._cell_bindings_installed = False
+        self._cell_positions = {}  # путь виджета -> (высота, длина)
         
         # Создание интерфейса
         self.create_interface()
-        self.update_radiator_types()
-        self.show_selected_matrix()
+
+        # Показываем главное окно сразу, до загрузки каталога и pandas
+        self.root.deiconify()
+        self.root.update()
+
+        # Загрузка данных
+        self.load_data()
+        self.update_radiator_types()  # Строит матрицу для листа по умолчанию
+        self.start_catalog_watcher()
         
         # Настройка размеров окна
         self.adjust_window_size()
-        self.tooltip = None 
 
         # Обработчик закрытия окна
         self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         
         self._preview_window = None  # Добавляем атрибут для хранения ссылки на окно предпросмотра
+        self._preview_view = None  # VirtualTreeview таблицы предпросмотра
         
         try:
             icon_path = self.resource_path("icon.ico")  
@@ -81,18 +727,63 @@ class RadiatorApp:
 
     def on_close(self):
         """Обработчик закрытия окна - уничтожает все подсказки"""
-        if hasattr(self, 'vk_right_tooltip') and self.vk_right_tooltip:
-            self.vk_right_tooltip.destroy()
-        if hasattr(self, 'vk_left_tooltip') and self.vk_left_tooltip:
-            self.vk_left_tooltip.destroy()
+        self.tooltips.hide_all()
         self.root.destroy()
 
     def has_any_value(self):
         """Проверяет, есть ли хотя бы одно значение во всех матрицах"""
-        return any(value for value in self.entry_values.values()) 
+        return self.entry_values.has_any()
+
+    def on_quantity_changed(self, key, old_value, new_value):
+        """
+        Перерисовывает ячейку, значение которой изменилось. Если матрица стала
+        пустой или в ней появилось первое значение, перекрашиваются все ячейки.
+        """
+        has_values = self.has_any_value()
+        if key is None or has_values != self._matrix_has_values:
+            self._matrix_has_values = has_values
+            self.recolor_matrix()
+            if key is None:
+                return
+
+        if self.matrix_view is not None:
+            if key[0] == self.matrix_view.sheet_name:
+                self.matrix_view.schedule_redraw()
+            return
+
+        entry = self.entries.get(key)
+        if entry is not None and entry.get() != (new_value or ""):
+            entry.delete(0, tk.END)
+            entry.insert(0, new_value or "")
+
+    def on_spec_changed(self, model):
+        """Обновляет строку итогов (таблица спецификации строится только для предпросмотра и выгрузки)"""
+        if not model.lines:
+            self.totals_bar_var.set("Спецификация пуста")
+        else:
+            total = f"{model.total:,.2f}".replace(",", " ")
+            self.totals_bar_var.set(
+                f"Радиаторов: {model.radiator_qty} шт. | Кронштейнов: {model.bracket_count} шт. | "
+                f"Мощность: {self.format_power(model.power)} | Вес: {self.format_weight(model.weight)} | "
+                f"Объём: {model.volume:.3f} м³ | Сумма: {total} руб."
+            )
+
+    def recolor_matrix(self):
+        """Перекрашивает все ячейки текущей матрицы по наличию значений"""
+        if self.matrix_view is not None:
+            self.matrix_view.schedule_redraw()
+            return
+        color = '#e6f3ff' if self.has_any_value() else 'white'
+        for entry in self.matrix_cells.values():
+            try:
+                entry.config(bg=color)
+            except tk.TclError:
+                continue
     
     def global_highlight(self):
         """Принудительно включает подсветку для всех матриц"""
+        if self.matrix_view is not None:
+            self.matrix_view.redraw()
         color = '#e6f3ff' if self.has_any_value() else 'white'
         for entry in self.entries.values():
             try:
@@ -103,50 +794,19 @@ class RadiatorApp:
             except tk.TclError:
                 continue
     
-    def create_image_tooltip(self, parent, image_path):
-        """Создает подсказку с картинкой"""
-        try:
-            # Проверяем существование файла
-            if not os.path.exists(image_path):
-                print(f"Файл изображения не найден: {image_path}")
-                return None
-                
-            tooltip = tk.Toplevel(parent)
-            tooltip.wm_overrideredirect(True)
-            tooltip.withdraw()
-            
-            img = tk.PhotoImage(file=image_path)
-            label = ttk.Label(tooltip, image=img)
-            label.image = img  # Сохраняем ссылку на изображение
-            label.pack()
-            
-            return tooltip
-        except Exception as e:
-            print(f"Ошибка загрузки изображения для подсказки: {e}")
-            return None
-
-    def show_image_tooltip(self, tooltip, widget):
+    def show_image_tooltip(self, image_path, widget):
         """Показывает подсказку с картинкой под виджетом, центрируя по горизонтали относительно окна"""
-        if tooltip:
+        def position(tooltip):
             # Получаем координаты виджета для вертикального позиционирования
             y = widget.winfo_rooty() + widget.winfo_height() + 5  # 5px отступ под виджетом
             
-            # Получаем координаты окна для горизонтального центрирования
-            window_x = self.root.winfo_rootx()
-            window_width = self.root.winfo_width()
-            
             # Центрируем подсказку по горизонтали относительно окна
-            tooltip_width = tooltip.winfo_reqwidth()
-            x = window_x + (window_width - tooltip_width) // 2
-            
-            tooltip.wm_geometry(f"+{x}+{y}")
-            tooltip.deiconify()
+            tooltip.update_idletasks()
+            x = self.root.winfo_rootx() + (self.root.winfo_width() - tooltip.winfo_reqwidth()) // 2
+            return x, y
+
+        self.tooltips.show("connection", image_path, position, image_path=image_path)
 
-    def hide_image_tooltip(self, tooltip):
-        """Скрывает подсказку с картинкой"""
-        if tooltip and tooltip.winfo_exists():
-            tooltip.withdraw()
-    
     def open_file_default_app(self, path):
         """
         Открывает файл в программе, связанной с его типом в системе.
@@ -162,12 +822,6 @@ class RadiatorApp:
         except Exception as e:
             messagebox.showerror("Ошибка", f"Не удалось открыть файл:\n{str(e)}")
 
-    def hide_header_tooltip(self):
-        """Скрывает подсказку"""
-        if self.tooltip:
-            self.tooltip.destroy()
-            self.tooltip = None  
-
     def resource_path(self, relative_path):
         """Get absolute path to resource, works for dev and for PyInstaller"""
         try:
@@ -183,13 +837,12 @@ class RadiatorApp:
         except Exception as error:
             print(f"Не удалось установить иконку: {error}")
 
-    def copy_articul_column(self, spec_data):
-        """Копирование только столбца 'Артикул' (без итоговой строки)"""
+    def copy_articul_column(self, table):
+        """Копирование только столбца 'Артикул' таблицы предпросмотра (без итоговой строки)"""
         try:
-            filtered_data = spec_data[spec_data["№"] != "Итого"]
-            articuls = filtered_data["Артикул"].astype(str)
-            cleaned_articuls = articuls.str.strip().replace('nan', '')
-            pyperclip.copy('\n'.join(cleaned_articuls))
+            import pyperclip
+            articuls = [str(art).strip() for art in table.column("Артикул")]
+            pyperclip.copy('\n'.join('' if art == 'nan' else art for art in articuls))
             
             # Переводим окно предпросмотра на задний план и активируем главное окно
             if hasattr(self, '_preview_window') and self._preview_window.winfo_exists():
@@ -201,13 +854,12 @@ class RadiatorApp:
         except Exception as e:
             print(f"Ошибка копирования артикулов: {str(e)}")
 
-    def copy_quantity_column(self, spec_data):
-        """Копирование только столбца 'Кол-во' (без итоговой строки)"""
+    def copy_quantity_column(self, table):
+        """Копирование только столбца 'Кол-во' таблицы предпросмотра (без итоговой строки)"""
         try:
-            filtered_data = spec_data[spec_data["№"] != "Итого"]
-            quantities = filtered_data["Кол-во"].astype(str)
-            cleaned_quantities = quantities.str.strip().replace('nan', '')
-            pyperclip.copy('\n'.join(cleaned_quantities))
+            import pyperclip
+            quantities = [str(qty).strip() for qty in table.column("Кол-во")]
+            pyperclip.copy('\n'.join('' if qty == 'nan' else qty for qty in quantities))
             
             # Переводим окно предпросмотра на задний план и активируем главное окно
             if hasattr(self, '_preview_window') and self._preview_window.winfo_exists():
@@ -283,6 +935,8 @@ class RadiatorApp:
     def copy_column(self, spec_data, column_name):
         """Копирует данные столбца в буфер обмена, исключая итоговую строку"""
         try:
+            import pyperclip
+
             # Фильтрация данных (исключаем строку "Итого")
             filtered_data = spec_data[spec_data["№"] != "Итого"]
             
@@ -308,33 +962,7 @@ class RadiatorApp:
 
     def calculate_total_power(self, spec_data):
         """Рассчитывает суммарную мощность (Вт) с учетом количества"""
-        total_power = 0.0
-        
-        for index, row in spec_data.iterrows():
-            # Пропуск итоговой строки
-            if row["№"] == "Итого":
-                continue
-                
-            # Получение значений из строки
-            power_str = str(row["Мощность, Вт"]).strip()
-            qty = row["Кол-во"]
-            
-            try:
-                # Конвертация мощности в число
-                power = float(power_str) if power_str not in ['', 'nan', 'None'] else 0.0
-                
-                # Расчет и суммирование
-                if power >= 0 and qty >= 0:
-                    total_power += power * qty
-                else:
-                    print(f"Некорректные значения в строке {index}: мощность={power}, количество={qty}")
-                    
-            except ValueError:
-                print(f"Ошибка конвертации мощности в строке {index}: '{power_str}'")
-            except TypeError:
-                print(f"Неправильный тип данных в строке {index}")
-        
-        return round(total_power, 2)  # Округление до 2 знаков
+        return spec_power(spec_data)
 
     def load_data(self):
         """
@@ -342,35 +970,145 @@ class RadiatorApp:
         Обрабатывает матрицу радиаторов и кронштейны.
         """
         try:
-            # Получаем путь к файлу "Матрица.xlsx" внутри EXE
-            self.file_path = self.resource_path("Матрица.xlsx") 
+            # Получаем путь к файлу "Матрица.xlsx" внутри EXE или к внешнему каталогу из настроек
+            self.file_path = self.catalog_file_path()
             
             # Проверяем существование файла
             if not os.path.exists(self.file_path):
                 raise FileNotFoundError(f"Файл не найден: {self.file_path}")
-            
-            # Загружаем данные из Excel
-            self.sheets = pd.read_excel(self.file_path, sheet_name=None, engine='openpyxl')
-            
-            # Обрабатываем лист с кронштейнами
-            if "Кронштейны" in self.sheets:
-                self.brackets_df = self.sheets["Кронштейны"].copy()
-                self.brackets_df['Артикул'] = self.brackets_df['Артикул'].astype(str).str.strip()
-                del self.sheets["Кронштейны"]
-            else:
-                self.brackets_df = pd.DataFrame()
-            
-            # Обрабатываем остальные листы
-            for sheet_name, data in self.sheets.items():
-                data['Артикул'] = data['Артикул'].astype(str).str.strip()
-                data['Вес, кг'] = pd.to_numeric(data['Вес, кг'], errors='coerce').fillna(0)
-                data['Объем, м3'] = pd.to_numeric(data['Объем, м3'], errors='coerce').fillna(0)
-                data['Мощность, Вт'] = data.get('Мощность, Вт', '')
+
+            # Каталог берется из кэша, а если его нет - сразу разбирается только лист
+            # первого экрана, остальные листы догружаются в фоне и затем сохраняются в кэш
+            self.catalog_cache = CatalogCache()
+            self.set_engine(RadiatorEngine.from_file(
+                self.file_path,
+                reader=self.settings["catalog_reader"],
+                cache=self.catalog_cache,
+                first_sheet=f"{self.connection_var.get()} {self.radiator_type_var.get()}",
+                background=True,
+            ))
         except Exception as e:
             # Если произошла ошибка, показываем сообщение и закрываем программу
             messagebox.showerror("Ошибка", f"Ошибка загрузки данных: {str(e)}")
             self.root.destroy()
 
+    def set_engine(self, engine):
+        """Подключает расчетное ядро: каталог и правила кронштейнов берутся из него"""
+        engine.name_parser = self.name_parser
+        self.engine = engine
+        self.catalog = engine.catalog
+        self.sheets = engine.catalog
+        self.bracket_rules = engine.bracket_rules
+        self.spec_model.set_engine(engine)
+
+    def spec_options(self):
+        """Параметры расчета спецификации из полей главного окна"""
+        radiator_discount = self.radiator_discount_var.get()
+        bracket_discount = self.bracket_discount_var.get()
+        # Кронштейны, добавленные вручную в предпросмотре, повторно не подбираются
+        mount = NO_BRACKETS if hasattr(self, 'preview_brackets_added') else self.bracket_var.get()
+        return SpecOptions(float(radiator_discount) if radiator_discount else 0.0,
+                           float(bracket_discount) if bracket_discount else 0.0,
+                           mount)
+
+    def catalog_file_path(self):
+        """Путь к файлу каталога: внешний из настроек или встроенный Матрица.xlsx"""
+        return self.settings.get("catalog_path") or self.resource_path("Матрица.xlsx")
+
+    def start_catalog_watcher(self):
+        """Запускает периодическую проверку файла каталога на изменения"""
+        self.catalog_watch_interval = int(self.settings.get("catalog_watch_interval_ms") or 0)
+        if self.catalog_watch_interval <= 0:
+            return
+        self.catalog_watcher = CatalogWatcher([self.file_path])
+        self._catalog_reload_queue = queue.Queue()
+        self._catalog_reloading = False
+        self.root.after(self.catalog_watch_interval, self.poll_catalog_file)
+
+    def poll_catalog_file(self):
+        """Проверяет файл каталога и применяет каталог, перечитанный в фоне"""
+        try:
+            while True:
+                self.apply_reloaded_catalog(*self._catalog_reload_queue.get_nowait())
+        except queue.Empty:
+            pass
+        except Exception as e:
+            print(f"Ошибка применения обновленного каталога: {e}")
+
+        if self.catalog_watcher.poll() and not self._catalog_reloading:
+            self.reload_catalog_async()
+        self.root.after(self.catalog_watch_interval, self.poll_catalog_file)
+
+    def reload_catalog_async(self):
+        """Перечитывает каталог в фоновом потоке и сравнивает с загруженным"""
+        self._catalog_reloading = True
+        old_catalog = self.catalog
+        file_path = self.file_path
+        reader = self.settings["catalog_reader"]
+
+        def worker():
+            try:
+                # Старый каталог должен быть загружен целиком, иначе сравнение запустит его разбор
+                old_catalog.wait_loaded()
+                engine = RadiatorEngine.from_file(file_path, reader=reader, cache=self.catalog_cache)
+                diff = diff_catalogs(old_catalog, engine.catalog)
+                self._catalog_reload_queue.put((engine, diff))
+            except Exception as e:
+                print(f"Ошибка перезагрузки каталога: {e}")
+            finally:
+                self._catalog_reloading = False
+
+        threading.Thread(target=worker, name="catalog-reload", daemon=True).start()
+
+    def apply_reloaded_catalog(self, engine, diff):
+        """
+        Подменяет каталог новой версией: введенные количества сохраняются,
+        исчезнувшие артикулы удаляются из ввода с сообщением, перерисовываются
+        только ячейки с изменившимися товарами.
+        """
+        self.commit_focused_entry()
+
+        removed = []
+        for key in diff.vanished:
+            value = self.entry_values.pop(key, None)
+            if value:
+                removed.append(f"{key[0]}: {key[1]} (кол-во {value})")
+        # Цены и характеристики оставшихся позиций берутся из нового каталога
+        self.set_engine(engine)
+
+        self.repaint_matrix_cells(diff.changed_cells)
+
+        print(f"Каталог обновлен: изменено товаров {len(diff.changed)}, удалено {len(diff.vanished)}")
+        if removed:
+            messagebox.showwarning(
+                "Каталог обновлен",
+                "Следующие позиции отсутствуют в новом каталоге и удалены из расчета:\n" + "\n".join(removed)
+            )
+
+    def commit_focused_entry(self):
+        """Сохраняет в entry_values значение ячейки, которая сейчас редактируется"""
+        focused = self.root.focus_get()
+        for (sheet_name, art), entry in self.entries.items():
+            if entry == focused:
+                value = entry.get()
+                if value:
+                    self.entry_values[(sheet_name, art)] = value
+                else:
+                    self.entry_values.pop((sheet_name, art), None)
+                break
+
+    def repaint_matrix_cells(self, cells):
+        """Перепривязывает ячейки текущей матрицы из набора (лист, высота, длина)"""
+        sheet_name = f"{self.connection_var.get()} {self.radiator_type_var.get()}"
+        if self.matrix_view is not None:
+            if any(cell[0] == sheet_name for cell in cells):
+                self.matrix_view.show(sheet_name)
+            return
+        color = '#e6f3ff' if self.has_any_value() else 'white'
+        for cell_sheet, height, length in cells:
+            if cell_sheet == sheet_name and (height, length) in self.matrix_cells:
+                self.bind_matrix_cell(sheet_name, height, length, color)
+
     def calculate_max_matrix_width(self):
         """
         Рассчитывает наибольший возможный размер матрицы среди доступных конфигураций.
@@ -408,13 +1146,14 @@ class RadiatorApp:
         return max_width
 
     def adjust_window_size(self):
-        # Обновляем геометрию, чтобы получить актуальные размеры виджетов
-        self.root.update_idletasks()
-        
+        """Запрашивает пересчет размеров окна (выполняется при простое цикла событий)"""
+        self.layout.request("window_size", self.apply_window_size)
+
+    def apply_window_size(self):
         # 1. Рассчитываем ширину содержимого
         # Берем ширину матрицы или минимальную ширину 800
-        matrix_width = self.scrollable_matrix_frame.winfo_reqwidth() if hasattr(self, 'scrollable_matrix_frame') else 800
-        controls_width = self.top_panel.winfo_reqwidth() if hasattr(self, 'top_panel') else 800
+        matrix_width = self.layout.measure(self.scrollable_matrix_frame)[0] if hasattr(self, 'scrollable_matrix_frame') else 800
+        controls_width = self.layout.measure(self.top_panel)[0] if hasattr(self, 'top_panel') else 800
         
         # Ширина окна = максимальная из ширины матрицы и управляющих элементов
         content_width = max(matrix_width, controls_width + 30)
@@ -431,7 +1170,7 @@ class RadiatorApp:
             if hasattr(self, element):
                 widget = getattr(self, element)
                 try:
-                    content_height += widget.winfo_reqheight()
+                    content_height += self.layout.measure(widget)[1]
                 except tk.TclError:
                     continue
         
@@ -472,63 +1211,25 @@ class RadiatorApp:
     def get_brackets_list(self):
         """Возвращает список кронштейнов в формате для комбобокса"""
         brackets_list = []
-        if not self.brackets_df.empty:
-            for _, row in self.brackets_df.iterrows():
-                brackets_list.append({
-                    'Артикул': str(row['Артикул']).strip(),
-                    'Наименование': str(row['Наименование']).strip()
-                })
+        for bracket in self.catalog.brackets():
+            brackets_list.append({
+                'Артикул': bracket.article,
+                'Наименование': bracket.name.strip()
+            })
         return brackets_list        
 
     def refresh_matrix(self):
-        """Полностью пересоздает матрицу с текущими значениями"""
-        # Удаляем старые виджеты матрицы
-        for widget in self.scrollable_matrix_frame.winfo_children():
-            widget.destroy()
-        
-        # Очищаем текущее состояние
-        self.entries.clear()
-
-        # Получаем текущие параметры подключения и типа радиатора
+        """Обновляет значения ячеек матрицы из entry_values"""
         sheet_name = f"{self.connection_var.get()} {self.radiator_type_var.get()}"
 
         if sheet_name not in self.sheets:
             messagebox.showerror("Ошибка", f"Лист '{sheet_name}' не найден")
             return
 
-        data = self.sheets[sheet_name]
-        lengths = list(range(400, 2100, 100))
-        heights = [300, 400, 500, 600, 900]
-
-        # Создаем стиль для заголовков без рамок
-        style = ttk.Style()
-        style.configure('NoBorder.TLabel', relief='flat', borderwidth=0)
-
-        # Заголовки столбцов (высоты)
-        for j, h in enumerate(heights):
-            label = ttk.Label(
-                self.scrollable_matrix_frame, 
-                text=str(h),
-                width=8,
-                style='NoBorder.TLabel',
-                anchor="center"
-            )
-            label.grid(row=1, column=j+1, sticky="nsew")
-        
-        # Заголовки строк (длины)
-        for i, l in enumerate(lengths):
-            label = ttk.Label(
-                self.scrollable_matrix_frame, 
-                text=str(l),
-                width=8,
-                style='NoBorder.TLabel',
-                anchor="center"
-            )
-            label.grid(row=i+2, column=0, sticky="nsew")
-            
-            # Ячейки с радиаторами
-            for j, h in enumerate(heights):
-                self.create_cell(sheet_name, data, l, h, i+2, j+1)
+        if self.matrix_view is not None:
+            self.matrix_view.show(sheet_name)
+        else:
+            self.bind_matrix_sheet(sheet_name)
 
         # Подсвечиваем заполненные ячейки
         self.highlight_filled_cells()
@@ -783,9 +1484,12 @@ class RadiatorApp:
         )
         self.reset_btn.pack(side="right", padx=5)
 
-        # 10. Обновляем размеры окна
+        # 10. Создаем строку итогов текущей спецификации
+        self.totals_bar = ttk.Label(scrollable_frame, textvariable=self.totals_bar_var, anchor="w")
+        self.totals_bar.pack(fill="x", padx=10, pady=(0, 5))
+
+        # 11. Обновляем размеры окна
         self.adjust_window_size()
-        self.tooltip = None
 
     def open_instruction_pdf(self):
         """Открывает файл инструкции PDF"""
@@ -821,288 +1525,31 @@ class RadiatorApp:
             return
 
         try:
-            # Определяем движок для чтения
-            if file_path.endswith('.xlsx'):
-                engine = 'openpyxl'
-            elif file_path.endswith('.xls'):
-                engine = 'xlrd'
-            elif file_path.endswith('.csv'):
+            if file_path.endswith('.csv'):
                 return self.load_csv_spec()
-            else:
+            if excel_engine(file_path) is None:
                 messagebox.showerror("Ошибка", "Неподдерживаемый формат файла")
                 return
 
-            # Читаем весь файл для анализа
-            df = pd.read_excel(file_path, engine=engine, header=None)
-            
-            # 1. Поиск строки с заголовками и столбцов с нужными данными
-            name_col = None
-            qty_col = None
-            header_row = 0
-            
-            # Ищем строку, содержащую хотя бы одно из ключевых слов
-            keywords = ['радиатор', 'radiator', 'тип', 'type', 'кол-во', 'количество', 'qty', 'шт']
-            
-            for i in range(min(20, len(df))):  # Проверяем первые 20 строк
-                row_str = ' '.join(str(cell).lower() for cell in df.iloc[i] if pd.notna(cell))
-                if any(keyword in row_str for keyword in keywords):
-                    header_row = i
-                    break
-                    
-            # Теперь ищем столбцы с названиями и количеством
-            for j in range(len(df.columns)):
-                col_str = str(df.iloc[header_row, j]).lower() if header_row < len(df) else ""
-                
-                # Определяем столбец с наименованием
-                if not name_col and any(x in col_str for x in ['наименование', 'название', 'имя', 'номенклатура', 'товар', 'позиция', 'радиатор', 'radiator']):
-                    name_col = j
-                # Определяем столбец с количеством
-                if not qty_col and any(x in col_str for x in ['кол-во', 'количество', 'qty', 'шт']):
-                    qty_col = j
-                    
-            # Если не нашли по заголовкам, используем эвристики
-            if name_col is None:
-                # Ищем первый столбец, содержащий слово "радиатор" или "тип"
-                for j in range(len(df.columns)):
-                    col_data = df.iloc[header_row+1:header_row+6, j].astype(str).str.lower()  # Проверяем 5 строк после заголовка
-                    if any(('радиатор' in s or 'тип' in s or 'radiator' in s or 'type' in s) for s in col_data):
-                        name_col = j
-                        break
-                if name_col is None:
-                    name_col = 0  # По умолчанию первый столбец
-                    
-            if qty_col is None:
-                # Ищем столбец с числовыми значениями после заголовка
-                for j in range(len(df.columns)):
-                    if j == name_col:
-                        continue
-                    try:
-                        # Пробуем преобразовать первые 5 значений в число (пропускаем заголовок)
-                        test_values = df.iloc[header_row+1:header_row+6, j].apply(pd.to_numeric, errors='ignore')
-                        if all(isinstance(x, (int, float)) for x in test_values if pd.notna(x)):
-                            qty_col = j
-                            break
-                    except:
-                        continue
-                if qty_col is None:
-                    qty_col = 1 if len(df.columns) > 1 else 0  # По умолчанию второй столбец
-
-            # 2. Извлекаем данные из найденных столбцов
-            data_rows = []
-            for i in range(header_row + 1, len(df)):
-                name = str(df.iloc[i, name_col]).strip() if name_col is not None else ""
-                qty = df.iloc[i, qty_col] if qty_col is not None else 0
-                
-                # Пропускаем пустые строки и строки "Итого"
-                if not name or name.lower() == 'итого':
-                    continue
-                    
-                try:
-                    qty = float(qty)
-                    if qty > 0 and ('радиатор' in name.lower() or 'radiator' in name.lower() or 
-                                    re.match(r'^[cv]\s*\d+', name, re.IGNORECASE)):
-                        data_rows.append((name, int(qty)))
-                except (ValueError, TypeError):
-                    continue
-
-            # 3. Очищаем текущие значения
+            # 1. Извлекаем наименования и количества и подбираем аналоги
+            matched = self.engine.match_foreign(read_foreign_spec(file_path))
+            total_loaded = matched.total_loaded
+            total_qty = matched.total_qty
+            similar_loaded = matched.similar_loaded
+            long_radiators = matched.long_radiators
+            not_found = matched.not_found
+            unknown_format = matched.unknown_format
+            correspondence_df = matched.correspondence
+
+            # 2. Заменяем текущие значения подобранными
             self.entry_values.clear()
-            total_loaded = 0
-            total_qty = 0
-            not_found = []
-            unknown_format = []
-            long_radiators = []
-            similar_loaded = []
-            
-            # Создаем DataFrame для соответствия
-            correspondence_df = pd.DataFrame(columns=[
-                "Оригинальное наименование", "Количество", 
-                "Аналог Meteor", "Артикул Meteor", "Комментарий"
-            ])
-
-            # 4. Обрабатываем каждую строку
-            for name, qty in data_rows:
-                # 4.1. Определяем тип подключения
-                name_lower = name.lower()
-                
-                # Все радиаторы с CV в начале названия - VK-правое подключение
-                if re.match(r'^cv\s*\d+', name_lower, re.IGNORECASE):
-                    connection = "VK-правое"
-                # Радиаторы с VK в названии - VK-правое подключение
-                elif 'vk' in name_lower or 'нижн' in name_lower:
-                    connection = "VK-правое"
-                # Все остальные - K-боковое подключение
-                else:
-                    connection = "K-боковое"
-
-                # 4.2. Извлекаем параметры из названия
-                rad_type = None
-                height = None
-                length = None
-                
-                # Вариант 1: Формат типа "C 11-400-400" или "CV 11-400-800"
-                match = re.match(r'^[cv]\s*(\d+)\s*[\-\s]\s*(\d+)\s*[\-\s]\s*(\d+)', name, re.IGNORECASE)
-                if match:
-                    rad_type = match.group(1)
-                    height = match.group(2)
-                    length = match.group(3)
-                else:
-                    # Вариант 2: Формат типа "11\500\400" или "тип 11/500/400"
-                    match = re.search(r'(тип\s*)?(\d+)[\\\/\s\-]*(\d+)[\\\/\s\-]*(\d+)', name, re.IGNORECASE)
-                    if match:
-                        rad_type = match.group(2)
-                        height = match.group(3)
-                        length = match.group(4)
-                    else:
-                        # Вариант 3: Формат типа "K-Profil 11 500 400"
-                        match = re.search(r'(\d+)\s+(\d+)\s+(\d+)', name)
-                        if match:
-                            rad_type = match.group(1)
-                            height = match.group(2)
-                            length = match.group(3)
-                        else:
-                            # Вариант 4: Формат типа "тип 11 / 500 / 400"
-                            match = re.search(r'тип\s*(\d+)\s*/\s*(\d+)\s*/\s*(\d+)', name, re.IGNORECASE)
-                            if match:
-                                rad_type = match.group(1)
-                                height = match.group(2)
-                                length = match.group(3)
-                            else:
-                                unknown_format.append(name)
-                                correspondence_df.loc[len(correspondence_df)] = [
-                                    name, qty, "", "", "Не распознан формат"
-                                ]
-                                continue
-
-                if not rad_type or not height or not length:
-                    unknown_format.append(name)
-                    correspondence_df.loc[len(correspondence_df)] = [
-                        name, qty, "", "", "Не удалось определить параметры"
-                    ]
-                    continue
-                    
-                # Корректируем тип радиатора
-                rad_type = rad_type.strip()
-                
-                # Проверяем, что тип поддерживается
-                supported_types = ["10", "11", "20", "21", "22", "30", "33"]
-                if rad_type not in supported_types:
-                    not_found.append(f"{name} (неподдерживаемый тип {rad_type})")
-                    correspondence_df.loc[len(correspondence_df)] = [
-                        name, qty, "", "", f"Неподдерживаемый тип {rad_type}"
-                    ]
-                    continue
+            self.entry_values.update(matched.quantities)
 
-                # Корректируем высоту
-                try:
-                    height = int(height)
-                    if height not in [300, 400, 500, 600, 900]:
-                        original_height = height
-                        if height < 300:
-                            height = 300
-                        elif height < 400:
-                            height = 400
-                        elif height < 500:
-                            height = 500
-                        elif height < 600:
-                            height = 600
-                        else:
-                            height = 900
-                        similar_loaded.append(f"{name} → высота {height} (была {original_height})")
-                    
-                    length = int(length)
-                    if length > 2000:
-                        long_radiators.append(f"{name} (длина {length} мм)")
-                        correspondence_df.loc[len(correspondence_df)] = [
-                            name, qty, "", "", f"Длина {length} мм > 2000 мм"
-                        ]
-                        continue
-                    elif length < 400:
-                        original_length = length
-                        length = 400
-                        similar_loaded.append(f"{name} → длина {length} (была {original_length})")
-                    else:
-                        original_length = length
-                        length = round(length / 100) * 100
-                        if original_length != length:
-                            similar_loaded.append(f"{name} → длина {length} (была {original_length})")
-                except ValueError:
-                    unknown_format.append(f"{name} (ошибка в размерах)")
-                    correspondence_df.loc[len(correspondence_df)] = [
-                        name, qty, "", "", "Ошибка в размерах"
-                    ]
-                    continue
-
-                # Формируем артикул Meteor
-                sheet_name = f"{connection} {rad_type}"
-                
-                if sheet_name not in self.sheets:
-                    not_found.append(f"{name} (неподдерживаемый тип {rad_type})")
-                    correspondence_df.loc[len(correspondence_df)] = [
-                        name, qty, "", "", f"Неподдерживаемый тип {rad_type}"
-                    ]
-                    continue
-
-                # Ищем радиатор с такой же высотой и длиной
-                pattern = f"/{height}/{length}"
-                meteor_data = self.sheets[sheet_name]
-                match = meteor_data[meteor_data['Наименование'].str.contains(pattern, na=False)]
-                
-                if not match.empty:
-                    product = match.iloc[0]
-                    art = str(product['Артикул']).strip()
-                    
-                    if (sheet_name, art) in self.entry_values:
-                        current_qty = self.parse_quantity(self.entry_values[(sheet_name, art)])
-                        self.entry_values[(sheet_name, art)] = str(current_qty + qty)
-                    else:
-                        self.entry_values[(sheet_name, art)] = str(qty)
-                    
-                    correspondence_df.loc[len(correspondence_df)] = [
-                        name, qty, 
-                        product['Наименование'], art,
-                        "Успешно загружен"
-                    ]
-                    
-                    total_loaded += 1
-                    total_qty += qty
-                else:
-                    possible_lengths = [l for l in range(400, 2100, 100)]
-                    closest_length = min(possible_lengths, key=lambda x: abs(x - length))
-                    
-                    pattern = f"/{height}/{closest_length}"
-                    match = meteor_data[meteor_data['Наименование'].str.contains(pattern, na=False)]
-                    
-                    if not match.empty:
-                        product = match.iloc[0]
-                        art = str(product['Артикул']).strip()
-                        
-                        if (sheet_name, art) in self.entry_values:
-                            current_qty = self.parse_quantity(self.entry_values[(sheet_name, art)])
-                            self.entry_values[(sheet_name, art)] = str(current_qty + qty)
-                        else:
-                            self.entry_values[(sheet_name, art)] = str(qty)
-                        
-                        similar_loaded.append(f"{name} → {product['Наименование']} (длина {length}→{closest_length} мм)")
-                        correspondence_df.loc[len(correspondence_df)] = [
-                            name, qty, 
-                            product['Наименование'], art,
-                            f"Длина скорректирована {length}→{closest_length} мм"
-                        ]
-                        total_loaded += 1
-                        total_qty += qty
-                    else:
-                        not_found.append(f"{name} (не найден аналог Meteor {height}x{length})")
-                        correspondence_df.loc[len(correspondence_df)] = [
-                            name, qty, "", "", 
-                            f"Не найден аналог Meteor {height}x{length}"
-                        ]
-
-            # 5. Обновляем интерфейс
+            # 3. Обновляем интерфейс
             self.refresh_matrix()
             self.global_highlight() 
             
-            # 6. Формируем сообщение о результате
+            # 4. Формируем сообщение о результате
             msg = f"Успешно загружено: {total_loaded} позиций\nОбщее количество: {total_qty}"
             
             if similar_loaded:
@@ -1259,19 +1706,14 @@ class RadiatorApp:
         frame = ttk.LabelFrame(parent, text="Вид подключения")
         frame.pack(fill="x", padx=5, pady=2)
 
-        # Создаем подсказки для каждого типа подключения
-        self.vk_right_tooltip = self.create_image_tooltip(frame, self.resource_path("1.png"))
-        self.vk_left_tooltip = self.create_image_tooltip(frame, self.resource_path("2.png"))
-        self.k_side_tooltip = self.create_image_tooltip(frame, self.resource_path("3.png"))
-
-        # Варианты подключения
+        # Варианты подключения и картинки для подсказок (загружаются при первом наведении)
         connections = [
-            ("VK-нижнее\nправое", "VK-правое"),
-            ("VK-нижнее\nлевое", "VK-левое"),
-            ("K-боковое", "K-боковое")
+            ("VK-нижнее\nправое", "VK-правое", "1.png"),
+            ("VK-нижнее\nлевое", "VK-левое", "2.png"),
+            ("K-боковое", "K-боковое", "3.png")
         ]
 
-        for text, value in connections:
+        for text, value, image_name in connections:
             btn = ttk.Radiobutton(
                 frame,
                 text=text,
@@ -1282,15 +1724,9 @@ class RadiatorApp:
             btn.pack(side="left", padx=10, pady=2)
             
             # Добавляем подсказки для всех типов подключения
-            if value == "VK-правое" and self.vk_right_tooltip:
-                btn.bind("<Enter>", lambda e, btn=btn: self.show_image_tooltip(self.vk_right_tooltip, btn))
-                btn.bind("<Leave>", lambda e: self.hide_image_tooltip(self.vk_right_tooltip))
-            elif value == "VK-левое" and self.vk_left_tooltip:
-                btn.bind("<Enter>", lambda e, btn=btn: self.show_image_tooltip(self.vk_left_tooltip, btn))
-                btn.bind("<Leave>", lambda e: self.hide_image_tooltip(self.vk_left_tooltip))
-            elif value == "K-боковое" and self.k_side_tooltip:
-                btn.bind("<Enter>", lambda e, btn=btn: self.show_image_tooltip(self.k_side_tooltip, btn))
-                btn.bind("<Leave>", lambda e: self.hide_image_tooltip(self.k_side_tooltip))
+            image_path = self.resource_path(image_name)
+            btn.bind("<Enter>", lambda e, btn=btn, path=image_path: self.show_image_tooltip(path, btn))
+            btn.bind("<Leave>", lambda e: self.tooltips.hide("connection"))
 
         return frame
 
@@ -1499,21 +1935,47 @@ class RadiatorApp:
                 value=t,
                 command=self.show_selected_matrix
             ).pack(side="left", padx=5, pady=2)
+        self.layout.invalidate(self.radiator_frame)
 
         self.show_selected_matrix()
 
     def show_selected_matrix(self):
-        for widget in self.scrollable_matrix_frame.winfo_children():
-            widget.destroy()
-        
         sheet_name = f"{self.connection_var.get()} {self.radiator_type_var.get()}"
         if sheet_name not in self.sheets:
             messagebox.showerror("Ошибка", f"Лист '{sheet_name}' не найден")
             return
-        
-        data = self.sheets[sheet_name]
-        lengths = list(range(400, 2100, 100))
-        heights = [300, 400, 500, 600, 900]
+
+        if self.settings.get("matrix_renderer") == "canvas":
+            self.show_canvas_matrix(sheet_name)
+            return
+
+        # Сетка виджетов создается один раз, при смене листа ячейки только перепривязываются
+        if not self.matrix_cells:
+            self.build_matrix_grid()
+            self.bind_matrix_sheet(sheet_name)
+            # Обновляем размеры окна после создания матрицы
+            self.layout.invalidate(self.scrollable_matrix_frame)
+            self.adjust_window_size()
+        else:
+            self.bind_matrix_sheet(sheet_name)
+
+    def show_canvas_matrix(self, sheet_name):
+        """Показывает лист в матрице на Canvas (создается при первом вызове)"""
+        if self.matrix_view is None:
+            self.matrix_view = CanvasMatrixView(self, self.scrollable_matrix_frame)
+            self.matrix_view.frame.grid(row=0, column=0, sticky="nsew")
+            self.matrix_view.show(sheet_name)
+            self.layout.invalidate(self.scrollable_matrix_frame)
+            self.adjust_window_size()
+        elif self.matrix_view.show(sheet_name):
+            # Размер Canvas зависит от осей листа
+            self.layout.invalidate(self.scrollable_matrix_frame)
+            self.adjust_window_size()
+
+    def build_matrix_grid(self):
+        """Создает заголовки и ячейки матрицы (один раз за время работы программы)"""
+        lengths = self.MATRIX_LENGTHS
+        heights = self.MATRIX_HEIGHTS
 
         # Создаем стиль для заголовков без рамок
         style = ttk.Style()
@@ -1543,7 +2005,7 @@ class RadiatorApp:
             
             # Ячейки с радиаторами
             for j, h in enumerate(heights):
-                self.create_cell(sheet_name, data, l, h, i+2, j+1)
+                self.create_cell(l, h, i+2, j+1)
 
         # Ограничиваем максимальную ширину матрицы
         max_matrix_width = 1200  # Максимальная комфортная ширина
@@ -1551,42 +2013,121 @@ class RadiatorApp:
             for col in range(len(heights) + 1):
                 self.scrollable_matrix_frame.columnconfigure(col, minsize=80)  # Фиксируем ширину столбцов
 
-        # Обновляем размеры окна после изменения матрицы
-        self.adjust_window_size()
+    def create_cell(self, length, height, row, col):
+        """Создает ячейку матрицы; товар к ней привязывается в bind_matrix_cell"""
+        pos = (height, length)
+        entry = tk.Entry(
+            self.scrollable_matrix_frame,
+            width=8,
+            justify="center",
+            bg='white',
+            relief='solid',
+            borderwidth=1,
+            validate='key',
+            validatecommand=self.cell_validate_command()
+        )
 
-    def create_cell(self, sheet_name, data, length, height, row, col):
-        pattern = f"/{height}/{length}"
-        match = data[data['Наименование'].str.contains(pattern, na=False)]
+        # Обработчики общие для всех ячеек (bindtag "MatrixCell"), ячейка определяется по виджету
+        self.install_matrix_cell_bindings()
+        tags = entry.bindtags()
+        entry.bindtags((tags[0], "MatrixCell") + tags[1:])
+        self._cell_positions[str(entry)] = pos
 
-        if not match.empty:
-            product = match.iloc[0]
-            art = str(product['Артикул']).strip()
+        entry.grid(row=row, column=col, sticky="nsew", padx=1, pady=1)
+        self.matrix_cells[pos] = entry
 
-            value = self.entry_values.get((sheet_name, art), "")
+    def cell_validate_command(self):
+        """Общая для всех ячеек команда проверки ввода (регистрируется в Tcl один раз)"""
+        if self._validate_cell_command is None:
+            self._validate_cell_command = (self.root.register(self.validate_input), '%P')
+        return self._validate_cell_command
 
-            entry = tk.Entry(
-                self.scrollable_matrix_frame,
-                width=8,
-                justify="center",
-                bg='#e6f3ff' if self.has_any_value() else 'white',
-                relief='solid',
-                borderwidth=1,
-                validate='key',
-                validatecommand=(self.root.register(self.validate_input), '%P')
-            )
+    def install_matrix_cell_bindings(self):
+        """Привязывает обработчики событий к классу "MatrixCell" (один раз)"""
+        if self._cell_bindings_installed:
+            return
+        self.root.bind_class("MatrixCell", "<FocusIn>", self.on_entry_focus_in)
+        self.root.bind_class("MatrixCell", "<FocusOut>", self.on_cell_focus_out)
+        self.root.bind_class("MatrixCell", "<Return>", self.on_cell_focus_out)
+        self.root.bind_class("MatrixCell", "<Tab>", self.on_cell_focus_out)
+        self.root.bind_class("MatrixCell", "<Enter>", self.on_cell_enter)
+        self.root.bind_class("MatrixCell", "<Leave>", lambda e: self.hide_tooltip_on_leave())
+        self._cell_bindings_installed = True
+
+    def bind_matrix_sheet(self, sheet_name):
+        """Привязывает постоянную сетку ячеек к товарам листа"""
+        # Несохраненный ввод относится к прежнему товару ячейки
+        self.commit_focused_entry()
+        self.entries.clear()
+        color = '#e6f3ff' if self.has_any_value() else 'white'
+        for height, length in self.matrix_cells:
+            self.bind_matrix_cell(sheet_name, height, length, color)
+
+    def bind_matrix_cell(self, sheet_name, height, length, color):
+        """Привязывает одну ячейку к товару листа; ячейка без товара скрывается"""
+        pos = (height, length)
+        entry = self.matrix_cells[pos]
+        product = self.catalog.product_by_size(sheet_name, height, length)
+
+        old_product = self.cell_products.get(pos)
+        if old_product is not None:
+            self.entries.pop((old_product.sheet, old_product.article), None)
+
+        if product is None:
+            self.cell_products.pop(pos, None)
+            entry.grid_remove()
+            return
 
+        self.cell_products[pos] = product
+        self.entries[(sheet_name, product.article)] = entry
+        value = self.entry_values.get((sheet_name, product.article), "")
+        if entry.get() != value:
+            entry.delete(0, tk.END)
             entry.insert(0, value)
-            
-            entry.bind("<FocusIn>", lambda e: self.on_entry_focus_in(e))
-            entry.bind("<FocusOut>", lambda e, s=sheet_name, a=art: self.on_entry_focus_out(e, s, a))
-            entry.bind("<Return>", lambda e, s=sheet_name, a=art: self.on_entry_focus_out(e, s, a))
-            entry.bind("<Tab>", lambda e, s=sheet_name, a=art: self.on_entry_focus_out(e, s, a))
-
-            entry.bind("<Enter>", lambda e, p=product: self.show_tooltip_on_hover(p))
-            entry.bind("<Leave>", lambda e: self.hide_tooltip_on_leave())
-
-            self.entries[(sheet_name, art)] = entry
-            entry.grid(row=row, column=col, sticky="nsew", padx=1, pady=1)
+        entry.config(bg=color)
+        entry.grid()
+
+    def cell_product(self, widget):
+        """Товар, привязанный сейчас к ячейке-виджету (или None)"""
+        pos = self._cell_positions.get(str(widget))
+        return self.cell_products.get(pos) if pos is not None else None
+
+    def on_cell_focus_out(self, event):
+        """Сохраняет значение ячейки для товара, привязанного к ней сейчас"""
+        product = self.cell_product(event.widget)
+        if product is not None:
+            self.on_entry_focus_out(event, product.sheet, product.article)
+
+    def on_cell_enter(self, event):
+        product = self.cell_product(event.widget)
+        if product is not None:
+            self.show_tooltip_on_hover(product)
+
+    def debug_resource_report(self):
+        """
+        Отчет о ресурсах интерфейса: число команд Tcl, живых виджетов и объектов Python.
+        Позволяет убедиться, что после многих переключений листов ничего не накапливается.
+        """
+        import gc
+        from collections import Counter
+
+        def count_widgets(widget):
+            return 1 + sum(count_widgets(child) for child in widget.winfo_children())
+
+        gc.collect()
+        objects = gc.get_objects()
+        types = Counter(type(obj).__name__ for obj in objects)
+        report = {
+            "tcl_commands": len(self.root.tk.splitlist(self.root.tk.call("info", "commands"))),
+            "widgets": count_widgets(self.root),
+            "python_objects": len(objects),
+            "functions": types["function"],
+            "methods": types["method"],
+            "entries": types["Entry"],
+            "products": types["Product"],
+        }
+        print(", ".join(f"{name}: {value}" for name, value in report.items()))
+        return report
 
     def on_entry_focus_in(self, event):
         """Обработчик получения фокуса Entry"""
@@ -1629,62 +2170,27 @@ class RadiatorApp:
         if text:
             entry.xview_moveto(1.0)
         
-        # Сохраняем значение
+        # Сохраняем значение (цвета ячеек обновит on_quantity_changed)
         if text:
             self.entry_values[(sheet_name, art)] = text
         else:
             self.entry_values.pop((sheet_name, art), None)
-        
-        # Обновляем цвета всех ячеек
-        color = '#e6f3ff' if self.has_any_value() else 'white'
-        for e in list(self.entries.values()):  # Создаем копию списка
-            try:
-                if e.winfo_exists():  # Проверяем, существует ли виджет
-                    e.config(bg=color)
-            except tk.TclError:
-                continue
 
     def show_tooltip_on_hover(self, product):
         """Показывает подсказку при наведении, если включен чекбокс"""
         if not self.show_tooltips_var.get():
             return
-            
-        # Создаем подсказку, если ее еще нет
-        if not hasattr(self, '_hover_tooltip'):
-            self._hover_tooltip = tk.Toplevel(self.root)
-            self._hover_tooltip.wm_overrideredirect(True)
-            self._hover_tooltip.withdraw()
-            
-            self._hover_tooltip_label = ttk.Label(
-                self._hover_tooltip,
-                background="#ffffe0",
-                relief="solid",
-                padding=5,
-                font=("Segoe UI", 9)
-            )
-            self._hover_tooltip_label.pack()
-        
-        # Формируем текст подсказки
-        power = product.get('Мощность, Вт', '')
-        power_text = f"Мощность: {power} Вт" if power else "Мощность: не указана"
-        
-        text = (f"Артикул: {product['Артикул']}\n"
-                f"{power_text}\n"
-                f"Вес: {product['Вес, кг']} кг\n"
-                f"Объем: {product['Объем, м3']} м³")
-        
-        self._hover_tooltip_label.config(text=text)
-        
-        # Позиционируем подсказку рядом с курсором
-        x = self.root.winfo_pointerx() + 15
-        y = self.root.winfo_pointery() + 15
-        self._hover_tooltip.wm_geometry(f"+{x}+{y}")
-        self._hover_tooltip.deiconify()   
+
+        # Текст подсказки подготовлен при загрузке каталога, положение курсора
+        # запрашивается только в момент показа
+        def position(tooltip):
+            return self.root.winfo_pointerx() + 15, self.root.winfo_pointery() + 15
+
+        self.tooltips.show("matrix", (product.sheet, product.article), position, text=product.tooltip)
 
     def hide_tooltip_on_leave(self):
         """Скрывает подсказку при уходе курсора"""
-        if hasattr(self, '_hover_tooltip'):
-            self._hover_tooltip.withdraw()             
+        self.tooltips.hide("matrix")
 
     def save_value(self, sheet_name, art):
         """Сохраняет значение из поля ввода"""
@@ -1696,147 +2202,16 @@ class RadiatorApp:
             else:
                 self.entry_values.pop((sheet_name, art), None)
 
-    def create_tooltip(self, widget, product):
-        # Создаем подсказку и сохраняем ссылку на виджете
-        tooltip = tk.Toplevel(self.root)
-        tooltip.wm_overrideredirect(True)
-        tooltip.withdraw()
-        widget._tooltip = tooltip  # Сохраняем ссылку на подсказку
-        
-        power = product.get('Мощность, Вт', '')
-        power_text = f"Мощность: {power} Вт" if power else "Мощность: не указана"
-        
-        text = (f"Артикул: {product['Артикул']}\n"
-                f"{power_text}\n"
-                f"Вес: {product['Вес, кг']} кг\n"
-                f"Объем: {product['Объем, м3']} м³")
-        
-        label = ttk.Label(tooltip, text=text, background="#ffffe0", relief="solid", padding=5)
-        label.pack()
-        
-        widget.bind("<Enter>", lambda e: self.show_tooltip(tooltip, widget))
-        widget.bind("<Leave>", lambda e: tooltip.withdraw())
-
-    def show_tooltip(self, tooltip, widget):
-        x = widget.winfo_rootx() + 25
-        y = widget.winfo_rooty() + 25
-        tooltip.wm_geometry(f"+{x}+{y}")
-        tooltip.deiconify()
-
     def calculate_brackets(self, radiator_type, length, height, bracket_type, qty_radiator=1):
-        """
-        Рассчитывает необходимые кронштейны для радиатора
-        
-        Параметры:
-            radiator_type (str): Тип радиатора ("10", "11", "20" и т.д.)
-            length (int): Длина радиатора в мм (400-2000)
-            height (int): Высота радиатора в мм (300,400,500,600,900)
-            bracket_type (str): Тип крепления
-            qty_radiator (int): Количество радиаторов (по умолчанию 1)
-        
-        Возвращает:
-            list: Список кортежей (артикул, количество)
-        """
-        brackets = []
-        
-        # Настенные кронштейны
-        if bracket_type == "Настенные кронштейны":
-            if radiator_type in ["10", "11"]:
-                brackets.extend([
-                    ("К9.2L", 2 * qty_radiator),
-                    ("К9.2R", 2 * qty_radiator)
-                ])
-                if 1700 <= length <= 2000:
-                    brackets.append(("К9.3-40", 1 * qty_radiator))
-            
-            elif radiator_type in ["20", "21", "22", "30", "33"]:
-                art_map = {
-                    300: "К15.4300",
-                    400: "К15.4400", 
-                    500: "К15.4500",
-                    600: "К15.4600",
-                    900: "К15.4900"
-                }
-                if height in art_map:
-                    art = art_map[height]
-                    if 400 <= length <= 1600:
-                        qty = 2 * qty_radiator
-                    elif 1700 <= length <= 2000:
-                        qty = 3 * qty_radiator
-                    else:
-                        qty = 0
-                    if qty > 0:
-                        brackets.append((art, qty))
-        
-        # Напольные кронштейны
-        elif bracket_type == "Напольные кронштейны":
-            if radiator_type in ["10", "11"]:
-                if 300 <= height <= 400:
-                    main_art = "КНС450"
-                elif 500 <= height <= 600:
-                    main_art = "КНС470" 
-                elif height == 900:
-                    main_art = "КНС4100"
-                else:
-                    main_art = None
-                
-                if main_art:
-                    brackets.append((main_art, 2 * qty_radiator))
-                    if 1700 <= length <= 2000:
-                        brackets.append(("КНС430", 1 * qty_radiator))
-            
-            elif radiator_type == "21":
-                if 300 <= height <= 400:
-                    art = "КНС650"
-                elif 500 <= height <= 600:
-                    art = "КНС670"
-                elif height == 900:
-                    art = "КНС6100"
-                else:
-                    art = None
-                
-                if art:
-                    if 400 <= length <= 1000:
-                        qty = 2 * qty_radiator
-                    elif 1100 <= length <= 1600:
-                        qty = 3 * qty_radiator
-                    elif 1700 <= length <= 2000:
-                        qty = 4 * qty_radiator
-                    else:
-                        qty = 0
-                    if qty > 0:
-                        brackets.append((art, qty))
-            
-            elif radiator_type in ["20", "22", "30", "33"]:
-                if 300 <= height <= 400:
-                    art = "КНС550"
-                elif 500 <= height <= 600:
-                    art = "КНС570"
-                elif height == 900:
-                    art = "КНС5100"
-                else:
-                    art = None
-                
-                if art:
-                    if 400 <= length <= 1000:
-                        qty = 2 * qty_radiator
-                    elif 1100 <= length <= 1600:
-                        qty = 3 * qty_radiator
-                    elif 1700 <= length <= 2000:
-                        qty = 4 * qty_radiator
-                    else:
-                        qty = 0
-                    if qty > 0:
-                        brackets.append((art, qty))
-        
-        return brackets
+        """Рассчитывает кронштейны для радиатора: список кортежей (артикул, количество)"""
+        return self.engine.calculate_brackets(radiator_type, length, height, bracket_type, qty_radiator)
 
-    def create_context_menu(self, tree, spec_data):
+    def create_context_menu(self, tree, table):
         """Создает контекстное меню для удаления строк"""
         context_menu = tk.Menu(tree, tearoff=0)
         context_menu.add_command(
             label="Удалить",
-            command=lambda: self.delete_selected_row(tree, spec_data)
+            command=lambda: self.delete_selected_row(tree, table)
         )
         context_menu.add_separator()  # Добавляем разделитель
 
@@ -1848,205 +2223,32 @@ class RadiatorApp:
         
         tree.bind("<Button-3>", show_context_menu)
 
-    def update_treeview(self, tree, spec_data):
-        """Обновляет данные в Treeview"""
-        tree.delete(*tree.get_children())
-        for _, row in spec_data.iterrows():
-            formatted_row = [
-                row["№"],
-                row["Артикул"],
-                row["Наименование"],
-                row["Мощность, Вт"],
-                f"{float(row['Цена, руб (с НДС)']):.2f}",
-                f"{float(row['Скидка, %']):.2f}",
-                f"{float(row['Цена со скидкой, руб (с НДС)']):.2f}",
-                row["Кол-во"],
-                f"{float(row['Сумма, руб (с НДС)']):.2f}"
-            ]
-            tree.insert("", "end", values=formatted_row)
-        
-        # Добавляем обновленную итоговую строку
-        total_sum = spec_data["Сумма, руб (с НДС)"].sum()
-        total_qty_radiators = sum(spec_data.query("Наименование.str.contains('Радиатор')")["Кол-во"].apply(self.parse_quantity))
-        total_qty_brackets = sum(spec_data.query("Наименование.str.contains('Кронштейн')")["Кол-во"].apply(self.parse_quantity))
-        
-        tree.insert("", "end", values=[
-            "Итого", "", "", "", "", "", "",
-            f"{total_qty_radiators} / {total_qty_brackets}",
-            f"{total_sum:.2f}"
-        ], tags=("total",))
-        tree.tag_configure("total", background="#e0e0e0", font=("Segoe UI", 9, "bold")) 
-
-    def delete_selected_row(self, tree, spec_data):
+    def delete_selected_row(self, tree, table):
         """Удаляет выбранную строку из Treeview и данных"""
         selected_item = tree.selection()
         if selected_item:
-            item_values = tree.item(selected_item)['values']
-            if item_values and item_values[0] != "Итого":  # Нельзя удалить итоговую строку
-                # Удаляем из DataFrame
-                index_to_remove = item_values[0] - 1  # № начинается с 1
-                if 0 <= index_to_remove < len(spec_data):
-                    spec_data.drop(index_to_remove, inplace=True)
-                    spec_data.reset_index(drop=True, inplace=True)
-                    # Обновляем номера строк
-                    spec_data["№"] = range(1, len(spec_data) + 1)
-                    
-                    # Обновляем Treeview
-                    self.update_treeview(tree, spec_data)        
+            # Строка Treeview показывает строку таблицы с индексом row_of(item)
+            index_to_remove = self._preview_view.row_of(selected_item[0])
+            if 0 <= index_to_remove < len(table):  # Нельзя удалить итоговую строку
+                # Номера "№" следующих строк сдвигаются сами, итоги меняются на разницу
+                table.remove(table.row_id(index_to_remove))
+                self._preview_view.set_selection(())
+                self.update_preview_totals()
 
     def prepare_spec_data(self):
+        """Спецификация для предпросмотра и выгрузки: готовый снимок живой модели"""
         # Сохраняем значение из текущей активной ячейки (если есть)
-        if self.root.focus_get() in self.entries.values():
-            for (sheet_name, art), entry in self.entries.items():
-                if entry == self.root.focus_get():
-                    value = entry.get()
-                    if value:
-                        self.entry_values[(sheet_name, art)] = value
-                    else:
-                        self.entry_values.pop((sheet_name, art), None)
-                    break
-        spec_data = []
-        radiator_data = []
-        bracket_data = []
-        brackets_temp = {}
-
-        # Обработка радиаторов
-        for (sheet_name, art), value in self.entry_values.items():
-            if value and sheet_name in self.sheets:
-                try:
-                    # Получаем значение из entry_values (может быть "1+3")
-                    raw_value = self.entry_values.get((sheet_name, art), "")
-                    # Вычисляем сумму только при формировании спецификации
-                    qty_radiator = self.parse_quantity(raw_value)
-                    mask = self.sheets[sheet_name]['Артикул'] == art
-                    product = self.sheets[sheet_name].loc[mask]
-                    
-                    if product.empty:
-                        continue
-                    
-                    product = product.iloc[0]
-                    radiator_type = sheet_name.split()[-1]
-                    price = float(product['Цена, руб'])
-                    # Получаем скидку из переменной интерфейса
-                    discount = float(self.radiator_discount_var.get()) if self.radiator_discount_var.get() else 0.0
-                    discounted_price = round(price * (1 - discount / 100), 2)
-                    total = round(discounted_price * qty_radiator, 2)
-                    
-                    # Извлекаем параметры для сортировки из наименования
-                    name_parts = product['Наименование'].split('/')
-                    height = int(name_parts[-2].replace('мм', '').strip())
-                    length = int(name_parts[-1].replace('мм', '').strip().split()[0])
-                    
-                    # Определяем Вид подключения для сортировки
-                    connection_type = "VK" if "VK" in sheet_name else "K"
-                    
-                    radiator_data.append({
-                        "№": len(radiator_data) + 1,
-                        "Артикул": str(product['Артикул']).strip(),
-                        "Наименование": str(product['Наименование']),
-                        "Мощность, Вт": float(product.get('Мощность, Вт', 0)),
-                        "Цена, руб (с НДС)": float(price),
-                        "Скидка, %": float(discount),
-                        "Цена со скидкой, руб (с НДС)": float(discounted_price),
-                        "Кол-во": int(qty_radiator),
-                        "Сумма, руб (с НДС)": float(total),
-                        "ConnectionType": connection_type,  # Для группировки VK/K
-                        "RadiatorType": int(radiator_type),  # Тип радиатора (10, 11, 20 и т.д.)
-                        "Height": height,  # Высота для сортировки
-                        "Length": length  # Длина для сортировки
-                    })
-
-                    # Обработка кронштейнов (только если не добавлены в предпросмотре)
-                    if self.bracket_var.get() != "Без кронштейнов" and not hasattr(self, 'preview_brackets_added'):
-                        brackets = self.calculate_brackets(
-                            radiator_type=radiator_type,
-                            length=length,
-                            height=height,
-                            bracket_type=self.bracket_var.get(),
-                            qty_radiator=qty_radiator
-                        )
-                        
-                        for art_bracket, qty_bracket in brackets:
-                            mask_bracket = self.brackets_df['Артикул'] == art_bracket
-                            bracket_info = self.brackets_df.loc[mask_bracket]
-                            
-                            if bracket_info.empty:
-                                continue
-                                
-                            key = art_bracket.strip()
-                            if key not in brackets_temp:
-                                brackets_temp[key] = {
-                                    "Артикул": art_bracket,
-                                    "Наименование": str(bracket_info.iloc[0]['Наименование']),
-                                    "Цена, руб (с НДС)": float(bracket_info.iloc[0]['Цена, руб']),
-                                    "Кол-во": 0,
-                                    "Сумма, руб (с НДС)": 0.0
-                                }
-                            
-                            price_bracket = float(bracket_info.iloc[0]['Цена, руб'])
-                            # Получаем скидку на кронштейны из переменной интерфейса
-                            discount_bracket = float(self.bracket_discount_var.get()) if self.bracket_discount_var.get() else 0.0
-                            discounted_price_bracket = round(price_bracket * (1 - discount_bracket / 100), 2)
-                            qty_total = qty_bracket
-                            
-                            brackets_temp[key]["Кол-во"] += int(qty_total)
-                            brackets_temp[key]["Сумма, руб (с НДС)"] += round(discounted_price_bracket * qty_total, 2)
-
-                except Exception as e:
-                    messagebox.showerror("Ошибка", f"Ошибка в данных радиатора: {str(e)}")
-                    return None
-
-        # Формирование данных кронштейнов
-        if brackets_temp:
-            for b in brackets_temp.values():
-                bracket_discount = float(self.bracket_discount_var.get()) if self.bracket_discount_var.get() else 0.0
-                price_with_discount = round(float(b["Цена, руб (с НДС)"]) * (1 - bracket_discount / 100), 2)
-                
-                bracket_data.append({
-                    "№": len(radiator_data) + len(bracket_data) + 1,
-                    "Артикул": str(b["Артикул"]),
-                    "Наименование": str(b["Наименование"]),
-                    "Мощность, Вт": 0.0,
-                    "Цена, руб (с НДС)": float(b["Цена, руб (с НДС)"]),
-                    "Скидка, %": float(bracket_discount),
-                    "Цена со скидкой, руб (с НДС)": float(price_with_discount),
-                    "Кол-во": int(b["Кол-во"]),
-                    "Сумма, руб (с НДС)": float(b["Сумма, руб (с НДС)"]),
-                    "ConnectionType": "Bracket"  # Для кронштейнов
-                })
+        self.commit_focused_entry()
 
-        radiator_data_sorted = sorted(
-            radiator_data, 
-            key=lambda x: (
-                0 if x["ConnectionType"] == "VK" else 1,  # Сначала VK, потом K
-                x["RadiatorType"],  # Затем по типу радиатора (10, 11, 20...)
-                x["Height"],  # Затем по высоте
-                x["Length"]  # Затем по длине
-            )
-        )
-        
-        # Обновляем номера после сортировки
-        for i, item in enumerate(radiator_data_sorted, 1):
-            item["№"] = i
-        
-        # Объединение данных (отсортированные радиаторы + кронштейны)
-        combined_data = radiator_data_sorted + bracket_data
-        
-        if not combined_data:
-            messagebox.showwarning("Пусто", "Нет данных для формирования спецификации")
+        try:
+            df = self.spec_model.snapshot()
+        except Exception as e:
+            messagebox.showerror("Ошибка", f"Ошибка в данных радиатора: {str(e)}")
             return None
 
-        # Создание DataFrame (удаляем временные поля для сортировки)
-        df = pd.DataFrame(
-            combined_data,
-            columns=[
-                "№", "Артикул", "Наименование", "Мощность, Вт",
-                "Цена, руб (с НДС)", "Скидка, %",
-                "Цена со скидкой, руб (с НДС)", "Кол-во",
-                "Сумма, руб (с НДС)"
-            ]
-        )
-        
+        if df is None:
+            messagebox.showwarning("Пусто", "Нет данных для формирования спецификации")
+            return None
         return df
 
     def load_excel_spec(self):
@@ -2058,88 +2260,30 @@ class RadiatorApp:
             return
 
         try:
-            # Определяем движок для чтения
-            if file_path.endswith('.xlsx'):
-                engine = 'openpyxl'
-            elif file_path.endswith('.xls'):
-                engine = 'xlrd'
-            else:
-                messagebox.showerror("Ошибка", "Неподдерживаемый формат файла")
-                return
-
-            # Читаем весь файл для анализа
-            df = pd.read_excel(file_path, engine=engine, header=None)
+            data_rows, rows_count = read_article_spec(file_path)
 
-            # 1. Находим столбцы с артикулами и количеством
-            art_col = None
-            qty_col = None
-            
-            # Перебираем все строки сверху вниз
-            for i, row in df.iterrows():
-                # Ищем в текущей строке нужные заголовки
-                for j, cell in enumerate(row):
-                    cell_str = str(cell).strip().lower()
-                    
-                    # Проверяем возможные варианты названий столбцов
-                    if not art_col and any(x in cell_str for x in ['артикул', 'art', 'код']):
-                        art_col = j
-                    if not qty_col and any(x in cell_str for x in ['кол-во', 'количество', 'qty']):
-                        qty_col = j
-                
-                # Если нашли оба столбца - выходим из цикла
-                if art_col is not None and qty_col is not None:
-                    header_row = i  # Запоминаем строку с заголовками
-                    break
-            
-            # Если не нашли нужные столбцы - берем первые два столбца
-            if art_col is None:
-                art_col = 0
-            if qty_col is None:
-                qty_col = 1 if len(df.columns) > 1 else 0
-
-            # 2. Читаем данные, начиная со строки после найденных заголовков
-            data_rows = []
-            for i in range(header_row + 1, len(df)):
-                art = str(df.iloc[i, art_col]).strip()
-                qty = df.iloc[i, qty_col]
-                
-                # Пропускаем пустые строки и строки "Итого"
-                if not art or art.lower() == 'итого':
-                    continue
-                    
-                try:
-                    qty = float(qty)
-                    if qty > 0:
-                        data_rows.append((art, int(qty)))
-                except (ValueError, TypeError):
-                    continue
-
-            # 3. Очищаем текущие значения и загружаем новые
+            # 1. Очищаем текущие значения и загружаем новые
             self.entry_values.clear()
             total_loaded = 0
             total_qty = 0
             
             for art, qty in data_rows:
                 # Ищем артикул в данных программы
-                found = False
-                for sheet_name, sheet_data in self.sheets.items():
-                    if art in sheet_data['Артикул'].astype(str).str.strip().values:
-                        self.entry_values[(sheet_name, art)] = str(qty)
-                        total_loaded += 1
-                        total_qty += qty
-                        found = True
-                        break
-                
-                if not found:
+                product = self.catalog.find_article(art)
+                if product is not None:
+                    self.entry_values[(product.sheet, art)] = str(qty)
+                    total_loaded += 1
+                    total_qty += qty
+                else:
                     print(f"Артикул не найден: {art}")
 
-            # 4. Обновляем интерфейс
+            # 2. Обновляем интерфейс
             self.refresh_matrix()
             self.global_highlight()
             
             messagebox.showinfo(
                 "Успех",
-            f"   Обработано строк: {len(df)}\n"
+            f"   Обработано строк: {rows_count}\n"
             f"   Загружено артикулов: {total_loaded}\n"
             f"   Общее количество радиаторов: {total_qty}"
             )
@@ -2154,95 +2298,30 @@ class RadiatorApp:
             return
 
         try:
-            encodings = ['utf-8-sig', 'cp1251', 'windows-1251', 'iso-8859-1']
-            df = None
-            
-            for encoding in encodings:
-                try:
-                    # Читаем файл без заголовков сначала
-                    df = pd.read_csv(file_path, sep=';', encoding=encoding, header=None)
-                    
-                    # Проверяем, есть ли заголовки
-                    has_headers = not df.iloc[0, 0].replace('.', '').isdigit()
-                    
-                    if has_headers:
-                        # Читаем снова с заголовками
-                        df = pd.read_csv(file_path, sep=';', encoding=encoding, header=0)
-                    else:
-                        # Берем первые два столбца как артикул и количество
-                        df.columns = ['Артикул', 'Кол-во']
-                    
-                    df = df[df.iloc[:, 0].notna()]
-                    break
-                except UnicodeDecodeError:
-                    continue
-            
-            if df is None:
-                raise ValueError("Не удалось определить кодировку файла")
+            data_rows, rows_count = read_csv_spec(file_path)
 
-            # Определяем индексы столбцов с артикулами и количеством
-            art_col = None
-            qty_col = None
-            
-            # Ищем столбцы по возможным названиям
-            for col in df.columns:
-                col_lower = str(col).lower()
-                if 'артикул' in col_lower or 'art' in col_lower or 'код' in col_lower:
-                    art_col = col
-                elif 'кол-во' in col_lower or 'количество' in col_lower or 'qty' in col_lower:
-                    qty_col = col
-            
-            # Если не нашли стандартные названия - берем первые два столбца
-            if art_col is None:
-                art_col = df.columns[0]
-            if qty_col is None:
-                qty_col = df.columns[1] if len(df.columns) > 1 else None
-
-            if qty_col is None:
-                messagebox.showerror("Ошибка", "Не найден столбец с количеством")
-                return
-
-            # Удаляем пробелы из артикулов
-            df[art_col] = df[art_col].astype(str).str.replace(' ', '').str.strip()
-            
-            # Преобразуем количество в целые числа
-            df[qty_col] = df[qty_col].astype(str).str.replace('.0', '').str.strip()
-            df[qty_col] = pd.to_numeric(df[qty_col], errors='coerce').fillna(0).astype(int)
-            
             # Очищаем текущие значения
             self.entry_values.clear()
             
             total_qty_radiators = 0
             total_qty_brackets = 0
 
-            # Группируем по артикулам и суммируем количества
-            grouped_df = df.groupby(art_col)[qty_col].sum().reset_index()
-
-            for _, row in grouped_df.iterrows():
-                art = str(row[art_col]).strip()
-                qty = int(row[qty_col])  # Гарантированно целое число
-
+            for art, qty in data_rows:
                 # Ищем артикул во всех листах матрицы
-                found = False
-                for sheet_name, sheet_data in self.sheets.items():
-                    mask = sheet_data['Артикул'].astype(str).str.strip() == art
-                    if mask.any():
-                        product = sheet_data[mask].iloc[0]
-                        # Сохраняем как строку без .0
-                        self.entry_values[(sheet_name, art)] = str(int(qty))
-                        total_qty_radiators += qty
-                        found = True
-                        break
-
-                if not found:
+                product = self.catalog.find_article(art)
+                if product is not None:
+                    # Сохраняем как строку без .0
+                    self.entry_values[(product.sheet, art)] = str(int(qty))
+                    total_qty_radiators += qty
+                else:
                     print(f"Артикул не найден в матрице: {art}")
 
-            # Полностью пересоздаем матрицу с новыми значениями
+            # Обновляем ячейки матрицы новыми значениями
             self.show_selected_matrix()
             self.global_highlight()
 
             messagebox.showinfo("Успех", f"""
-            Загружено строк: {len(df)}
+            Загружено строк: {rows_count}
             Всего радиаторов: {total_qty_radiators}
             """)
 
@@ -2251,28 +2330,13 @@ class RadiatorApp:
 
     def highlight_filled_cells(self):
         """Подсвечивает заполненные ячейки"""
-        has_values = False
-        
-        # Проверяем, есть ли хотя бы одно заполненное поле
-        for (sheet_name, art), entry in self.entries.items():
-            value = self.entry_values.get((sheet_name, art), "")
-            if value:
-                has_values = True
-                break
-        
-        # Окрашиваем все ячейки
-        for (sheet_name, art), entry in self.entries.items():
-            value = self.entry_values.get((sheet_name, art), "")
-            if value:
-                # Заполненные ячейки - желтый цвет
-                entry.config(background='#e6f3ff')  # Желтый цвет для заполненных ячеек
-            else:
-                if has_values:
-                    # Незаполненные ячейки при наличии заполненных - голубой цвет
-                    entry.config(background='#e6f3ff')
-                else:
-                    # Если нет заполненных ячеек - белый фон
-                    entry.config(background='white')
+        if self.matrix_view is not None:
+            self.matrix_view.redraw()
+        # Заполненные и незаполненные ячейки окрашиваются одинаково, если на листе есть значения
+        sheet_name = f"{self.connection_var.get()} {self.radiator_type_var.get()}"
+        color = '#e6f3ff' if self.entry_values.filled(sheet_name) else 'white'
+        for entry in self.entries.values():
+            entry.config(background=color)
 
     def reset_cell_colors(self):
         """Возвращает стандартный цвет всем ячейкам"""
@@ -2282,39 +2346,55 @@ class RadiatorApp:
             else:
                 entry.config(background='white')
 
-    def update_treeview(self, tree, spec_data):
-        """Обновляет данные в Treeview"""
-        tree.delete(*tree.get_children())
-        for _, row in spec_data.iterrows():
-            formatted_row = [
-                row["№"],
-                row["Артикул"],
-                row["Наименование"],
-                row["Мощность, Вт"],
-                f"{float(row['Цена, руб (с НДС)']):.2f}",
-                f"{float(row['Скидка, %']):.2f}",
-                f"{float(row['Цена со скидкой, руб (с НДС)']):.2f}",
-                row["Кол-во"],
-                f"{float(row['Сумма, руб (с НДС)']):.2f}"
-            ]
-            tree.insert("", "end", values=formatted_row)
-        
-        # Добавляем итоговую строку
-        total_sum = spec_data["Сумма, руб (с НДС)"].sum()
-        total_qty_radiators = sum(spec_data.query("Наименование.str.contains('Радиатор')")["Кол-во"].apply(self.parse_quantity))
-        total_qty_brackets = sum(spec_data.query("Наименование.str.contains('Кронштейн')")["Кол-во"].apply(self.parse_quantity))
-        
-        tree.insert("", "end", values=[
+    def preview_rows(self, table, start, stop):
+        """Строки таблицы предпросмотра с start по stop (без stop): строки спецификации и "Итого" """
+        rows = [(self.format_preview_row(row), ()) for row in table.rows(start, stop)]
+        if stop > len(table):
+            rows.append((self.preview_total_values(table), ("total",)))
+        return rows
+
+    def format_preview_row(self, row):
+        """
+        Значения строки Treeview для строки SpecTable.rows
+        (значения в порядке SPEC_COLUMNS и вид строки)
+        """
+        number, art, name, power, price, discount, discounted_price, qty, line_sum, kind = row
+        return [
+            number,
+            str(art),  # Артикул как строка без форматирования
+            name,
+            # Убираем нули в столбце "Мощность, Вт" для кронштейнов
+            "" if kind == ROW_BRACKET else power,
+            f"{float(price):.2f}".replace('.', ','),  # Замена точки на запятую
+            f"{float(discount):.2f}".replace('.', ','),
+            f"{float(discounted_price):.2f}".replace('.', ','),
+            qty,
+            f"{float(line_sum):.2f}".replace('.', ',')
+        ]
+
+    def preview_total_values(self, totals):
+        """Значения строки "Итого" по накопленным итогам таблицы SpecTable"""
+        return [
             "Итого", "", "", "", "", "", "",
-            f"{total_qty_radiators} / {total_qty_brackets}",
-            f"{total_sum:.2f}"
-        ], tags=("total",))
-        tree.tag_configure("total", background="#e0e0e0", font=("Segoe UI", 9, "bold"))             
+            f"{totals.radiators} / {totals.brackets}",
+            f"{totals.total:.2f}"
+        ]
+
+    def update_preview_totals(self):
+        """Обновляет строку "Итого" (если она показана) и итоги под таблицей"""
+        totals = self._current_spec_table
+        view = self._preview_view
+        view.refresh_row(view.row_count() - 1)
+        if hasattr(self, 'totals_power_label'):
+            self.totals_power_label.config(text=f"Суммарная мощность: {self.format_power(round(totals.power, 2))}")
+            self.totals_weight_label.config(text=f"Общий вес: {self.format_weight(totals.weight)}")
+            self.totals_volume_label.config(text=f"Общий объём: {totals.volume:.5f} м³")
 
     def generate_spec(self, file_type="excel", tree=None):
         # Если вызывается из окна предпросмотра, используем сохраненные данные
-        if hasattr(self, '_current_spec_data') and self._current_spec_data is not None:
-            spec_data = self._current_spec_data
+        if hasattr(self, '_current_spec_table') and self._current_spec_table is not None:
+            # DataFrame строится из таблицы предпросмотра только для выгрузки
+            spec_data = self._current_spec_table.to_frame()
         else:
             # Иначе готовим данные как обычно
             spec_data = self.prepare_spec_data()
@@ -2380,6 +2460,7 @@ class RadiatorApp:
                 return
 
             try:
+                import pandas as pd
                 df = pd.DataFrame({
                     "Артикул": spec_data["Артикул"],
                     "Кол-во": spec_data["Кол-во"]
@@ -2391,289 +2472,11 @@ class RadiatorApp:
 
     def save_excel_spec(self, spec_data, path, correspondence_data=None):
         """Сохраняет спецификацию в Excel с сортировкой по типоразмеру"""
-        from openpyxl.styles import Font, Alignment, Border, Side, numbers
-        from openpyxl.utils import get_column_letter
-
-        # Создаем книгу и лист
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Спецификация"
-
-        # Стили оформления
-        header_font = Font(name='Calibri', size=11, bold=True)
-        data_font = Font(name='Calibri', size=11)
-        bold_font = Font(name='Calibri', size=11, bold=True)
-        alignment_center = Alignment(horizontal='center', vertical='center')
-        alignment_left = Alignment(horizontal='left', vertical='center')
-        thin_border = Border(
-            left=Side(style='thin'), 
-            right=Side(style='thin'),
-            top=Side(style='thin'), 
-            bottom=Side(style='thin')
-        )
-        
-        # Стиль для денежных значений (2 знака после запятой)
-        money_style = numbers.FORMAT_NUMBER_COMMA_SEPARATED1
-
-        # Заголовки столбцов
-        headers = [
-            "№", "Артикул", "Наименование", "Мощность, Вт",
-            "Цена, руб (с НДС)", "Скидка, %", 
-            "Цена со скидкой, руб (с НДС)", "Кол-во", 
-            "Сумма, руб (с НДС)"
-        ]
-        ws.append(headers)
-
-        # Применяем стили к заголовкам
-        for col in range(1, len(headers) + 1):
-            cell = ws.cell(row=1, column=col)
-            cell.font = header_font
-            cell.alignment = alignment_center
-            cell.border = thin_border
-
-        # Разделяем радиаторы и кронштейны
-        radiator_data = []
-        bracket_data = []
-        
-        for _, row in spec_data.iterrows():
-            if "Кронштейн" in str(row["Наименование"]):
-                bracket_data.append(row)
-            else:
-                radiator_data.append(row)
-        
-        # Функция для извлечения параметров сортировки из наименования
-        def get_sort_key(row):
-            name = str(row["Наименование"])
-            # Определяем тип подключения
-            connection_type = 0 if "VK" in name else 1  # Сначала VK, потом K
-            
-            # Извлекаем тип радиатора (10, 11, 20 и т.д.)
-            radiator_type = 0
-            if "тип 10" in name: radiator_type = 10
-            elif "тип 11" in name: radiator_type = 11
-            elif "тип 20" in name: radiator_type = 20
-            elif "тип 21" in name: radiator_type = 21
-            elif "тип 22" in name: radiator_type = 22
-            elif "тип 30" in name: radiator_type = 30
-            elif "тип 33" in name: radiator_type = 33
-            
-            # Извлекаем высоту и длину
-            parts = name.split('/')
-            height = int(parts[-2].replace('мм', '').strip())
-            length = int(parts[-1].replace('мм', '').strip().split()[0])
-            
-            return (connection_type, radiator_type, height, length)
-        
-        # Сортировка радиаторов
-        radiator_data_sorted = sorted(radiator_data, key=get_sort_key)
-        
-        # Объединение данных (отсортированные радиаторы + кронштейны)
-        combined_data = radiator_data_sorted + bracket_data
-        
-        # Заполняем Excel
-        for i, row in enumerate(combined_data, 2):  # Начинаем с 2 строки
-            # Для кронштейнов заменяем 0 на пустую строку в столбце мощности
-            power_value = "" if "Кронштейн" in str(row["Наименование"]) else row["Мощность, Вт"]
-            
-            ws.append([
-                i-1,  # №
-                str(row["Артикул"]),  # Артикул как строка
-                row["Наименование"],
-                power_value,
-                float(row['Цена, руб (с НДС)']),
-                float(row['Скидка, %']),
-                float(row['Цена со скидкой, руб (с НДС)']),
-                int(row['Кол-во']),
-                float(row['Сумма, руб (с НДС)'])
-            ])
-
-            # Форматируем строки данных
-            for col in range(1, len(headers) + 1):
-                cell = ws.cell(row=i, column=col)
-                cell.font = data_font
-                cell.border = thin_border
-                
-                # Устанавливаем числовые форматы
-                if col in [5, 7, 9]:  # Столбцы с ценами и суммами
-                    cell.number_format = money_style
-                    cell.alignment = alignment_center
-                elif col == 4:  # Столбец "Мощность, Вт" - центрируем
-                    cell.alignment = alignment_center
-                elif col in [1, 6, 8]:  # Другие числовые столбцы
-                    cell.alignment = alignment_center
-                else:
-                    cell.alignment = alignment_left
-
-        # Добавляем итоговую строку
-        total_row = len(combined_data) + 2
-        total_sum = spec_data["Сумма, руб (с НДС)"].sum()
-        total_qty_radiators = sum(spec_data.query("Наименование.str.contains('Радиатор')")["Кол-во"].apply(self.parse_quantity))
-        total_qty_brackets = sum(spec_data.query("Наименование.str.contains('Кронштейн')")["Кол-во"].apply(self.parse_quantity))
-        
-        ws.append(["Итого", "", "", "", "", "", "", f"{total_qty_radiators}/{total_qty_brackets}", total_sum])
-        
-        # Форматируем итоговую строку
-        for col in range(1, len(headers) + 1):
-            cell = ws.cell(row=total_row, column=col)
-            cell.font = bold_font
-            cell.border = thin_border
-            cell.alignment = alignment_center
-            if col in [5, 7, 9]:  # Форматируем денежные столбцы
-                cell.number_format = money_style
-
-        # Добавляем вес и объем
-        total_weight, total_volume = self.calculate_total_weight_and_volume(spec_data)
-        
-        # Пустая строка
-        ws.append([])
-
-        # Строка с весом
-        ws.append([f"Суммарный вес радиаторов без учета упаковки и кронштейнов- {total_weight} кг."])
-        ws.merge_cells(start_row=total_row + 2, start_column=1, end_row=total_row + 2, end_column=9)
-        cell = ws.cell(row=total_row + 2, column=1)
-        cell.font = Font(name='Calibri', size=11)
-        cell.alignment = alignment_left
-
-        # Строка с объемом
-        ws.append([f"Суммарный объем радиаторов без учета упаковки и кронштейнов- {total_volume} м3."])
-        ws.merge_cells(start_row=total_row + 3, start_column=1, end_row=total_row + 3, end_column=9)
-        cell = ws.cell(row=total_row + 3, column=1)
-        cell.font = Font(name='Calibri', size=11)
-        cell.alignment = alignment_left
-
-        # Настраиваем ширину столбцов для основного листа
-        column_widths = {
-            'A': 5,    # №
-            'B': 12,   # Артикул
-            'C': 60,   # Наименование
-            'D': 15,   # Мощность
-            'E': 20,   # Цена
-            'F': 10,   # Скидка
-            'G': 30,   # Цена со скидкой
-            'H': 10,   # Кол-во
-            'I': 20    # Сумма
-        }
-
-        for col, width in column_widths.items():
-            ws.column_dimensions[col].width = width
-
-        # Добавляем лист с таблицей соответствия, если есть данные
-        if correspondence_data is not None and not correspondence_data.empty:
-            ws_corr = wb.create_sheet("Таблица соответствия")
-            
-            # Заголовки таблицы соответствия
-            corr_headers = list(correspondence_data.columns)
-            ws_corr.append(corr_headers)
-            
-            # Применяем стили к заголовкам
-            for col in range(1, len(corr_headers) + 1):
-                cell = ws_corr.cell(row=1, column=col)
-                cell.font = header_font
-                cell.alignment = alignment_center
-                cell.border = thin_border
-            
-            # Заполняем данные
-            for i, row in correspondence_data.iterrows():
-                ws_corr.append(list(row))
-                
-                # Форматируем строки данных
-                for col in range(1, len(corr_headers) + 1):
-                    cell = ws_corr.cell(row=i+2, column=col)
-                    cell.font = data_font
-                    cell.border = thin_border
-                    # Центрируем только столбец "Количество" (2-й столбец)
-                    if col == 2:
-                        cell.alignment = alignment_center
-                    else:
-                        cell.alignment = alignment_left
-            
-            # Автоподбор ширины столбцов для листа соответствия
-            for col_idx, column_name in enumerate(corr_headers, 1):
-                max_length = len(str(column_name))  # Начинаем с длины заголовка
-                column_letter = get_column_letter(col_idx)
-                
-                # Ищем максимальную длину содержимого в столбце
-                for row in ws_corr.iter_rows(min_col=col_idx, max_col=col_idx):
-                    for cell in row:
-                        try:
-                            cell_length = len(str(cell.value))
-                            if cell_length > max_length:
-                                max_length = cell_length
-                        except:
-                            pass
-                
-                # Устанавливаем ширину с небольшим запасом
-                adjusted_width = (max_length + 2) * 1.2
-                ws_corr.column_dimensions[column_letter].width = adjusted_width
-
-        # Сохраняем файл
-        wb.save(path)
+        self.engine.save_excel(spec_data, path, correspondence_data)
 
     def calculate_totals(self, spec_data):
-        total_weight = 0.0
-        total_volume = 0.0
-        
-        for _, row in spec_data.iterrows():
-            art = str(row['Артикул']).strip()
-            qty = int(row['Кол-во'])
-            
-            for sheet, data in self.sheets.items():
-                data_arts = data['Артикул'].astype(str).str.strip()
-                product = data[data_arts == art]
-                if not product.empty:
-                    total_weight += float(product.iloc[0]['Вес, кг']) * qty
-                    total_volume += float(product.iloc[0]['Объем, м3']) * qty
-                    break
-        
-        return float(total_weight), float(total_volume)
-    
-    def create_header_tooltip(self, tree, column, text):
-        """Создает подсказку для конкретного заголовка столбца"""
-        def show_tooltip(event):
-            # Получаем координаты заголовка
-            x = tree.winfo_rootx() + tree.column(column, 'x') 
-            y = tree.winfo_rooty() - 20  # Сдвигаем выше заголовка
-            
-            # Создаем подсказку
-            tooltip = tk.Toplevel(tree)
-            tooltip.wm_overrideredirect(True)
-            tooltip.wm_geometry(f"+{x}+{y}")
-            
-            label = ttk.Label(
-                tooltip, 
-                text=text, 
-                background="#ffffe0", 
-                relief="solid", 
-                padding=5,
-                font=("Segoe UI", 9)
-            )
-            label.pack()
-            
-            tooltip.after(300, tooltip.destroy)  # Автоматическое закрытие через 0.3 сек
-
-        # Привязываем события
-        tree.tag_bind(column, "<Enter>", show_tooltip)
-
+        return self.engine.spec_weight_volume(spec_data)
     
-    def create_header_tooltip(self, widget, text):
-        """Создает подсказку для заголовка столбца"""
-        tooltip = tk.Toplevel(self.root)
-        tooltip.wm_overrideredirect(True)
-        tooltip.withdraw()
-        
-        label = ttk.Label(
-            tooltip, 
-            text=text, 
-            background="#ffffe0", 
-            relief="solid", 
-            padding=5,
-            font=("Segoe UI", 9)
-        )
-        label.pack()
-        
-        widget.bind("<Enter>", lambda e: self.show_header_tooltip(tooltip, widget))
-        widget.bind("<Leave>", lambda e: tooltip.withdraw())
-
     def format_power(self, power_w):
         """
         Форматирует мощность с автоматическим выбором единиц измерения:
@@ -2720,29 +2523,7 @@ class RadiatorApp:
             total_weight (float): Суммарный вес в кг
             total_volume (float): Суммарный объем в м³
         """
-        total_weight = 0.0
-        total_volume = 0.0
-        
-        # Перебираем все строки в спецификации
-        for index, row in spec_data.iterrows():
-            # Пропускаем строку "Итого" и кронштейны
-            if row["№"] == "Итого" or "Кронштейн" in str(row["Наименование"]):
-                continue
-            
-            # Получаем артикул и количество
-            art = str(row["Артикул"]).strip()
-            qty = int(row["Кол-во"])
-            
-            # Ищем радиатор в данных
-            for sheet_name, data in self.sheets.items():
-                # Проверяем наличие артикула в текущем листе
-                product = data[data["Артикул"].str.strip() == art]
-                if not product.empty:
-                    # Суммируем вес и объем
-                    total_weight += float(product.iloc[0]["Вес, кг"]) * qty
-                    total_volume += float(product.iloc[0]["Объем, м3"]) * qty
-                    break  # Прерываем поиск после нахождения
-        
+        total_weight, total_volume = self.engine.spec_weight_volume(spec_data)
         # Округляем значения как в образце
         return round(total_weight, 1), round(total_volume, 3)
 
@@ -2769,12 +2550,6 @@ class RadiatorApp:
         else:
             self.hide_header_tooltip()
 
-    def hide_header_tooltip(self):
-        """Скрывает текущую подсказку"""
-        if self.tooltip:
-            self.tooltip.destroy()
-            self.tooltip = None               
-
     def preview_spec(self):
         # Проверяем, существует ли уже окно предпросмотра
         if hasattr(self, '_preview_window') and self._preview_window and self._preview_window.winfo_exists():
@@ -2783,7 +2558,6 @@ class RadiatorApp:
             self._preview_window.focus_force()
             return
         
-        self.tooltip = None
         # Сохраняем значение из текущей активной ячейки (если есть)
         if self.root.focus_get() in self.entries.values():
             for (sheet_name, art), entry in self.entries.items():
@@ -2809,30 +2583,34 @@ class RadiatorApp:
         main_frame = ttk.Frame(preview)
         main_frame.pack(fill="both", expand=True, padx=15, pady=15)
 
-        # Фрейм для таблицы с прокруткой
-        tree_frame = ttk.Frame(main_frame)
-        tree_frame.pack(fill="both", expand=True)
-
-        # Настраиваем стиль для Treeview
-        style = ttk.Style()
-        
-        # Создаем Treeview
+        # Таблица с виртуальной прокруткой: строки форматируются только для показанной части
         columns = list(spec_data.columns)
-        tree = ttk.Treeview(
-            tree_frame,
-            columns=columns,
+        # Строки хранятся в столбцах-массивах SpecTable; DataFrame строится только при выгрузке
+        table = SpecTable.from_frame(self.engine, spec_data)
+        # Сохраняем ссылку на таблицу для итогов и для использования при экспорте
+        self._current_spec_table = table
+        view = VirtualTreeview(
+            main_frame,
+            columns,
+            row_count=lambda: len(table) + 1,  # Строки спецификации и "Итого"
+            rows=lambda start, stop: self.preview_rows(table, start, stop),
             show="headings",
             selectmode="extended",
             style='Treeview'
         )
-        
+        view.frame.pack(fill="both", expand=True)
+        tree = view.tree
+        self._preview_view = view
+        # Перед прокруткой сохраняем редактируемое значение: строка Treeview покажет другую строку
+        view.before_scroll = lambda: self.finish_editing(tree)
+
         # Добавляем тег для редактируемых ячеек
         tree.tag_configure('editable', foreground='blue')
         
         # Привязываем обработчики событий для редактирования
-        tree.bind('<Double-1>', lambda e: self.on_cell_double_click(e, tree, spec_data))
-        tree.bind('<Return>', lambda e: self.on_cell_edit_finish(e, tree, spec_data))
-        tree.bind('<FocusOut>', lambda e: self.on_cell_edit_finish(e, tree, spec_data))
+        tree.bind('<Double-1>', lambda e: self.on_cell_double_click(e, tree, table))
+        tree.bind('<Return>', lambda e: self.on_cell_edit_finish(e, tree, table))
+        tree.bind('<FocusOut>', lambda e: self.on_cell_edit_finish(e, tree, table))
 
         # Привязки для подсказок (оставлены без изменений)
         tree.bind("<Motion>", lambda e: self.on_treeview_motion(e, tree))
@@ -2854,9 +2632,9 @@ class RadiatorApp:
         # Конфигурация заголовков
         for col in columns:
             if col == "Артикул":
-                tree.heading(col, text=col, command=lambda: self.copy_articul_column(spec_data))
+                tree.heading(col, text=col, command=lambda: self.copy_articul_column(table))
             elif col == "Кол-во":
-                tree.heading(col, text=col, command=lambda: self.copy_quantity_column(spec_data))
+                tree.heading(col, text=col, command=lambda: self.copy_quantity_column(table))
             else:
                 tree.heading(col, text=col)
                 
@@ -2866,70 +2644,23 @@ class RadiatorApp:
                 anchor="center" if col != "Наименование" else "w"
             )
 
-        # Изменяем часть с добавлением данных в Treeview:
-        for _, row in spec_data.iterrows():
-            # Здесь убираем нули в столбце "Мощность, Вт" для кронштейнов
-            power_value = "" if "Кронштейн" in str(row["Наименование"]) else row["Мощность, Вт"]
-            
-            formatted_row = [
-                row["№"],
-                str(row["Артикул"]),  # Артикул как строка без форматирования
-                row["Наименование"],
-                power_value,
-                f"{float(row['Цена, руб (с НДС)']):.2f}".replace('.', ','),  # Замена точки на запятую
-                f"{float(row['Скидка, %']):.2f}".replace('.', ','),
-                f"{float(row['Цена со скидкой, руб (с НДС)']):.2f}".replace('.', ','),
-                row["Кол-во"],
-                f"{float(row['Сумма, руб (с НДС)']):.2f}".replace('.', ',')
-            ]
-            tree.insert("", "end", values=formatted_row)
-
-        # Итоговая строка
-        total_sum = spec_data["Сумма, руб (с НДС)"].sum()
-        total_qty_radiators = sum(spec_data.query("Наименование.str.contains('Радиатор')")["Кол-во"].apply(self.parse_quantity))
-        total_qty_brackets = sum(spec_data.query("Наименование.str.contains('Кронштейн')")["Кол-во"].apply(self.parse_quantity))
-
-        total_item = tree.insert("", "end", values=[
-            "Итого", "", "", "", "", "", "",
-            f"{total_qty_radiators} / {total_qty_brackets}",
-            f"{total_sum:.2f}"
-        ], tags=("total",))
+        # Показанные строки таблицы и итоговая строка
         tree.tag_configure("total", background="#e0e0e0", font=("Segoe UI", 9, "bold"))
+        view.refresh()
 
-        # Прокрутка
-        vsb = ttk.Scrollbar(tree_frame, orient="vertical", command=tree.yview)
-        hsb = ttk.Scrollbar(tree_frame, orient="horizontal", command=tree.xview)
-        tree.configure(yscrollcommand=vsb.set, xscrollcommand=hsb.set)
-
-        # Упаковка элементов
-        tree.grid(row=0, column=0, sticky="nsew")
-        vsb.grid(row=0, column=1, sticky="ns")
-        hsb.grid(row=1, column=0, sticky="ew")
-        tree_frame.grid_rowconfigure(0, weight=1)
-        tree_frame.grid_columnconfigure(0, weight=1)
-
-        # Расчет итогов
-        total_power = self.calculate_total_power(spec_data)
-        total_weight, total_volume = self.calculate_totals(spec_data)
-
-        # Фрейм для итогов
+        # Фрейм для итогов (значения заполняет update_preview_totals)
         totals_frame = ttk.Frame(main_frame)
         totals_frame.pack(fill="x", pady=10)
 
-        self.totals_power_label = ttk.Label(totals_frame, 
-            text=f"Суммарная мощность: {self.format_power(total_power)}", 
-            font=("Segoe UI", 9, "bold"))
+        self.totals_power_label = ttk.Label(totals_frame, font=("Segoe UI", 9, "bold"))
         self.totals_power_label.grid(row=0, column=0, padx=15, sticky="w")
 
-        self.totals_weight_label = ttk.Label(totals_frame, 
-            text=f"Общий вес: {self.format_weight(total_weight)}", 
-            font=("Segoe UI", 9, "bold"))
+        self.totals_weight_label = ttk.Label(totals_frame, font=("Segoe UI", 9, "bold"))
         self.totals_weight_label.grid(row=0, column=1, padx=15, sticky="w")
 
-        self.totals_volume_label = ttk.Label(totals_frame, 
-            text=f"Общий объём: {total_volume:.5f} м³", 
-            font=("Segoe UI", 9, "bold"))
+        self.totals_volume_label = ttk.Label(totals_frame, font=("Segoe UI", 9, "bold"))
         self.totals_volume_label.grid(row=0, column=2, padx=15, sticky="w")
+        self.update_preview_totals()
 
         # Фрейм управления
         control_frame = ttk.Frame(main_frame)
@@ -2972,7 +2703,7 @@ class RadiatorApp:
                     bracket_combobox, 
                     quantity_entry, 
                     tree, 
-                    spec_data
+                    table
                 )
             ).pack(side="left", padx=5)
 
@@ -2989,12 +2720,10 @@ class RadiatorApp:
             text="Экспорт в файл CSV", 
             command=lambda: self.generate_spec("csv", tree)
         ).pack(side="left", padx=5)
-        
-        # Сохраняем ссылку на spec_data для использования при экспорте
-        self._current_spec_data = spec_data
+
 
         # Контекстное меню
-        self.create_context_menu(tree, spec_data)
+        self.create_context_menu(tree, table)
         self._preview_window = preview
 
         # Добавляем обработчик закрытия окна, чтобы обнулить ссылку
@@ -3006,9 +2735,10 @@ class RadiatorApp:
         """Закрывает окно предпросмотра и очищает ссылку"""
         if hasattr(self, '_preview_window') and self._preview_window and self._preview_window.winfo_exists():
             self._preview_window.destroy()
-        self._preview_window = None    
+        self._preview_window = None
+        self._preview_view = None
 
-    def add_bracket_to_spec(self, combobox, entry, tree, spec_data):
+    def add_bracket_to_spec(self, combobox, entry, tree, table):
         """Добавляет выбранный кронштейн в спецификацию"""
         selected_name = combobox.get()
         qty_str = entry.get()
@@ -3039,51 +2769,36 @@ class RadiatorApp:
             if not selected_bracket:
                 raise ValueError("Кронштейн не найден в базе данных")
             
-            # Ищем информацию о кронштейне в DataFrame
-            mask = self.brackets_df['Артикул'] == selected_bracket['Артикул']
-            bracket_info = self.brackets_df.loc[mask].iloc[0]
+            # Ищем информацию о кронштейне в каталоге
+            bracket_info = self.catalog.bracket(selected_bracket['Артикул'])
             
             # Рассчитываем цены
-            price = float(bracket_info['Цена, руб'])
+            price = bracket_info.price
             discount = float(self.bracket_discount_var.get()) if self.bracket_discount_var.get() else 0.0
             discounted_price = price * (1 - discount / 100)
             total = round(discounted_price * qty, 2)
             
-            # После добавления новой строки обновляем сохраненные данные
-            if hasattr(self, '_current_spec_data'):
-                self._current_spec_data = spec_data
-
-            # Добавляем новую запись в спецификацию
-            new_row = {
-                "№": len(spec_data) + 1,
-                "Артикул": selected_bracket['Артикул'],
-                "Наименование": selected_bracket['Наименование'],
-                "Мощность, Вт": 0.0,
-                "Цена, руб (с НДС)": price,
-                "Скидка, %": discount,
-                "Цена со скидкой, руб (с НДС)": discounted_price,
-                "Кол-во": qty,
-                "Сумма, руб (с НДС)": total
-            }
-            
-            spec_data.loc[len(spec_data)] = new_row
-            
-            # Обновляем Treeview
-            self.update_treeview(tree, spec_data)
+            # Добавляем новую строку в конец спецификации (перед "Итого")
+            table.append(
+                selected_bracket['Артикул'],
+                selected_bracket['Наименование'],
+                0.0,
+                price,
+                discount,
+                discounted_price,
+                qty,
+                total,
+                kind=ROW_BRACKET
+            )
+
+            # Перерисовываются только показанные строки, итоги меняются на разницу
+            self._preview_view.refresh()
+            self.update_preview_totals()
             
             # Очищаем поля ввода
             combobox.set('')
             entry.delete(0, tk.END)
             
-            # Обновляем итоговые значения
-            total_power = self.calculate_total_power(spec_data)
-            total_weight, total_volume = self.calculate_totals(spec_data)
-            
-            # Обновляем метки с итогами
-            self.totals_power_label.config(text=f"Суммарная мощность: {self.format_power(total_power)}")
-            self.totals_weight_label.config(text=f"Общий вес: {self.format_weight(total_weight)}")
-            self.totals_volume_label.config(text=f"Общий объём: {total_volume:.5f} м³")
-            
         except ValueError as ve:
             messagebox.showerror("Ошибка", str(ve))
         except Exception as e:
@@ -3091,69 +2806,16 @@ class RadiatorApp:
 
     def show_header_tooltip(self, tree, column_name, x, y):
         """Показывает подсказку над заголовком"""
-        if not hasattr(self, 'tooltip') or not self.tooltip:
-            self.tooltip = tk.Toplevel(tree)
-            self.tooltip.wm_overrideredirect(True)
-            self.tooltip_label = ttk.Label(
-                self.tooltip,
-                text="Нажми для копирования в буфер",
-                background="#ffffe0",
-                relief="solid",
-                padding=5,
-                font=("Segoe UI", 9)
-            )
-            self.tooltip_label.pack()
-        
-        self.tooltip.wm_geometry(f"+{x - 50}+{y - 40}")
-        self.tooltip.deiconify()
+        self.tooltips.show("header", column_name, lambda tooltip: (x - 50, y - 40),
+                           text="Нажми для копирования в буфер")
 
     def hide_header_tooltip(self):
         """Скрывает подсказку"""
-        if hasattr(self, 'tooltip') and self.tooltip:
-            self.tooltip.withdraw()
+        self.tooltips.hide("header")
 
     def parse_quantity(self, value):
-        """
-        Преобразует введенное значение в количество радиаторов.
-        Обрабатывает целые числа, числа с плавающей точкой и комбинации с плюсами.
-        """
-        try:
-            # Если переданное значение — название столбца (например, "Кол-во"), вернуть 0
-            if isinstance(value, str) and value.strip() in ["Кол-во", "№"]:
-                return 0
-                
-            if not value:
-                return 0
-            
-            # Если значение уже число, сразу округляем до ближайшего целого
-            if isinstance(value, (int, float)):
-                return int(round(float(value)))
-        
-            value = str(value).strip()
-            
-            # Удаляем лишние знаки '+' в начале и конце
-            while value.startswith('+'):
-                value = value[1:]
-            while value.endswith('+'):
-                value = value[:-1]
-            
-            # Если осталась пустая строка после очистки, возвращаем 0
-            if not value:
-                return 0
-            
-            # Разбиваем строку по знакам '+' и суммируем отдельные части
-            parts = value.split('+')
-            total = 0
-            for part in parts:
-                part = part.strip()
-                if part:
-                    # Преобразуем каждую часть в float, округляем и добавляем к сумме
-                    total += int(round(float(part)))
-                    
-            return total
-        except Exception as e:
-            print(f"Ошибка преобразования количества: {str(e)}")
-            return 0
+        """Преобразует введенное значение ("1+2", 3.0, "") в количество радиаторов"""
+        return parse_quantity(value)
         
     def reset_fields(self):
         """Сбрасывает все поля и закрывает окно предпросмотра, если оно открыто"""
@@ -3161,8 +2823,8 @@ class RadiatorApp:
         self.entry_values.clear()
         
         # Очищаем сохраненные данные для спецификации
-        if hasattr(self, '_current_spec_data'):
-            del self._current_spec_data
+        if hasattr(self, '_current_spec_table'):
+            del self._current_spec_table
             
         # Очищаем данные о соответствии, если они есть
         if hasattr(self, '_correspondence_df'):
@@ -3176,6 +2838,8 @@ class RadiatorApp:
                     entry.config(bg='white')
             except tk.TclError:
                 continue
+        if self.matrix_view is not None:
+            self.matrix_view.redraw()
                 
         # Сбрасываем скидки к значениям по умолчанию
         self.radiator_discount_var.set("0")
@@ -3202,15 +2866,15 @@ class RadiatorApp:
             return 0 <= float(P) <= 100
         except ValueError:
             return False
-    def on_cell_double_click(self, event, tree, spec_data):
+    def on_cell_double_click(self, event, tree, table):
         """Обработчик двойного клика для редактирования ячейки"""
         region = tree.identify("region", event.x, event.y)
         if region == "cell":
             column = tree.identify_column(event.x)
             item = tree.identify_row(event.y)
             
-            # Разрешаем редактирование только столбца "Кол-во" (8-й столбец)
-            if column == "#8":
+            # Разрешаем редактирование только столбца "Кол-во" (8-й столбец), кроме строки "Итого"
+            if column == "#8" and item and self._preview_view.row_of(item) < len(table):
                 x, y, width, height = tree.bbox(item, column)
                 
                 # Получаем текущее значение
@@ -3226,14 +2890,16 @@ class RadiatorApp:
                 self._edit_item = item
                 self._edit_column = column
                 self._edit_entry = entry
-                self._edit_spec_data = spec_data
+                self._edit_spec_table = table
+                # Постоянный идентификатор строки: номер "№" меняется при удалении строк выше
+                self._edit_row_id = table.row_id(self._preview_view.row_of(item))
                 
                 # Привязываем события
                 entry.bind("<Return>", lambda e: self.finish_editing(tree))
                 entry.bind("<FocusOut>", lambda e: self.finish_editing(tree))
                 entry.bind("<Escape>", lambda e: self.cancel_editing(tree))
 
-    def on_cell_edit_finish(self, event, tree, spec_data):
+    def on_cell_edit_finish(self, event, tree, table):
         """Алиас для finish_editing для привязки событий"""
         self.finish_editing(tree)
 
@@ -3249,21 +2915,14 @@ class RadiatorApp:
             tree.item(item, values=values)
             
             # Обновляем данные спецификации
-            if hasattr(self, '_edit_spec_data'):
-                index = int(values[0]) - 1  # Получаем индекс из столбца "№"
-                if 0 <= index < len(self._edit_spec_data):
-                    # Обновляем количество
-                    self._edit_spec_data.at[index, "Кол-во"] = self.parse_quantity(new_value)
-                    
-                    # Пересчитываем сумму для этой строки
-                    price = float(self._edit_spec_data.at[index, "Цена со скидкой, руб (с НДС)"])
-                    self._edit_spec_data.at[index, "Сумма, руб (с НДС)"] = price * float(self.parse_quantity(new_value))
-                    
-                    # Полностью перезагружаем Treeview с обновленными данными
-                    self.update_treeview(tree, self._edit_spec_data)
-                    
-                    # Обновляем итоговые значения под таблицей
-                    self.update_footer_totals(self._edit_spec_data)
+            if hasattr(self, '_edit_spec_table'):
+                table = self._edit_spec_table
+                # Обновляем количество и сумму строки
+                table.set_qty(self._edit_row_id, self.parse_quantity(new_value))
+
+                # Перерисовываем только эту строку и "Итого", итоги меняются на разницу
+                self._preview_view.refresh_row(table.index_of(self._edit_row_id))
+                self.update_preview_totals()
             
             self._edit_entry.destroy()
             del self._edit_entry
@@ -3281,32 +2940,10 @@ class RadiatorApp:
         tree.focus_set()
 
     def update_totals(self):
-        """Обновляет итоговые значения после редактирования"""
-        if hasattr(self, '_current_spec_data'):
-            spec_data = self._current_spec_data
-            
-            # Пересчитываем суммы
-            spec_data["Сумма, руб (с НДС)"] = spec_data["Цена со скидкой, руб (с НДС)"] * spec_data["Кол-во"]
-            
-            # Обновляем Treeview
-            if hasattr(self, '_preview_window') and self._preview_window.winfo_exists():
-                for widget in self._preview_window.winfo_children():
-                    if isinstance(widget, ttk.Frame):
-                        for subwidget in widget.winfo_children():
-                            if isinstance(subwidget, ttk.Treeview):
-                                self.update_treeview(subwidget, spec_data)
-                                break
-            
-            # Обновляем метки с итогами
-            total_power = self.calculate_total_power(spec_data)
-            total_weight, total_volume = self.calculate_totals(spec_data)
-            
-            if hasattr(self, 'totals_power_label'):
-                self.totals_power_label.config(text=f"Суммарная мощность: {self.format_power(total_power)}")
-            if hasattr(self, 'totals_weight_label'):
-                self.totals_weight_label.config(text=f"Общий вес: {self.format_weight(total_weight)}")
-            if hasattr(self, 'totals_volume_label'):
-                self.totals_volume_label.config(text=f"Общий объём: {total_volume:.5f} м³") 
+        """Перерисовывает таблицу предпросмотра и итоговые значения после редактирования"""
+        if self._preview_view is not None:
+            self._preview_view.refresh()
+            self.update_preview_totals()
 
     def update_footer_totals(self, spec_data):
         """Обновляет итоговые значения под таблицей"""